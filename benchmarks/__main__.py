@@ -0,0 +1,127 @@
+"""
+Benchmark the API and indexing throughput against a stub Meilisearch server.
+
+    python -m benchmarks --sizes 1000 10000 --output results.json
+
+Benchmarks run in a test database created (and destroyed) for the run, on
+the configured PostgreSQL database or, with --database sqlite, on an
+in-memory SQLite one. Caches are per-process memory caches, Meilisearch is
+a local stub answering in constant time, so results measure this project.
+"""
+import argparse
+import json
+import os
+import sys
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1000, 10000],
+        help="Numbers of PublicHoliday models to benchmark with",
+    )
+    parser.add_argument(
+        "--requests", type=int, default=200, help="Measured requests per endpoint"
+    )
+    parser.add_argument(
+        "--warmup", type=int, default=20, help="Unmeasured requests per endpoint"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1000,
+        help="--batch-size of populate_meilisearch_index",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="--concurrency of populate_meilisearch_index",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed of generated data")
+    parser.add_argument(
+        "--database",
+        choices=["default", "sqlite"],
+        default="default",
+        help="Configured database or an in-memory SQLite one",
+    )
+    parser.add_argument(
+        "--output", default=None, help="JSON results file, printed when missing"
+    )
+    parser.add_argument(
+        "--baseline", default=None, help="JSON results of a previous run to compare"
+    )
+    return parser.parse_args(argv)
+
+
+def configure(database):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "django_meilisearch.settings")
+    from django.conf import settings
+
+    # Settings are changed before any connection or cache is used
+    if database == "sqlite":
+        settings.DATABASES = {
+            "default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}
+        }
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+
+    import django
+
+    django.setup()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure(args.database)
+
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    from benchmarks.stub_meilisearch import StubMeilisearch
+    from benchmarks.suite import compare, environment, run_suite
+    from public_holiday.clients import reset_clients
+
+    setup_test_environment(debug=False)
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        with StubMeilisearch() as stub:
+            settings.MEILISEARCH_URL = stub.url
+            reset_clients()
+            results = run_suite(
+                args.sizes,
+                requests=args.requests,
+                warmup=args.warmup,
+                seed=args.seed,
+                batch_size=args.batch_size,
+                concurrency=args.concurrency,
+            )
+            report = {
+                "environment": environment(),
+                "parameters": vars(args),
+                "results": results,
+            }
+            reset_clients()
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+    content = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(content + "\n")
+    else:
+        print(content)
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            lines = compare(results, json.load(baseline)["results"])
+        print("\n".join(lines), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import json
+import re
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+SEARCH_PATH = re.compile(r"^/indexes/(?P<uid>[^/]+)/search$")
+DOCUMENTS_PATH = re.compile(r"^/indexes/(?P<uid>[^/]+)/documents$")
+
+
+class StubMeilisearch:
+    """
+    Local HTTP server answering the Meilisearch calls made by the API and by
+    populate_meilisearch_index.
+
+    Added documents are kept in memory and their tasks succeed at once.
+    Searches answer in constant time whatever the query: they return a page
+    of the documents in id order, so benchmarks measure this project rather
+    than a search engine.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.documents = {}
+        self.tasks = {}
+        self._ordered = None
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), _handler(self))
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def add_documents(self, uid, documents):
+        with self._lock:
+            for document in documents:
+                self.documents[document["id"]] = document
+            self._ordered = None
+            task_uid = len(self.tasks) + 1
+            self.tasks[task_uid] = uid
+        return {
+            "taskUid": task_uid,
+            "indexUid": uid,
+            "status": "enqueued",
+            "type": "documentAdditionOrUpdate",
+            "enqueuedAt": _now(),
+        }
+
+    def get_tasks(self, uids):
+        now = _now()
+        results = [
+            {
+                "uid": uid,
+                "indexUid": self.tasks[int(uid)],
+                "status": "succeeded",
+                "type": "documentAdditionOrUpdate",
+                "details": {},
+                "error": None,
+                "canceledBy": None,
+                "duration": "PT0S",
+                "enqueuedAt": now,
+                "startedAt": now,
+                "finishedAt": now,
+            }
+            for uid in uids
+            if int(uid) in self.tasks
+        ]
+        return {"results": results, "limit": len(results), "from": None, "next": None}
+
+    def search(self, body):
+        with self._lock:
+            if self._ordered is None:
+                self._ordered = [self.documents[key] for key in sorted(self.documents)]
+            ordered = self._ordered
+        offset = body.get("offset", 0)
+        limit = body.get("limit", 20)
+        hits = ordered[offset : offset + limit]
+        attributes = body.get("attributesToRetrieve") or ["*"]
+        if "*" not in attributes:
+            hits = [
+                {key: value for key, value in hit.items() if key in attributes}
+                for hit in hits
+            ]
+        return {
+            "hits": hits,
+            "query": body.get("q", ""),
+            "processingTimeMs": 0,
+            "offset": offset,
+            "limit": limit,
+            "estimatedTotalHits": len(ordered),
+        }
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _handler(stub):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written apart, do not wait for delayed ACKs
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == "/health":
+                return self._send(200, {"status": "available"})
+            if url.path == "/tasks":
+                query = parse_qs(url.query)
+                uids = ",".join(query.get("uids", [])).split(",")
+                return self._send(200, stub.get_tasks([uid for uid in uids if uid]))
+            return self._not_found()
+
+        def do_POST(self):
+            path = urlsplit(self.path).path
+            body = self._read()
+            if SEARCH_PATH.match(path):
+                return self._send(200, stub.search(body))
+            if match := DOCUMENTS_PATH.match(path):
+                return self._send(202, stub.add_documents(match["uid"], body))
+            if path == "/multi-search":
+                results = [
+                    {**stub.search(query), "indexUid": query["indexUid"]}
+                    for query in body["queries"]
+                ]
+                return self._send(200, {"results": results})
+            return self._not_found()
+
+        def log_message(self, format, *args):
+            pass
+
+        def _read(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"null")
+
+        def _not_found(self):
+            self._send(
+                404,
+                {
+                    "message": f"Unsupported stub call {self.command} {self.path}",
+                    "code": "not_found",
+                    "type": "invalid_request",
+                    "link": "",
+                },
+            )
+
+        def _send(self, status, payload):
+            content = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+    return Handler
@@ -0,0 +1,216 @@
+import datetime
+import io
+import platform
+import random
+import statistics
+import subprocess
+import time
+
+import django
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import Client
+
+from public_holiday.models import PublicHoliday
+
+# Countries of generated models, holidays are spread evenly among them
+COUNTRIES = ("IT", "FR", "DE", "ES", "GB", "US", "CA", "BR", "JP", "IN")
+FIRST_DATE = datetime.date(2000, 1, 1)
+
+
+def load_dataset(size, seed=0):
+    """
+    Top the PublicHoliday table up to size generated models.
+
+    Models are bulk created without the post_bulk_create signal, so nothing
+    is enqueued in the outbox, and the dataset of a size is the same
+    whatever the sizes benchmarked before it.
+    """
+    existing = PublicHoliday.objects.count()
+    models = [
+        PublicHoliday(
+            name=f"Holiday {number}",
+            local_name=f"Festa {number}",
+            country=random.Random(f"{seed}:{number}").choice(COUNTRIES),
+            date=FIRST_DATE + datetime.timedelta(days=number % 9000),
+        )
+        for number in range(existing, size)
+    ]
+    QuerySet(PublicHoliday).bulk_create(models, batch_size=500)
+    return max(size - existing, 0)
+
+
+def percentile(values, percent):
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+def latency_stats(latencies, seconds):
+    """
+    Throughput and latency percentiles of requests timed in latencies.
+    """
+    return {
+        "requests": len(latencies),
+        "seconds": round(seconds, 6),
+        "requests_per_second": round(len(latencies) / seconds, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def time_requests(client, paths, warmup=0):
+    """
+    Send GET requests to paths one after the other, return their stats.
+
+    The first warmup requests are sent but not measured. Every response must
+    be successful, so a broken endpoint is not benchmarked as a fast one.
+    """
+    paths = list(paths)
+    for path in paths[:warmup]:
+        _get(client, path)
+    latencies = []
+    start = time.perf_counter()
+    for path in paths[warmup:]:
+        request_start = time.perf_counter()
+        _get(client, path)
+        latencies.append(time.perf_counter() - request_start)
+    return latency_stats(latencies, time.perf_counter() - start)
+
+
+def _get(client, path):
+    response = client.get(path)
+    if response.status_code != 200:
+        raise RuntimeError(f"GET {path} answered {response.status_code}")
+
+
+def endpoint_paths(size, count, seed=0):
+    """
+    Paths requested by each endpoint benchmark, count of them each.
+    """
+    rng = random.Random(seed)
+    ids = list(PublicHoliday.objects.values_list("id", flat=True)[:size])
+    pages = max(size // 10, 1)
+    return {
+        "list": [
+            f"/public_holiday/?page={rng.randint(1, pages)}" for _ in range(count)
+        ],
+        "list_filtered": [
+            f"/public_holiday/?country={rng.choice(COUNTRIES)}&year={2000 + i % 20}"
+            for i in range(count)
+        ],
+        "detail": [f"/public_holiday/{rng.choice(ids)}/" for _ in range(count)],
+        # Distinct queries miss the search cache, each one calls Meilisearch
+        "search": [f"/public_holiday/search/?q=holiday+{i}" for i in range(count)],
+        "search_cached": ["/public_holiday/search/?q=holiday" for _ in range(count)],
+    }
+
+
+def benchmark_populate(size, batch_size, concurrency):
+    out = io.StringIO()
+    start = time.perf_counter()
+    call_command(
+        "populate_meilisearch_index",
+        batch_size=batch_size,
+        concurrency=concurrency,
+        stdout=out,
+        stderr=out,
+    )
+    seconds = time.perf_counter() - start
+    if "Successfully populated" not in out.getvalue():
+        raise RuntimeError(f"populate_meilisearch_index failed: {out.getvalue()}")
+    return {
+        "documents": size,
+        "seconds": round(seconds, 6),
+        "documents_per_second": round(size / seconds, 2),
+    }
+
+
+def run_suite(sizes, requests=200, warmup=20, seed=0, batch_size=1000, concurrency=1):
+    """
+    Benchmark indexing and endpoints at every dataset size, smallest first.
+
+    Returns a list of results, one per benchmark and size.
+    """
+    client = Client()
+    results = []
+    for size in sorted(sizes):
+        load_dataset(size, seed)
+        results.append(
+            {
+                "benchmark": "populate_meilisearch_index",
+                "size": size,
+                **benchmark_populate(size, batch_size, concurrency),
+            }
+        )
+        paths = endpoint_paths(size, requests + warmup, seed)
+        for name, requested in paths.items():
+            results.append(
+                {
+                    "benchmark": name,
+                    "size": size,
+                    **time_requests(client, requested, warmup),
+                }
+            )
+    return results
+
+
+def environment():
+    """
+    Description of what was benchmarked, to compare results across commits.
+    """
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "machine": platform.machine(),
+    }
+
+
+def _git(*args):
+    try:
+        return subprocess.run(
+            ["git", *args], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Result fields compared by compare(), with True when higher is better
+COMPARED_FIELDS = {
+    "requests_per_second": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "documents_per_second": True,
+}
+
+
+def compare(results, baseline):
+    """
+    Lines comparing results to the baseline results of another run.
+
+    Each line shows a benchmark field of both runs and the relative change,
+    positive when the new run is better.
+    """
+    previous = {(r["benchmark"], r["size"]): r for r in baseline}
+    lines = []
+    for result in results:
+        old = previous.get((result["benchmark"], result["size"]))
+        if old is None:
+            continue
+        for field, higher_is_better in COMPARED_FIELDS.items():
+            if field not in result or not old.get(field):
+                continue
+            change = result[field] / old[field] - 1
+            if not higher_is_better:
+                change = -change
+            lines.append(
+                f"{result['benchmark']:<28} {result['size']:>8} {field:<22}"
+                + f" {old[field]:>12.2f} -> {result[field]:>12.2f}  {change:+.1%}"
+            )
+    return lines
@@ -30,6 +30,14 @@ DEBUG = True
 ALLOWED_HOSTS = []
 
 PUBLIC_HOLDAY_API_URL = "https://date.nager.at/api/v3"
+# On-disk cache of Public Holiday API responses, revalidated once expired
+PUBLIC_HOLIDAY_API_CACHE_DIR = environ.get(
+    "PUBLIC_HOLIDAY_API_CACHE_DIR", str(BASE_DIR / ".cache" / "public_holiday_api")
+)
+PUBLIC_HOLIDAY_API_CACHE_TTL = int(environ.get("PUBLIC_HOLIDAY_API_CACHE_TTL", 86400))
+PUBLIC_HOLIDAY_API_CACHE_MAX_SIZE = int(
+    environ.get("PUBLIC_HOLIDAY_API_CACHE_MAX_SIZE", 50 * 1024 * 1024)
+)
 
 # Application definition
 
@@ -75,16 +83,41 @@ TEMPLATES = [
 
 MEILISEARCH_URL = environ.get("MEILI_URL", "http://localhost:7700")
 MEILISEARCH_API_KEY = environ.get("MEILI_MASTER_KEY", "supersecretlongkey")
+# Keep-alive connection pool shared by every Meilisearch call of a worker process
+MEILISEARCH_POOL_CONNECTIONS = int(environ.get("MEILI_POOL_CONNECTIONS", 1))
+MEILISEARCH_POOL_MAXSIZE = int(environ.get("MEILI_POOL_MAXSIZE", 10))
+MEILISEARCH_CONNECT_TIMEOUT = float(environ.get("MEILI_CONNECT_TIMEOUT", 1.0))
+MEILISEARCH_READ_TIMEOUT = float(environ.get("MEILI_READ_TIMEOUT", 5.0))
+# Circuit breaker shared by every Meilisearch call of a worker process: opened
+# after MEILI_BREAKER_FAILURES consecutive failures, tried again after
+# MEILI_BREAKER_RESET_TIMEOUT seconds
+MEILISEARCH_BREAKER_FAILURE_THRESHOLD = int(environ.get("MEILI_BREAKER_FAILURES", 5))
+MEILISEARCH_BREAKER_RESET_TIMEOUT = float(
+    environ.get("MEILI_BREAKER_RESET_TIMEOUT", 30.0)
+)
+# Latency budget in seconds of reads (searches and GET calls), retries included
+MEILISEARCH_READ_BUDGET = float(environ.get("MEILI_READ_BUDGET", 2.0))
+MEILISEARCH_READ_RETRIES = int(environ.get("MEILI_READ_RETRIES", 1))
+# Reads pending for longer are sent a second time, 0 disables hedging
+MEILISEARCH_HEDGE_DELAY = float(environ.get("MEILI_HEDGE_DELAY", 0))
+# Connections of the asynchronous client, shared by every search of an ASGI worker
+MEILISEARCH_ASYNC_POOL_MAXSIZE = int(environ.get("MEILI_ASYNC_POOL_MAXSIZE", 100))
 
 
 WSGI_APPLICATION = "django_meilisearch.wsgi.application"
 
+# Renderer of API responses, rest_framework.renderers.JSONRenderer renders the
+# same output with the standard library encoder
+API_JSON_RENDERER = environ.get(
+    "API_JSON_RENDERER", "public_holiday.renderers.ORJSONRenderer"
+)
+
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
+        API_JSON_RENDERER,
     ],
     "DEFAULT_PARSER_CLASSES": [
         "rest_framework.parsers.JSONParser",
@@ -114,13 +147,32 @@ DATABASES = {
     }
 }
 
+REDIS_URL = environ.get("REDIS_URL", "redis://localhost:6379/0")
+
 CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.redis.RedisCache",
-        "LOCATION": environ.get("REDIS_URL", "redis://localhost:6379/0"),
+        "LOCATION": REDIS_URL,
     }
 }
 
+# Search responses cache, a per-process LRU in front of the shared cache above
+SEARCH_CACHE_TTL = int(environ.get("SEARCH_CACHE_TTL", 300))
+SEARCH_CACHE_LOCAL_TTL = float(environ.get("SEARCH_CACHE_LOCAL_TTL", 5.0))
+SEARCH_CACHE_LOCAL_MAXSIZE = int(environ.get("SEARCH_CACHE_LOCAL_MAXSIZE", 1024))
+
+# Upper bound of limit and hitsPerPage search parameters
+SEARCH_MAX_PAGE_SIZE = int(environ.get("SEARCH_MAX_PAGE_SIZE", 100))
+
+# Searches are served by the database while MeiliSearch is unreachable
+SEARCH_FALLBACK = environ.get("SEARCH_FALLBACK", "1") == "1"
+
+# Search hits are encoded once when cached and embedded as they are in
+# responses rendered by ORJSONRenderer, set to 0 to disable
+SEARCH_PASSTHROUGH = environ.get("SEARCH_PASSTHROUGH", "1") == "1"
+# Upper bound of queries sent in a single multi-search request
+SEARCH_MAX_MULTI_QUERIES = int(environ.get("SEARCH_MAX_MULTI_QUERIES", 20))
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
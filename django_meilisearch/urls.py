@@ -23,12 +23,28 @@ from drf_spectacular.views import (
     SpectacularSwaggerView,
 )
 
-from public_holiday.views import PublicHolidayList
+from public_holiday.views import (
+    PublicHolidayList,
+    async_search,
+    meilisearch_health,
+    prometheus_metrics,
+)
 
 router = routers.DefaultRouter()
 router.register(r"public_holiday", PublicHolidayList)
 
 urlpatterns = [
+    path(
+        "public_holiday/search/async/",
+        async_search,
+        name="publicholiday-search-async",
+    ),
+    path(
+        "health/meilisearch/",
+        meilisearch_health,
+        name="meilisearch-health",
+    ),
+    path("metrics", prometheus_metrics, name="metrics"),
     path("", include(router.urls)),
     path("admin/", admin.site.urls),
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
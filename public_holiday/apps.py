@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PublicHolidayConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "public_holiday"
+
+    def ready(self):
+        # Connect signal receivers keeping the search index in sync
+        from . import receivers  # noqa: F401
@@ -0,0 +1,305 @@
+import asyncio
+import functools
+import os
+import threading
+import weakref
+
+import httpx
+import meilisearch
+import requests
+from django.conf import settings
+from meilisearch._httprequests import HttpRequests
+from meilisearch.errors import (
+    MeilisearchApiError,
+    MeilisearchCommunicationError,
+    MeilisearchTimeoutError,
+)
+from requests.adapters import HTTPAdapter
+
+from .resilience import get_breaker, get_read_policy
+
+# Idempotent POST calls, reading documents without changing them
+READ_PATHS = ("/search", "multi-search", "/documents/fetch")
+# Smallest timeout given to a call, requests rejects zero or negative ones
+MIN_TIMEOUT = 0.001
+
+
+class PooledHttpRequests(HttpRequests):
+    """
+    Meilisearch HTTP layer sending every call through a shared requests Session,
+    so keep-alive connections are reused instead of opening one per request.
+
+    Calls go through the circuit breaker, when given one. Reads (GET calls
+    and searches) follow read_policy: their connect and read timeouts are
+    bounded by what is left of the latency budget and they may be retried
+    or hedged. Other calls are never retried and keep the client timeout.
+    """
+
+    def __init__(self, config, session, breaker=None, read_policy=None):
+        super().__init__(config)
+        self.session = session
+        self.breaker = breaker
+        self.read_policy = read_policy
+
+    def send_request(self, http_method, path, body=None, content_type=None):
+        def send(timeout=self.config.timeout):
+            return super(PooledHttpRequests, self).send_request(
+                _with_timeout(http_method, timeout), path, body, content_type
+            )
+
+        call = send
+        if self.read_policy is not None and (
+            http_method.__name__ == "get" or path.endswith(READ_PATHS)
+        ):
+
+            def call():
+                return self.read_policy.call(
+                    lambda remaining: send(self._read_timeout(remaining))
+                )
+
+        if self.breaker is None:
+            return call()
+        return self.breaker.call(call)
+
+    def _read_timeout(self, remaining):
+        remaining = max(remaining, MIN_TIMEOUT)
+        connect = self.config.timeout
+        if isinstance(connect, tuple):
+            connect = connect[0]
+        if connect is None:
+            return remaining
+        return (min(connect, remaining), remaining)
+
+    def get(self, path):
+        return self.send_request(self.session.get, path)
+
+    def post(self, path, body=None, content_type="application/json"):
+        return self.send_request(self.session.post, path, body, content_type)
+
+    def patch(self, path, body=None, content_type="application/json"):
+        return self.send_request(self.session.patch, path, body, content_type)
+
+    def put(self, path, body=None, content_type="application/json"):
+        return self.send_request(self.session.put, path, body, content_type)
+
+    def delete(self, path, body=None):
+        return self.send_request(self.session.delete, path, body)
+
+
+class PooledClient(meilisearch.Client):
+    """
+    Meilisearch client whose indexes and task handlers share a pooled Session.
+    """
+
+    def __init__(
+        self,
+        url,
+        api_key=None,
+        timeout=None,
+        session=None,
+        breaker=None,
+        read_policy=None,
+    ):
+        super().__init__(url, api_key, timeout=timeout)
+        self.session = session or requests.Session()
+        self.breaker = breaker
+        self.read_policy = read_policy
+        self.http = self._http()
+        self.task_handler.http = self._http()
+
+    def index(self, uid):
+        index = super().index(uid)
+        index.http = self._http()
+        index.task_handler.http = self._http()
+        return index
+
+    def _http(self):
+        return PooledHttpRequests(
+            self.config, self.session, self.breaker, self.read_policy
+        )
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncClient:
+    """
+    Minimal asynchronous Meilisearch client for the search path.
+
+    Requests are multiplexed over a pooled httpx connection pool, errors are
+    raised as the same exceptions used by the synchronous client. Searches go
+    through the circuit breaker and follow read_policy, when given.
+    """
+
+    def __init__(
+        self,
+        url,
+        api_key=None,
+        timeout=None,
+        limits=None,
+        transport=None,
+        breaker=None,
+        read_policy=None,
+    ):
+        self.breaker = breaker
+        self.read_policy = read_policy
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.http = httpx.AsyncClient(
+            base_url=url,
+            headers=headers,
+            timeout=timeout,
+            limits=limits or httpx.Limits(),
+            transport=transport,
+        )
+
+    async def search(self, index_uid, query, params=None):
+        body = {**(params or {}), "q": query}
+
+        async def send(timeout=httpx.USE_CLIENT_DEFAULT):
+            try:
+                response = await self.http.post(
+                    f"/indexes/{index_uid}/search", json=body, timeout=timeout
+                )
+            except httpx.TimeoutException as e:
+                raise MeilisearchTimeoutError(str(e)) from e
+            except httpx.TransportError as e:
+                raise MeilisearchCommunicationError(str(e)) from e
+            if response.is_error:
+                raise MeilisearchApiError(str(response.status_code), response)
+            return response.json()
+
+        call = send
+        if self.read_policy is not None:
+
+            async def call():
+                return await self.read_policy.acall(
+                    lambda remaining: send(self._read_timeout(remaining))
+                )
+
+        if self.breaker is None:
+            return await call()
+        return await self.breaker.acall(call)
+
+    def _read_timeout(self, remaining):
+        remaining = max(remaining, MIN_TIMEOUT)
+        connect = self.http.timeout.connect
+        if connect is not None:
+            connect = min(connect, remaining)
+        return httpx.Timeout(remaining, connect=connect)
+
+    async def aclose(self):
+        await self.http.aclose()
+
+
+def _with_timeout(http_method, timeout):
+    # send_request passes the client timeout, tells GET calls by their name
+    @functools.wraps(http_method)
+    def call(url, **kwargs):
+        return http_method(url, **{**kwargs, "timeout": timeout})
+
+    return call
+
+
+def _build_session():
+    adapter = HTTPAdapter(
+        pool_connections=settings.MEILISEARCH_POOL_CONNECTIONS,
+        pool_maxsize=settings.MEILISEARCH_POOL_MAXSIZE,
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _build_client():
+    return PooledClient(
+        settings.MEILISEARCH_URL,
+        settings.MEILISEARCH_API_KEY,
+        timeout=(
+            settings.MEILISEARCH_CONNECT_TIMEOUT,
+            settings.MEILISEARCH_READ_TIMEOUT,
+        ),
+        session=_build_session(),
+        breaker=get_breaker(),
+        read_policy=get_read_policy(),
+    )
+
+
+def _build_async_client():
+    return AsyncClient(
+        settings.MEILISEARCH_URL,
+        settings.MEILISEARCH_API_KEY,
+        timeout=httpx.Timeout(
+            settings.MEILISEARCH_READ_TIMEOUT,
+            connect=settings.MEILISEARCH_CONNECT_TIMEOUT,
+        ),
+        limits=httpx.Limits(
+            max_connections=settings.MEILISEARCH_ASYNC_POOL_MAXSIZE,
+            max_keepalive_connections=settings.MEILISEARCH_ASYNC_POOL_MAXSIZE,
+        ),
+        breaker=get_breaker(),
+        read_policy=get_read_policy(),
+    )
+
+
+_lock = threading.Lock()
+_clients = {}
+# event loop -> AsyncClient, httpx pools can not be shared across loops
+_async_clients = weakref.WeakKeyDictionary()
+_pid = os.getpid()
+
+
+def get_client():
+    """
+    Return the process-wide Meilisearch client, building it on first use.
+
+    Clients are never shared across a fork: a worker inheriting the registry
+    from its parent starts from an empty one so that pooled sockets are not
+    used by two processes at once.
+    """
+    global _pid
+    client = _clients.get("default")
+    if client is not None and _pid == os.getpid():
+        return client
+    with _lock:
+        if _pid != os.getpid():
+            _clients.clear()
+            _pid = os.getpid()
+        if "default" not in _clients:
+            _clients["default"] = _build_client()
+        return _clients["default"]
+
+
+def get_async_client():
+    """
+    Return the asynchronous Meilisearch client of the running event loop.
+
+    Under ASGI a worker runs a single loop, so its searches share one pool.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = _build_async_client()
+    return client
+
+
+def reset_clients():
+    """
+    Drop every registered client, closing its pooled connections.
+    """
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+def _reset_after_fork():
+    # The lock may have been held by another thread at fork time
+    global _lock, _pid
+    _lock = threading.Lock()
+    _clients.clear()
+    _async_clients.clear()
+    _pid = os.getpid()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,142 @@
+import functools
+import hashlib
+import logging
+import time
+
+import redis
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+logger = logging.getLogger(__name__)
+
+# Marker of the PublicHoliday table, touched by every committed change
+TABLE_MARKER = "table:public_holiday"
+
+
+def index_marker(index_name):
+    return f"index:{index_name}"
+
+
+def _marker_cache_key(name):
+    return f"conditional:marker:{name}"
+
+
+def get_marker(name):
+    """
+    Time of the last change of the resource tracked by the marker name.
+
+    Unlike counters markers never go back to a previous value, a missing
+    marker (never touched or evicted) starts at the current time, so
+    validators of lost states are not reused.
+    """
+    return cache.get_or_set(_marker_cache_key(name), time.time, timeout=None)
+
+
+def touch_marker(name):
+    cache.set(_marker_cache_key(name), time.time(), timeout=None)
+
+
+def skip_validators(response):
+    """
+    Keep conditional from adding validators to response, for responses which
+    are not the representation the validators describe.
+    """
+    response.skip_validators = True
+    return response
+
+
+def make_etag(request, *parts):
+    """
+    Strong ETag of the representation of request at the given state parts.
+    """
+    return _etag(request.build_absolute_uri(), request.accepted_media_type, parts)
+
+
+def _etag(uri, media_type, parts):
+    payload = "\n".join([uri, str(media_type)] + [str(part) for part in parts])
+    return quote_etag(hashlib.sha256(payload.encode()).hexdigest()[:32])
+
+
+def conditional(marker, generation=None):
+    """
+    Decorator of viewset actions answering conditional GET requests.
+
+    ETag and Last-Modified validators are derived from the marker (and from
+    generation(), the state the response is actually read at when it may lag
+    behind the marker) before the action runs, so matching If-None-Match or
+    If-Modified-Since requests are answered 304 without any database or
+    Meilisearch work. The marker is read first, a change made meanwhile only
+    makes the validators older than the response.
+    """
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            try:
+                modified = get_marker(marker)
+                parts = [modified] if generation is None else [modified, generation()]
+            except redis.RedisError:
+                logger.warning("Unable to read %s marker", marker, exc_info=True)
+                return method(self, request, *args, **kwargs)
+            etag = make_etag(request, *parts)
+            response = get_conditional_response(
+                request, etag=etag, last_modified=int(modified)
+            )
+            if response is None:
+                response = method(self, request, *args, **kwargs)
+                if not _validated(response):
+                    return response
+            patch_vary_headers(response, ["Accept"])
+            return _add_validators(response, etag, modified)
+
+        return wrapper
+
+    return decorator
+
+
+def aconditional(marker, generation=None, media_type="application/json"):
+    """
+    Asynchronous counterpart of conditional, for async views always rendering
+    media_type. generation is awaited.
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            try:
+                modified = await sync_to_async(get_marker, thread_sensitive=False)(
+                    marker
+                )
+                parts = (
+                    [modified] if generation is None else [modified, await generation()]
+                )
+            except redis.RedisError:
+                logger.warning("Unable to read %s marker", marker, exc_info=True)
+                return await view(request, *args, **kwargs)
+            etag = _etag(request.build_absolute_uri(), media_type, parts)
+            response = get_conditional_response(
+                request, etag=etag, last_modified=int(modified)
+            )
+            if response is None:
+                response = await view(request, *args, **kwargs)
+                if not _validated(response):
+                    return response
+            return _add_validators(response, etag, modified)
+
+        return wrapper
+
+    return decorator
+
+
+def _validated(response):
+    return response.status_code == 200 and not getattr(
+        response, "skip_validators", False
+    )
+
+
+def _add_validators(response, etag, modified):
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(int(modified))
+    return response
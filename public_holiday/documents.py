@@ -0,0 +1,46 @@
+import calendar
+from itertools import islice
+
+from .models import PublicHoliday
+from .serializers import publicholiday_values
+
+# Same fields, in the same order, as PublicholidaySerializer output
+DOCUMENT_FIELDS = publicholiday_values.fields
+_DATE_INDEX = DOCUMENT_FIELDS.index("date")
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def to_document(row):
+    """
+    Map a values_list row of DOCUMENT_FIELDS to a Meilisearch document.
+
+    Besides serializer fields documents hold the numeric year and timestamp
+    (UTC midnight) of the date, Meilisearch only compares numbers in filters.
+    """
+    document = publicholiday_values.to_representation(row)
+    date = row[_DATE_INDEX]
+    document["year"] = date.year
+    document["timestamp"] = calendar.timegm(date.timetuple())
+    return document
+
+
+def iter_documents(queryset=None, chunk_size=DEFAULT_BATCH_SIZE):
+    """
+    Stream documents from the database through a server-side cursor,
+    without instantiating models or serializers.
+    """
+    if queryset is None:
+        queryset = PublicHoliday.objects.all()
+    rows = queryset.order_by("pk").values_list(*DOCUMENT_FIELDS)
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield to_document(row)
+
+
+def batched(iterable, size):
+    """
+    Split an iterable into lists of at most size elements.
+    """
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
@@ -0,0 +1,82 @@
+import math
+import re
+
+from django.contrib.postgres.search import SearchQuery
+from django.db import connections
+from django.db.models import Q
+
+from .models import PublicHoliday
+from .serializers import publicholiday_values
+
+# Text search configuration of the search_vector column, see migration 0004
+SEARCH_CONFIG = "simple"
+
+
+class SearchResponse(dict):
+    """
+    Search response of the fallback engine, told apart from Meilisearch ones.
+    """
+
+
+def search(query, params, condition=None):
+    """
+    Search PublicHoliday models in the database.
+
+    Takes the Meilisearch search parameters built by the search action (sort,
+    attributesToRetrieve and offset/limit or page/hitsPerPage) plus an
+    optional filter condition, and returns a response shaped like the
+    Meilisearch one. Query words are prefix matched against name and
+    local_name through the GIN indexed search_vector on PostgreSQL, other
+    databases use case-insensitive containment instead.
+    """
+    queryset = PublicHoliday.objects.all()
+    if condition is not None:
+        queryset = queryset.filter(condition)
+    if words := re.findall(r"\w+", query):
+        queryset = queryset.filter(_match(words, queryset.db))
+
+    field, _, order = params["sort"][0].partition(":")
+    ordering = [f"-{field}" if order == "desc" else field]
+    if field != "id":
+        ordering.append("id")
+    queryset = queryset.order_by(*ordering)
+
+    total = queryset.count()
+    if "page" in params:
+        size = params["hitsPerPage"]
+        offset = (params["page"] - 1) * size
+        metadata = {
+            "page": params["page"],
+            "hitsPerPage": size,
+            "totalHits": total,
+            "totalPages": math.ceil(total / size),
+        }
+    else:
+        size, offset = params["limit"], params["offset"]
+        metadata = {"offset": offset, "limit": size, "estimatedTotalHits": total}
+
+    attributes = params["attributesToRetrieve"]
+    fields = [
+        field
+        for field in publicholiday_values.fields
+        if "*" in attributes or field in attributes
+    ]
+    rows = queryset.values_list(*publicholiday_values.fields)[offset : offset + size]
+    hits = []
+    for row in rows:
+        document = publicholiday_values.to_representation(row)
+        hits.append({field: document[field] for field in fields})
+    return SearchResponse(hits=hits, query=query, **metadata)
+
+
+def _match(words, using):
+    if connections[using].vendor == "postgresql":
+        # Words are \w+ tokens, safe to use as raw tsquery prefix terms
+        tsquery = " & ".join(f"{word}:*" for word in words)
+        return Q(
+            search_vector=SearchQuery(tsquery, search_type="raw", config=SEARCH_CONFIG)
+        )
+    condition = Q()
+    for word in words:
+        condition &= Q(name__icontains=word) | Q(local_name__icontains=word)
+    return condition
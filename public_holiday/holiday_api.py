@@ -0,0 +1,128 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Statuses worth another try: CloudFlare sometimes answers with no content,
+# rate limiting and server errors are usually transient
+RETRY_STATUSES = (204, 429, 500, 502, 503, 504)
+
+DEFAULT_TIMEOUT = (3.05, 30)
+
+
+class HolidayApiError(Exception):
+    """
+    Raised when the Public Holiday API can not provide a resource.
+    """
+
+
+class HolidayApiClient:
+    """
+    Client of the Public Holiday API (see https://date.nager.at/Api).
+
+    Requests share a pooled Session, transient failures are retried with an
+    exponential backoff (backoff, 2 * backoff, 4 * backoff... seconds).
+    Responses are stored in cache (a ResponseCache) when given: fresh entries
+    are served without requests, stale ones are revalidated with conditional
+    requests and offline clients only serve cached entries.
+    """
+
+    def __init__(
+        self,
+        base_url,
+        retries=3,
+        backoff=0.5,
+        timeout=DEFAULT_TIMEOUT,
+        pool_maxsize=10,
+        session=None,
+        cache=None,
+        offline=False,
+    ):
+        self.base_url = base_url
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = session or _build_session(pool_maxsize)
+        self.cache = cache
+        self.offline = offline
+
+    def available_countries(self):
+        """
+        Codes of the countries covered by the API.
+        """
+        return [country["countryCode"] for country in self.get("AvailableCountries")]
+
+    def public_holidays(self, year, country_code):
+        return self.get(f"publicholidays/{year}/{country_code}")
+
+    def get(self, path):
+        url = f"{self.base_url}/{path}"
+        entry = self.cache.get(url) if self.cache else None
+        if entry and (self.offline or self.cache.is_fresh(entry)):
+            return json.loads(entry["body"])
+        if self.offline:
+            raise HolidayApiError(f"{url} is not cached")
+
+        headers = self.cache.conditional_headers(entry) if self.cache else {}
+        attempts = self.retries + 1
+        for attempt in range(attempts):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            response = None
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+                response.raise_for_status()
+            except requests.RequestException as e:
+                if response is not None and response.status_code not in RETRY_STATUSES:
+                    raise HolidayApiError(str(e)) from e
+                error = str(e)
+                continue
+            # Not modified since cached
+            if response.status_code == 304 and entry:
+                return json.loads(self.cache.touch(entry)["body"])
+            if response.status_code == 204 or not response.content:
+                error = "No content"
+                continue
+            try:
+                data = response.json()
+            except ValueError:
+                # Error pages of a proxy, served with a successful status
+                error = "Invalid JSON content"
+                continue
+            if self.cache:
+                self.cache.set(
+                    url,
+                    response.text,
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                )
+            return data
+        raise HolidayApiError(f"{error} (after {attempts} attempts)")
+
+    def fetch_many(self, pairs, concurrency=8):
+        """
+        Public holidays of (country code, year) pairs, fetched concurrently.
+
+        Yields ((country code, year), holidays, error) in the order of pairs,
+        error is a HolidayApiError when the pair could not be fetched.
+        """
+        with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+            futures = [
+                executor.submit(self.public_holidays, year, country_code)
+                for country_code, year in pairs
+            ]
+            for pair, future in zip(pairs, futures):
+                try:
+                    yield pair, future.result(), None
+                except HolidayApiError as e:
+                    yield pair, None, e
+
+
+def _build_session(pool_maxsize):
+    adapter = HTTPAdapter(pool_maxsize=pool_maxsize)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
@@ -0,0 +1,209 @@
+import datetime
+import hashlib
+import json
+
+from django.core.cache import cache
+from meilisearch.errors import MeilisearchApiError
+
+from .conditional import index_marker, touch_marker
+from .serializers import PublicholidaySerializer
+
+INDEX_NAME = "public_holiday"
+SHADOW_INDEX_NAME = f"{INDEX_NAME}_shadow"
+
+# Document fields never change at runtime, compute them once at import time
+MODEL_FIELDS = list(PublicholidaySerializer().fields)
+
+# Declarative settings of the "public_holiday" index, applied out of the
+# request path by the sync_meilisearch_settings command
+INDEX_SETTINGS = {
+    "sortableAttributes": MODEL_FIELDS,
+    "filterableAttributes": ["country", "date", "year", "timestamp"],
+    "searchableAttributes": ["name", "local_name", "country", "date"],
+    # year and timestamp are only indexed for filters and facets
+    "displayedAttributes": MODEL_FIELDS,
+}
+
+TASK_TIMEOUT_MS = 60000
+
+# Delta reindexes start a bit before the stored watermark, to pick up rows
+# committed by transactions still running when the previous run started
+WATERMARK_OVERLAP = datetime.timedelta(minutes=1)
+
+# How long tombstones of deleted models are kept for delta reindexes, runs
+# reaching further back must rebuild the index instead
+DELETED_RETENTION = datetime.timedelta(days=30)
+
+
+class IndexSyncError(Exception):
+    """
+    Raised when Meilisearch fails to apply an index task.
+    """
+
+
+def wait_for_task(client, task_info, timeout_in_ms=TASK_TIMEOUT_MS, ignored_codes=()):
+    """
+    Wait for an enqueued task, raising IndexSyncError unless it succeeded
+    or failed with one of the ignored error codes.
+    """
+    task = client.wait_for_task(task_info.task_uid, timeout_in_ms=timeout_in_ms)
+    error_code = (task.error or {}).get("code")
+    if task.status != "succeeded" and error_code not in ignored_codes:
+        raise IndexSyncError(
+            f'Task {task.uid} on "{task_info.index_uid}" {task.status}: {task.error}'
+        )
+    return task
+
+
+def settings_fingerprint(index_settings):
+    """
+    Stable hash of an index settings definition.
+    """
+    payload = json.dumps(index_settings, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _fingerprint_cache_key(index_name):
+    return f"meilisearch:settings_fingerprint:{index_name}"
+
+
+def index_identity(client, index_name):
+    """
+    Creation time of the index, None when it does not exist.
+
+    Tells an index apart from one recreated under the same name (with default
+    settings) after Meilisearch lost its data.
+    """
+    try:
+        return client.get_raw_index(index_name)["createdAt"]
+    except MeilisearchApiError as e:
+        if e.code != "index_not_found":
+            raise
+        return None
+
+
+def _applied_settings(client, index_name, index_settings):
+    fingerprint = settings_fingerprint(index_settings)
+    return f"{fingerprint}:{index_identity(client, index_name)}"
+
+
+def sync_index_settings(
+    client,
+    index_name=INDEX_NAME,
+    index_settings=None,
+    force=False,
+    timeout_in_ms=TASK_TIMEOUT_MS,
+):
+    """
+    Apply index settings to Meilisearch and wait for the task to complete.
+
+    The fingerprint of the last applied settings, along with the identity of
+    the index they were applied to, is kept in the cache, so that unchanged
+    settings are never sent again to the same index unless force is set.
+    Returns True when settings were sent, False when they were up to date.
+    """
+    index_settings = INDEX_SETTINGS if index_settings is None else index_settings
+    cache_key = _fingerprint_cache_key(index_name)
+    if not force and cache.get(cache_key) == _applied_settings(
+        client, index_name, index_settings
+    ):
+        return False
+
+    task_info = client.index(index_name).update_settings(index_settings)
+    wait_for_task(client, task_info, timeout_in_ms=timeout_in_ms)
+    # Missing indexes are created by the settings update
+    cache.set(
+        cache_key, _applied_settings(client, index_name, index_settings), timeout=None
+    )
+    bump_generation(index_name)
+    return True
+
+
+def _watermark_cache_key(index_name):
+    return f"meilisearch:watermark:{index_name}"
+
+
+def get_watermark(index_name=INDEX_NAME):
+    """
+    Start time of the last successful (re)index, None if the index never was.
+    """
+    return cache.get(_watermark_cache_key(index_name))
+
+
+def set_watermark(value, index_name=INDEX_NAME):
+    cache.set(_watermark_cache_key(index_name), value, timeout=None)
+
+
+def _generation_cache_key(index_name):
+    return f"meilisearch:generation:{index_name}"
+
+
+def get_generation(index_name=INDEX_NAME):
+    """
+    Counter bumped every time the content or settings of the index change,
+    cached search results of older generations are never served.
+    """
+    return cache.get(_generation_cache_key(index_name), 0)
+
+
+def bump_generation(index_name=INDEX_NAME):
+    touch_marker(index_marker(index_name))
+    cache_key = _generation_cache_key(index_name)
+    try:
+        return cache.incr(cache_key)
+    except ValueError:
+        # First bump, or the counter was evicted
+        cache.add(cache_key, 1, timeout=None)
+        return cache.get(cache_key)
+
+
+def drop_index(client, index_name):
+    wait_for_task(
+        client, client.delete_index(index_name), ignored_codes=("index_not_found",)
+    )
+
+
+def create_shadow_index(
+    client,
+    index_name=INDEX_NAME,
+    shadow_name=SHADOW_INDEX_NAME,
+    index_settings=None,
+):
+    """
+    Create an empty index with the declared settings to be swapped with
+    index_name once populated, a leftover of an interrupted run is dropped.
+    """
+    drop_index(client, shadow_name)
+    wait_for_task(client, client.create_index(shadow_name, {"primaryKey": "id"}))
+    sync_index_settings(client, shadow_name, index_settings, force=True)
+    return shadow_name
+
+
+def swap_shadow_index(
+    client,
+    index_name=INDEX_NAME,
+    shadow_name=SHADOW_INDEX_NAME,
+    index_settings=None,
+):
+    """
+    Atomically replace index_name with its shadow, then drop the old documents.
+    """
+    index_settings = INDEX_SETTINGS if index_settings is None else index_settings
+    # Both indexes must exist to be swapped
+    wait_for_task(
+        client,
+        client.create_index(index_name, {"primaryKey": "id"}),
+        ignored_codes=("index_already_exists",),
+    )
+    wait_for_task(
+        client, client.swap_indexes([{"indexes": [index_name, shadow_name]}])
+    )
+    # Settings applied to the shadow index now belong to the live one
+    cache.set(
+        _fingerprint_cache_key(index_name),
+        _applied_settings(client, index_name, index_settings),
+        timeout=None,
+    )
+    cache.delete(_fingerprint_cache_key(shadow_name))
+    bump_generation(index_name)
+    drop_index(client, shadow_name)
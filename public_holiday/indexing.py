@@ -0,0 +1,156 @@
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from meilisearch.errors import MeilisearchError
+
+from .indexes import INDEX_NAME
+from .metrics import INDEXED_DOCUMENTS, TASK_WAIT_SECONDS
+from .models import DeletedPublicHoliday, PublicHoliday
+
+# Outcome of a document batch, status is a Meilisearch task status
+# or "timed out" when the task did not complete in time
+BatchResult = namedtuple(
+    "BatchResult", ["number", "size", "task_uid", "status", "error"]
+)
+
+FINISHED_STATUSES = ("succeeded", "failed", "canceled")
+
+# Default number of unfinished tasks per sending thread: Meilisearch batches
+# queued document additions together, so tasks are let queue up
+TASKS_PER_SENDER = 8
+
+
+class BatchIndexer:
+    """
+    Push document batches to a Meilisearch index from a pool of threads.
+
+    At most max_in_flight batches (TASKS_PER_SENDER per thread by default)
+    are being sent or processed by Meilisearch at any time, enqueued tasks
+    are polled with an exponential backoff until they are finished.
+    """
+
+    def __init__(
+        self,
+        client,
+        index_name=INDEX_NAME,
+        concurrency=1,
+        max_in_flight=None,
+        task_timeout_ms=300000,
+        poll_interval_ms=50,
+        max_poll_interval_ms=2000,
+    ):
+        self.client = client
+        self.index_name = index_name
+        self.index = client.index(index_name)
+        self.concurrency = concurrency
+        self.max_in_flight = max(max_in_flight or concurrency * TASKS_PER_SENDER, 1)
+        self.task_timeout = task_timeout_ms / 1000
+        self.poll_interval = poll_interval_ms / 1000
+        self.max_poll_interval = max_poll_interval_ms / 1000
+        self._interval = self.poll_interval
+        # future -> (batch number, batch size)
+        self._submitting = {}
+        # task uid -> (batch number, batch size, enqueued at, deadline)
+        self._pending = {}
+
+    def run(self, batches):
+        """
+        Send every batch and wait for its task, returns BatchResults by number.
+        """
+        results = []
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for number, batch in enumerate(batches, start=1):
+                while self.in_flight >= self.max_in_flight:
+                    results.extend(self._poll())
+                future = executor.submit(self.index.add_documents, batch)
+                self._submitting[future] = (number, len(batch))
+            while self.in_flight:
+                results.extend(self._poll())
+        return sorted(results)
+
+    @property
+    def in_flight(self):
+        return len(self._submitting) + len(self._pending)
+
+    def _poll(self):
+        results = self._collect_submitted()
+        if self._pending:
+            results.extend(self._collect_tasks())
+        if results:
+            self._interval = self.poll_interval
+        else:
+            self._backoff()
+        return results
+
+    def _backoff(self):
+        if self._submitting:
+            done, _ = wait(
+                self._submitting, self._interval, return_when=FIRST_COMPLETED
+            )
+            # A batch was just enqueued, poll again right away
+            if done:
+                return
+        else:
+            time.sleep(self._interval)
+        self._interval = min(self._interval * 2, self.max_poll_interval)
+
+    def _collect_submitted(self):
+        results = []
+        for future in [future for future in self._submitting if future.done()]:
+            number, size = self._submitting.pop(future)
+            try:
+                task_info = future.result()
+            except MeilisearchError as e:
+                results.append(BatchResult(number, size, None, "failed", str(e)))
+            else:
+                now = time.monotonic()
+                self._pending[str(task_info.task_uid)] = (
+                    number,
+                    size,
+                    now,
+                    now + self.task_timeout,
+                )
+        return results
+
+    def _collect_tasks(self):
+        results = []
+        uids = list(self._pending)
+        tasks = self.client.get_tasks({"uids": uids, "limit": len(uids)})
+        for task in tasks.results:
+            if task.status in FINISHED_STATUSES and str(task.uid) in self._pending:
+                number, size, enqueued, _ = self._pending.pop(str(task.uid))
+                self._observe(task.status, size, enqueued)
+                error = (task.error or {}).get("message")
+                results.append(BatchResult(number, size, task.uid, task.status, error))
+        now = time.monotonic()
+        for uid, (number, size, _, deadline) in list(self._pending.items()):
+            if now > deadline:
+                del self._pending[uid]
+                results.append(BatchResult(number, size, uid, "timed out", None))
+        return results
+
+    def _observe(self, status, size, enqueued):
+        TASK_WAIT_SECONDS.labels(self.index_name).observe(time.monotonic() - enqueued)
+        if status == "succeeded":
+            INDEXED_DOCUMENTS.labels(self.index_name).inc(size)
+
+
+def deleted_ids(since):
+    """
+    Ids of models deleted since the given datetime, from their tombstones.
+    """
+    return list(
+        DeletedPublicHoliday.objects.filter(deleted_at__gte=since)
+        .exclude(holiday_id__in=PublicHoliday.objects.values("pk"))
+        .order_by("holiday_id")
+        .values_list("holiday_id", flat=True)
+        .distinct()
+    )
+
+
+def prune_deleted(before):
+    """
+    Drop tombstones of models deleted before the given datetime.
+    """
+    return DeletedPublicHoliday.objects.filter(deleted_at__lt=before).delete()[0]
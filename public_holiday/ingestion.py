@@ -0,0 +1,110 @@
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+from .documents import DEFAULT_BATCH_SIZE, batched
+from .models import PublicHoliday
+from .signals import post_bulk_create
+
+# Natural key of a PublicHoliday, see PublicHoliday.Meta.unique_together
+UNIQUE_FIELDS = ("country", "date", "local_name")
+UPDATE_FIELDS = ("name", "updated_at")
+
+STAGING_TABLE = "public_holiday_staging"
+
+
+def natural_key(holiday):
+    return (str(holiday.country), str(holiday.date), holiday.local_name)
+
+
+def upsert_holidays(holidays, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Insert PublicHoliday models, updating the name of existing ones.
+
+    Models are sent in batches of at most batch_size rows, duplicated natural
+    keys in a batch are collapsed (the last one wins) since a row can not be
+    updated twice by the same statement. Like copy_holidays, rows whose name
+    did not change are left untouched (neither updated nor synced to the
+    index). Returns the number of inserted or updated rows.
+    """
+    count = 0
+    for batch in batched(holidays, batch_size):
+        batch = _changed({natural_key(holiday): holiday for holiday in batch})
+        if not batch:
+            continue
+        PublicHoliday.objects.bulk_create(
+            batch,
+            update_conflicts=True,
+            unique_fields=UNIQUE_FIELDS,
+            update_fields=UPDATE_FIELDS,
+        )
+        count += len(batch)
+    return count
+
+
+def _changed(holidays):
+    """
+    Models of holidays (by natural key) which are new or renamed.
+    """
+    # A superset of the existing rows, narrowed down on the natural key below
+    existing = PublicHoliday.objects.filter(
+        country__in={key[0] for key in holidays},
+        date__in={key[1] for key in holidays},
+        local_name__in={key[2] for key in holidays},
+    ).values_list(*UNIQUE_FIELDS, "name")
+    names = {
+        (str(country), str(date), local_name): name
+        for country, date, local_name, name in existing
+    }
+    return [
+        holiday
+        for key, holiday in holidays.items()
+        if key not in names or names[key] != holiday.name
+    ]
+
+
+def copy_holidays(holidays, using=DEFAULT_DB_ALIAS):
+    """
+    PostgreSQL fast path of upsert_holidays for bulk loads.
+
+    Rows are streamed with COPY into a temporary staging table, then merged
+    into the PublicHoliday table with a single INSERT ... ON CONFLICT, rows
+    whose name did not change are left untouched. Returns the number of
+    inserted or updated rows.
+    """
+    connection = connections[using]
+    opts = PublicHoliday._meta
+    quote_name = connection.ops.quote_name
+    table = quote_name(opts.db_table)
+    staging = quote_name(STAGING_TABLE)
+    pk = quote_name(opts.pk.column)
+    name, updated_at = (quote_name(opts.get_field(f).column) for f in UPDATE_FIELDS)
+    key = ", ".join(quote_name(opts.get_field(f).column) for f in UNIQUE_FIELDS)
+    # Columns of the staging table, in COPY rows order
+    columns = f"{name}, {key}"
+
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE {staging} ON COMMIT DROP AS "
+            + f"SELECT {columns} FROM {table} WITH NO DATA"
+        )
+        with cursor.cursor.copy(f"COPY {staging} ({columns}) FROM STDIN") as copy:
+            for holiday in holidays:
+                copy.write_row((holiday.name, *natural_key(holiday)))
+        cursor.execute(
+            f"INSERT INTO {table} ({columns}, {updated_at}) "
+            + f"SELECT DISTINCT ON ({key}) {columns}, %s FROM {staging} "
+            + f"ON CONFLICT ({key}) DO UPDATE "
+            + f"SET {name} = EXCLUDED.{name}, {updated_at} = EXCLUDED.{updated_at} "
+            + f"WHERE {table}.{name} IS DISTINCT FROM EXCLUDED.{name} "
+            + f"RETURNING {pk}, {columns}",
+            [timezone.now()],
+        )
+        changed = [
+            PublicHoliday(
+                pk=row[0], name=row[1], country=row[2], date=row[3], local_name=row[4]
+            )
+            for row in cursor.fetchall()
+        ]
+        # Changed rows are synced to the index like bulk created ones
+        post_bulk_create.send(sender=PublicHoliday, objs=changed, using=using)
+    return len(changed)
@@ -0,0 +1,21 @@
+import argparse
+
+
+def positive_int(value):
+    """
+    Argument type of sizes and counts which must be greater than 0.
+    """
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer: {value}")
+    return number
+
+
+def non_negative_int(value):
+    """
+    Argument type of counts which may be 0.
+    """
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be a non-negative integer: {value}")
+    return number
@@ -0,0 +1,68 @@
+import time
+
+import redis
+from django.core.management.base import BaseCommand
+from meilisearch.errors import (
+    MeilisearchApiError,
+    MeilisearchCommunicationError,
+    MeilisearchTimeoutError,
+)
+from public_holiday.clients import get_client
+from public_holiday.documents import DEFAULT_BATCH_SIZE
+from public_holiday.indexes import IndexSyncError
+from public_holiday.management.arguments import positive_int
+from public_holiday.outbox import get_outbox
+
+
+class Command(BaseCommand):
+    help = (
+        'Keeps MeiliSearch "public_holiday" index in sync by flushing '
+        + "changed PublicHoliday models from the outbox"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=positive_int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Number of changed models sent per request",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait between two flushes",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Flush pending changes once and exit",
+        )
+
+    def handle(self, *args, **options):
+        outbox = get_outbox()
+        while True:
+            self.flush(outbox, options["batch_size"])
+            if options["once"]:
+                break
+            time.sleep(options["interval"])
+
+    def flush(self, outbox, batch_size):
+        try:
+            upserted, deleted = outbox.flush(get_client(), batch_size)
+        except (
+            MeilisearchApiError,
+            MeilisearchCommunicationError,
+            MeilisearchTimeoutError,
+            IndexSyncError,
+            redis.RedisError,
+        ) as e:
+            self.stderr.write(self.style.ERROR(f"Error flushing outbox: {str(e)}"))
+            return
+        if upserted or deleted:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Successfully flushed outbox, {upserted} documents upserted"
+                    + f" and {deleted} deleted."
+                )
+            )
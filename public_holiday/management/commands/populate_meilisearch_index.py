@@ -1,41 +1,278 @@
-import meilisearch
-from django.conf import settings
-from django.core.management.base import BaseCommand
-from meilisearch.errors import MeilisearchApiError, MeilisearchCommunicationError
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from meilisearch.errors import (
+    MeilisearchApiError,
+    MeilisearchCommunicationError,
+    MeilisearchTimeoutError,
+)
+from public_holiday.clients import get_client
+from public_holiday.documents import DEFAULT_BATCH_SIZE, batched, iter_documents
+from public_holiday.indexes import (
+    DELETED_RETENTION,
+    INDEX_NAME,
+    WATERMARK_OVERLAP,
+    IndexSyncError,
+    bump_generation,
+    create_shadow_index,
+    drop_index,
+    get_watermark,
+    set_watermark,
+    swap_shadow_index,
+    wait_for_task,
+)
+from public_holiday.indexing import BatchIndexer, deleted_ids, prune_deleted
+from public_holiday.management.arguments import positive_int
+from public_holiday.metrics import INDEXING_RATE
 from public_holiday.models import PublicHoliday
-from public_holiday.serializers import PublicholidaySerializer
+
+
+# Errors of a failed MeiliSearch call or task
+MEILISEARCH_ERRORS = (
+    MeilisearchApiError,
+    MeilisearchCommunicationError,
+    MeilisearchTimeoutError,
+    IndexSyncError,
+)
+
+
+def _parse_since(value):
+    since = parse_datetime(value)
+    if since is None:
+        raise CommandError(f"Invalid --since datetime: {value}")
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
 
 
 class Command(BaseCommand):
     help = 'Populates MeiliSearch "public_holiday" index with PublicHoliday models'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=positive_int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Number of documents read from the database and sent per request",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=positive_int,
+            default=1,
+            help="Number of batches sent to MeiliSearch concurrently",
+        )
+        parser.add_argument(
+            "--max-in-flight",
+            type=positive_int,
+            default=None,
+            help="Maximum number of unfinished MeiliSearch tasks "
+            + "(defaults to 8 per --concurrency)",
+        )
+        delta = parser.add_mutually_exclusive_group()
+        delta.add_argument(
+            "--since",
+            default=None,
+            help="Only send models changed since this ISO 8601 datetime "
+            + "and delete removed ones",
+        )
+        delta.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Only send models changed since the last successful run "
+            + "and delete removed ones",
+        )
+        delta.add_argument(
+            "--shadow",
+            action="store_true",
+            help="Rebuild the whole index into a temporary index, then swap it "
+            + "with the live one",
+        )
+
     def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        since = _parse_since(options["since"]) if options["since"] else None
+        if options["incremental"]:
+            watermark = get_watermark()
+            since = watermark - WATERMARK_OVERLAP if watermark else None
+        started_at = timezone.now()
+        if since is not None and since < started_at - DELETED_RETENTION:
+            self.stderr.write(
+                self.style.WARNING(
+                    f"Deletions are only tracked for {DELETED_RETENTION.days} days, "
+                    + "models deleted earlier may still be indexed (use --shadow)"
+                )
+            )
+
+        queryset = PublicHoliday.objects.all()
+        if since is not None:
+            queryset = queryset.filter(updated_at__gte=since)
+        index_name = INDEX_NAME
         try:
-            # Connect to MeiliSearch
-            client = meilisearch.Client(
-                settings.MEILISEARCH_URL, settings.MEILISEARCH_API_KEY
-            )
-            # Create or get the "public_holiday" index
-            index_name = "public_holiday"
-            index = client.index(index_name)
-            # Get all PublicHoliday models from the database
-            public_holidays = PublicHoliday.objects.all()
-
-            if len(public_holidays) > 0:
-                documents = PublicholidaySerializer(public_holidays, many=True)
-                # Add the documents to the index
-                index.add_documents(documents.data)
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f'Successfully populated "{index_name}" index'
-                        + f" with {public_holidays.count()} documents."
-                    )
+            # Get the pooled MeiliSearch client
+            client = get_client()
+            # Live searches are not affected while a shadow index is populated
+            if options["shadow"]:
+                index_name = create_shadow_index(client)
+            indexer = BatchIndexer(
+                client,
+                index_name,
+                concurrency=options["concurrency"],
+                max_in_flight=options["max_in_flight"],
+            )
+            # Stream documents from the database and send them in fixed-size
+            # batches, so memory stays flat regardless of the table size
+            start = time.monotonic()
+            documents = iter_documents(queryset, chunk_size=batch_size)
+            results = indexer.run(batched(documents, batch_size))
+            elapsed = time.monotonic() - start
+            deleted = (
+                self.delete_removed(client, since, batch_size)
+                if since is not None
+                else 0
+            )
+        except MEILISEARCH_ERRORS as e:
+            self.stderr.write(
+                self.style.ERROR(f"Error connecting to MeiliSearch: {str(e)}")
+            )
+            if options["shadow"] and index_name != INDEX_NAME:
+                self.drop_shadow(client, index_name)
+            return
+
+        # Invalidate cached searches as soon as the live index changed
+        if not options["shadow"] and (results or deleted):
+            bump_generation()
+        failed = [result for result in results if result.status != "succeeded"]
+        for result in failed:
+            self.stderr.write(
+                self.style.ERROR(
+                    f"Batch {result.number} ({result.size} documents) "
+                    + f"{result.status}: {result.error}"
                 )
+            )
+        if failed:
+            self.stderr.write(
+                self.style.ERROR(
+                    f'{len(failed)} of {len(results)} batches failed on "{index_name}"'
+                )
+            )
+            if options["shadow"]:
+                self.drop_shadow(client, index_name)
+            return
+        if options["shadow"] and not (
+            self.swap(client, index_name, results)
+            and self.replay(client, started_at - WATERMARK_OVERLAP, options)
+        ):
+            return
+
+        # Only a fully successful run moves the watermark forward
+        set_watermark(started_at)
+        prune_deleted(started_at - DELETED_RETENTION)
+        if deleted:
+            self.stdout.write(
+                f'Deleted {deleted} removed documents from "{INDEX_NAME}" index.'
+            )
+        if not results:
+            if since is None:
+                message = "No models found in your database"
             else:
-                self.stdout.write(
-                    self.style.WARNING("No models found in your database")
+                message = f"No models changed since {since.isoformat()}"
+            self.stdout.write(self.style.WARNING(message))
+            return
+
+        total = sum(result.size for result in results)
+        rate = total / max(elapsed, 1e-6)
+        INDEXING_RATE.labels(index_name).set(rate)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Successfully populated "{INDEX_NAME}" index'
+                + f" with {total} documents."
+            )
+        )
+        self.stdout.write(
+            f"Indexed {total} documents in {elapsed:.2f}s "
+            + f"({rate:.1f} documents/s)"
+        )
+
+    def delete_removed(self, client, since, batch_size):
+        index = client.index(INDEX_NAME)
+        deleted = deleted_ids(since)
+        for batch in batched(deleted, batch_size):
+            wait_for_task(client, index.delete_documents(batch))
+        return len(deleted)
+
+    def swap(self, client, shadow_name, results):
+        """
+        Swap the shadow index in if it holds every sent document, drop it otherwise.
+        """
+        try:
+            expected = sum(result.size for result in results)
+            indexed = client.index(shadow_name).get_stats().number_of_documents
+            if indexed != expected:
+                drop_index(client, shadow_name)
+                self.stderr.write(
+                    self.style.ERROR(
+                        f'"{shadow_name}" index holds {indexed} documents '
+                        + f'instead of {expected}, "{INDEX_NAME}" was not replaced'
+                    )
                 )
-        except (MeilisearchApiError, MeilisearchCommunicationError) as e:
+                return False
+            swap_shadow_index(client, INDEX_NAME, shadow_name)
+        except MEILISEARCH_ERRORS as e:
+            self.stderr.write(
+                self.style.ERROR(f"Error connecting to MeiliSearch: {str(e)}")
+            )
+            return False
+        self.stdout.write(f'Swapped "{shadow_name}" index with "{INDEX_NAME}".')
+        return True
+
+    def replay(self, client, since, options):
+        """
+        Send models changed or deleted since the shadow index was populated.
+
+        Meanwhile the outbox worker sent these changes to the replaced index,
+        they would be lost (or deleted models restored) otherwise.
+        """
+        batch_size = options["batch_size"]
+        try:
+            indexer = BatchIndexer(
+                client,
+                INDEX_NAME,
+                concurrency=options["concurrency"],
+                max_in_flight=options["max_in_flight"],
+            )
+            queryset = PublicHoliday.objects.filter(updated_at__gte=since)
+            documents = iter_documents(queryset, chunk_size=batch_size)
+            results = indexer.run(batched(documents, batch_size))
+            deleted = self.delete_removed(client, since, batch_size)
+        except MEILISEARCH_ERRORS as e:
             self.stderr.write(
                 self.style.ERROR(f"Error connecting to MeiliSearch: {str(e)}")
             )
+            return False
+        if results or deleted:
+            bump_generation()
+        failed = [result for result in results if result.status != "succeeded"]
+        if failed:
+            self.stderr.write(
+                self.style.ERROR(
+                    f"{len(failed)} of {len(results)} batches of changes made "
+                    + f'during the rebuild failed on "{INDEX_NAME}"'
+                )
+            )
+            return False
+        changed = sum(result.size for result in results)
+        self.stdout.write(
+            f"Replayed {changed} changed and {deleted} deleted models "
+            + "since the rebuild started."
+        )
+        return True
+
+    def drop_shadow(self, client, shadow_name):
+        try:
+            drop_index(client, shadow_name)
+        except MEILISEARCH_ERRORS as e:
+            self.stderr.write(
+                self.style.ERROR(f'Unable to drop "{shadow_name}" index: {str(e)}')
+            )
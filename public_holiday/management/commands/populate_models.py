@@ -1,58 +1,167 @@
 import datetime
 import random
-import requests
 
 from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
+from django.db import connection
 from django_countries import countries
+from public_holiday.documents import DEFAULT_BATCH_SIZE
+from public_holiday.holiday_api import HolidayApiClient, HolidayApiError
+from public_holiday.ingestion import copy_holidays, upsert_holidays
+from public_holiday.management.arguments import non_negative_int, positive_int
 from public_holiday.models import PublicHoliday
+from public_holiday.response_cache import ResponseCache
 
 
 class Command(BaseCommand):
     help = (
         "Populate PublicHoliday models from Public Holiday API"
-        + "(see https://date.nager.at/Api) given a random country"
+        + "(see https://date.nager.at/Api) given a random country, "
+        + "or the given countries and years"
     )
-    api_consumed = False
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group()
+        target.add_argument(
+            "--countries",
+            nargs="+",
+            metavar="CODE",
+            help="ISO 3166 codes of the countries to fetch (defaults to a random one)",
+        )
+        target.add_argument(
+            "--all",
+            action="store_true",
+            help="Fetch every country available on the Public Holiday API",
+        )
+        parser.add_argument(
+            "--years",
+            nargs="+",
+            type=int,
+            metavar="YEAR",
+            help="Years to fetch (defaults to the current one)",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=positive_int,
+            default=8,
+            help="Number of country and year pairs fetched concurrently",
+        )
+        parser.add_argument(
+            "--retries",
+            type=non_negative_int,
+            default=3,
+            help="Number of retries of empty, rate limited or failed responses",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=positive_int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Maximum number of models inserted or updated per query",
+        )
+        parser.add_argument(
+            "--copy",
+            action="store_true",
+            help="Load every fetched model at once through PostgreSQL COPY",
+        )
+        cache = parser.add_mutually_exclusive_group()
+        cache.add_argument(
+            "--offline",
+            action="store_true",
+            help="Only use cached Public Holiday API responses, even expired ones",
+        )
+        cache.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="Neither read nor store cached Public Holiday API responses",
+        )
 
     def handle(self, *args, **options):
-        while not self.api_consumed:
-            (country_code, country_name) = random.choice(list(countries))
-            current_date = datetime.date.today()
-            url = "%s/publicholidays/%s/%s" % (
-                settings.PUBLIC_HOLDAY_API_URL,
-                current_date.year,
-                country_code,
+        if options["copy"] and connection.vendor != "postgresql":
+            raise CommandError("--copy is only supported on PostgreSQL")
+        cache = None
+        if not options["no_cache"]:
+            cache = ResponseCache(
+                settings.PUBLIC_HOLIDAY_API_CACHE_DIR,
+                ttl=settings.PUBLIC_HOLIDAY_API_CACHE_TTL,
+                max_size=settings.PUBLIC_HOLIDAY_API_CACHE_MAX_SIZE,
             )
+        client = HolidayApiClient(
+            settings.PUBLIC_HOLDAY_API_URL,
+            retries=options["retries"],
+            pool_maxsize=options["concurrency"],
+            cache=cache,
+            offline=options["offline"],
+        )
+        years = options["years"] or [datetime.date.today().year]
+        pairs = [
+            (country_code, year)
+            for country_code in self.get_country_codes(client, options)
+            for year in years
+        ]
+
+        failed = 0
+        fetched = []
+        for (country_code, year), data, error in client.fetch_many(
+            pairs, options["concurrency"]
+        ):
+            country_name = countries.name(country_code) or country_code
+            if error is not None:
+                failed += 1
+                self.stderr.write(
+                    self.style.ERROR(
+                        "Error while fetching Public Holiday API for %s in %i [%s]"
+                        % (country_name, year, str(error))
+                    )
+                )
+                continue
+            holydays = [
+                PublicHoliday(
+                    date=hd["date"],
+                    name=hd["name"],
+                    local_name=hd["localName"],
+                    country=hd["countryCode"],
+                )
+                for hd in data
+            ]
+            # Renamed holidays are updated, bulk loads are merged at once
+            if options["copy"]:
+                fetched += holydays
+            else:
+                upsert_holidays(holydays, options["batch_size"])
+
+            self.stdout.write(
+                self.style.SUCCESS(
+                    "Successfully populate data for country %s in %i, "
+                    % (country_name, year)
+                    + "%i record processed" % len(data)
+                )
+            )
+        if fetched:
+            changed = copy_holidays(fetched)
+            self.stdout.write(
+                "Loaded %i records with COPY, %i inserted or updated"
+                % (len(fetched), changed)
+            )
+        if failed:
+            raise CommandError(
+                "Error while fetching Public Holiday API for %i of %i "
+                % (failed, len(pairs))
+                + "countries and years"
+            )
+
+    def get_country_codes(self, client, options):
+        if options["all"]:
             try:
-                response = requests.get(url)
-                response.raise_for_status()
-                # CloudFlare sometimes respond with a no content,
-                # we will keep requesting data
-                if response.status_code == 200:
-                    data = response.json()
-                    self.api_consumed = True
-            except Exception as error:
+                return client.available_countries()
+            except HolidayApiError as error:
                 raise CommandError(
                     "Error while fetching Public Holiday API [%s]" % str(error)
                 )
-        holydays = [
-            PublicHoliday(
-                date=hd["date"],
-                name=hd["name"],
-                local_name=hd["localName"],
-                country=hd["countryCode"],
-            )
-            for hd in data
-        ]
-        PublicHoliday.objects.bulk_create(
-            holydays,
-            ignore_conflicts=True,
-        )
-
-        self.stdout.write(
-            self.style.SUCCESS(
-                "Successfully populate data for country %s, %i record processed"
-                % (country_name, len(data))
-            )
-        )
+        if options["countries"]:
+            country_codes = [code.upper() for code in options["countries"]]
+            unknown = [code for code in country_codes if code not in countries]
+            if unknown:
+                raise CommandError("Unknown country codes: %s" % ", ".join(unknown))
+            return country_codes
+        (country_code, _) = random.choice(list(countries))
+        return [country_code]
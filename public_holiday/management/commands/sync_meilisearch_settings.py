@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from meilisearch.errors import (
+    MeilisearchApiError,
+    MeilisearchCommunicationError,
+    MeilisearchTimeoutError,
+)
+from public_holiday.clients import get_client
+from public_holiday.indexes import INDEX_NAME, IndexSyncError, sync_index_settings
+
+
+class Command(BaseCommand):
+    help = 'Applies declared settings to MeiliSearch "public_holiday" index'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Send settings even if their fingerprint did not change",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            updated = sync_index_settings(get_client(), force=options["force"])
+        except (
+            MeilisearchApiError,
+            MeilisearchCommunicationError,
+            MeilisearchTimeoutError,
+            IndexSyncError,
+        ) as e:
+            self.stderr.write(
+                self.style.ERROR(f"Error syncing MeiliSearch settings: {str(e)}")
+            )
+            return
+        if updated:
+            self.stdout.write(
+                self.style.SUCCESS(f'Successfully updated "{INDEX_NAME}" settings')
+            )
+        else:
+            self.stdout.write(f'"{INDEX_NAME}" settings are already up to date')
@@ -0,0 +1,156 @@
+import functools
+import os
+import time
+
+from django.db import connection
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Latency buckets in seconds, from cached searches to slow database scans
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+SEARCH_PHASE_SECONDS = Histogram(
+    "search_phase_seconds",
+    "Duration of the phases of search requests: validation, lookup (cache, "
+    "MeiliSearch or database), meilisearch (round trip), fallback (database "
+    "search) and rendering",
+    ["endpoint", "phase"],
+    buckets=LATENCY_BUCKETS,
+)
+MEILISEARCH_PROCESSING_SECONDS = Histogram(
+    "meilisearch_processing_seconds",
+    "Search processing time reported by MeiliSearch (processingTimeMs)",
+    ["endpoint"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_QUERIES = Histogram(
+    "db_queries",
+    "Database queries run by a request",
+    ["endpoint"],
+    buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100),
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_seconds",
+    "Time spent running the database queries of a request",
+    ["endpoint"],
+    buckets=LATENCY_BUCKETS,
+)
+INDEXED_DOCUMENTS = Counter(
+    "indexed_documents",
+    "Documents of batches successfully indexed by MeiliSearch",
+    ["index"],
+)
+INDEXING_RATE = Gauge(
+    "indexing_documents_per_second",
+    "Indexing rate of the last populate_meilisearch_index run",
+    ["index"],
+    multiprocess_mode="mostrecent",
+)
+TASK_WAIT_SECONDS = Histogram(
+    "meilisearch_task_wait_seconds",
+    "Time from enqueuing a MeiliSearch indexing task to seeing it finished",
+    ["index"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+)
+BREAKER_STATE = Gauge(
+    "circuit_breaker_state",
+    "Current state of circuit breakers, 1 for the state they are in",
+    ["name", "state"],
+    multiprocess_mode="livemax",
+)
+BREAKER_REJECTED_CALLS = Counter(
+    "circuit_breaker_rejected_calls",
+    "Calls failed immediately by an open circuit breaker",
+    ["name"],
+)
+
+
+def search_phase(endpoint, phase):
+    """
+    Context manager and decorator timing a phase of a search request.
+    """
+    return SEARCH_PHASE_SECONDS.labels(endpoint, phase).time()
+
+
+def observe_processing_time(endpoint, response):
+    if "processingTimeMs" in response:
+        MEILISEARCH_PROCESSING_SECONDS.labels(endpoint).observe(
+            response["processingTimeMs"] / 1000
+        )
+
+
+class QueryMetrics:
+    """
+    Database execute wrapper counting queries and the time spent running them.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+def track_queries(endpoint):
+    """
+    Decorator of viewset actions observing their database queries.
+    """
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            queries = QueryMetrics()
+            try:
+                with connection.execute_wrapper(queries):
+                    return method(self, request, *args, **kwargs)
+            finally:
+                DB_QUERIES.labels(endpoint).observe(queries.count)
+                DB_QUERY_SECONDS.labels(endpoint).observe(queries.seconds)
+
+        return wrapper
+
+    return decorator
+
+
+def render_metrics():
+    """
+    Metrics in the Prometheus text format and their content type.
+
+    With PROMETHEUS_MULTIPROC_DIR set, every process (workers and management
+    commands) writes its samples there and the metrics of all of them are
+    aggregated, whichever worker serves the scrape.
+    """
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('public_holiday', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publicholiday',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2 on 2026-10-18 16:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('public_holiday', '0002_publicholiday_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='publicholiday',
+            index=models.Index(fields=['date'], name='publicholiday_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='publicholiday',
+            index=models.Index(fields=['country', 'date', 'id'], name='publicholiday_country_date_idx'),
+        ),
+    ]
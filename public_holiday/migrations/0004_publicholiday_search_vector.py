@@ -0,0 +1,60 @@
+# Generated by Django 4.2 on 2026-10-18 16:58
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# The vector is kept up to date by a trigger rather than by the ORM, so that
+# bulk creates, COPY ingestion and raw updates maintain it as well
+TRIGGER_SQL = [
+    """
+    CREATE TRIGGER public_holiday_search_vector_update
+    BEFORE INSERT OR UPDATE OF name, local_name ON public_holiday_publicholiday
+    FOR EACH ROW EXECUTE FUNCTION
+    tsvector_update_trigger(search_vector, 'pg_catalog.simple', name, local_name)
+    """,
+    """
+    UPDATE public_holiday_publicholiday
+    SET search_vector = to_tsvector(
+        'pg_catalog.simple', coalesce(name, '') || ' ' || coalesce(local_name, '')
+    )
+    """,
+    """
+    CREATE INDEX publicholiday_search_vector_idx
+    ON public_holiday_publicholiday USING gin (search_vector)
+    """,
+]
+
+REVERSE_TRIGGER_SQL = [
+    "DROP INDEX IF EXISTS publicholiday_search_vector_idx",
+    """
+    DROP TRIGGER IF EXISTS public_holiday_search_vector_update
+    ON public_holiday_publicholiday
+    """,
+]
+
+
+def _postgresql_only(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == "postgresql":
+            for statement in statements:
+                schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('public_holiday', '0003_publicholiday_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publicholiday',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(
+            _postgresql_only(TRIGGER_SQL), _postgresql_only(REVERSE_TRIGGER_SQL)
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2 on 2026-10-18 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('public_holiday', '0004_publicholiday_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletedPublicHoliday',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('holiday_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
@@ -1,15 +1,40 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django_countries.fields import CountryField
 
+from .signals import post_bulk_create
+
+
+class PublicHolidayQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        post_bulk_create.send(sender=self.model, objs=objs, using=self.db)
+        return objs
+
 
 class PublicHoliday(models.Model):
     name = models.CharField(max_length=255)
     local_name = models.CharField(max_length=255)
     country = CountryField()
     date = models.DateField()
+    # Bumped on every save and bulk create, drives delta reindexes
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # Full-text vector of name and local_name, maintained (and GIN indexed)
+    # by PostgreSQL, see migration 0004. Always null on other databases
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = PublicHolidayQuerySet.as_manager()
 
     class Meta:
         unique_together = ("country", "date", "local_name")
+        indexes = [
+            # Date range and year filters across countries
+            models.Index(fields=["date"], name="publicholiday_date_idx"),
+            # Country filters and keyset pages ordered by country and date
+            models.Index(
+                fields=["country", "date", "id"], name="publicholiday_country_date_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return "[%s | %s] %s (%s)" % (
@@ -18,3 +43,15 @@ class PublicHoliday(models.Model):
             self.name,
             self.local_name,
         )
+
+
+class DeletedPublicHoliday(models.Model):
+    """
+    Tombstone of a deleted PublicHoliday, recorded in the deleting transaction.
+
+    Delta reindexes delete the documents of models deleted since they started
+    from here instead of paging through the whole index.
+    """
+
+    holiday_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
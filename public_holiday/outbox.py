@@ -0,0 +1,84 @@
+import functools
+import logging
+
+import redis
+from django.conf import settings
+
+from .documents import DEFAULT_BATCH_SIZE, batched, iter_documents
+from .indexes import INDEX_NAME, bump_generation, wait_for_task
+from .models import PublicHoliday
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_KEY = "meilisearch:outbox:public_holiday"
+
+
+class Outbox:
+    """
+    Redis set of PublicHoliday ids changed since the last flush.
+
+    Only ids are stored, so repeated changes of the same row coalesce into a
+    single entry; on flush every id is resolved against the database, existing
+    rows are upserted in the index and missing ones are deleted.
+    """
+
+    def __init__(self, redis_client, key=OUTBOX_KEY):
+        self.redis = redis_client
+        self.key = key
+        self.processing_key = f"{key}:processing"
+
+    def add(self, pks):
+        """
+        Mark ids as changed, Redis errors are logged and never raised so that
+        database writes do not depend on the outbox availability.
+        """
+        if not pks:
+            return
+        try:
+            self.redis.sadd(self.key, *pks)
+        except redis.RedisError:
+            logger.warning(
+                "Unable to add %d ids to the outbox", len(pks), exc_info=True
+            )
+
+    def __len__(self):
+        return self.redis.scard(self.key) + self.redis.scard(self.processing_key)
+
+    def flush(self, client, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Send pending changes to Meilisearch, returns (upserted, deleted) counts.
+
+        Pending ids are moved to a processing set which is only dropped once
+        every task succeeded, a failed flush is resumed by the next one.
+        """
+        if not self.redis.exists(self.processing_key):
+            try:
+                self.redis.rename(self.key, self.processing_key)
+            except redis.ResponseError:
+                # Nothing changed since the last flush
+                return 0, 0
+        pks = sorted(int(pk) for pk in self.redis.smembers(self.processing_key))
+        index = client.index(INDEX_NAME)
+        upserted = deleted = 0
+        for batch in batched(pks, batch_size):
+            queryset = PublicHoliday.objects.filter(pk__in=batch)
+            documents = list(iter_documents(queryset, chunk_size=batch_size))
+            missing = sorted(set(batch) - {document["id"] for document in documents})
+            if documents:
+                wait_for_task(client, index.add_documents(documents))
+            if missing:
+                wait_for_task(client, index.delete_documents(missing))
+            upserted += len(documents)
+            deleted += len(missing)
+        self.redis.delete(self.processing_key)
+        if upserted or deleted:
+            bump_generation()
+        return upserted, deleted
+
+
+@functools.cache
+def get_outbox():
+    """
+    Return the process-wide outbox, connected to settings.REDIS_URL.
+    """
+    return Outbox(redis.Redis.from_url(settings.REDIS_URL))
@@ -0,0 +1,333 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    BasePagination,
+    PageNumberPagination,
+    _positive_int,
+)
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class SearchPagination:
+    """
+    Pagination of Meilisearch search results.
+
+    Either limit/offset (estimated total hits) or page/hitsPerPage (exhaustive
+    total hits) query parameters are passed through to Meilisearch, page sizes
+    are capped by settings.SEARCH_MAX_PAGE_SIZE. Pages of a query that is not
+    the request's own (multi-search) are read from query_params, their links
+    point to url instead of the request URL.
+    """
+
+    limit_query_param = "limit"
+    offset_query_param = "offset"
+    page_query_param = "page"
+    page_size_query_param = "hitsPerPage"
+
+    def __init__(self, request, query_params=None, url=None):
+        self.request = request
+        self.query_params = (
+            request.query_params if query_params is None else query_params
+        )
+        self.url = url
+        self.default_page_size = api_settings.PAGE_SIZE
+        self.max_page_size = settings.SEARCH_MAX_PAGE_SIZE
+        params = self.query_params
+        self.numbered = self.page_query_param in params or (
+            self.page_size_query_param in params
+        )
+        if self.numbered:
+            self.page = self._get_int(self.page_query_param, 1, strict=True)
+            self.page_size = self._get_page_size(self.page_size_query_param)
+        else:
+            self.offset = self._get_int(self.offset_query_param, 0)
+            self.page_size = self._get_page_size(self.limit_query_param)
+
+    def _get_int(self, param, default, strict=False, cutoff=None):
+        try:
+            return _positive_int(
+                self.query_params[param], strict=strict, cutoff=cutoff
+            )
+        except (KeyError, ValueError):
+            return default
+
+    def _get_page_size(self, param):
+        return self._get_int(
+            param, self.default_page_size, strict=True, cutoff=self.max_page_size
+        )
+
+    def get_search_params(self):
+        """
+        Meilisearch search parameters selecting the requested page.
+        """
+        if self.numbered:
+            return {"page": self.page, "hitsPerPage": self.page_size}
+        return {"offset": self.offset, "limit": self.page_size}
+
+    def get_paginated_data(self, response):
+        """
+        Envelope of a Meilisearch search response.
+        """
+        data = self._get_page_data(response)
+        if "facetDistribution" in response:
+            data["facetDistribution"] = response["facetDistribution"]
+        return data
+
+    def _get_page_data(self, response):
+        if self.numbered:
+            total_pages = response.get("totalPages", 0)
+            return {
+                "totalHits": response.get("totalHits", 0),
+                "totalPages": total_pages,
+                "page": self.page,
+                "hitsPerPage": self.page_size,
+                "next": self._get_page_link(self.page + 1, total_pages),
+                "previous": self._get_page_link(self.page - 1, total_pages),
+                "results": response["hits"],
+            }
+        total = response.get("estimatedTotalHits", 0)
+        return {
+            "estimatedTotalHits": total,
+            "offset": self.offset,
+            "limit": self.page_size,
+            "next": self._get_next_offset_link(total),
+            "previous": self._get_previous_offset_link(),
+            "results": response["hits"],
+        }
+
+    def get_paginated_response(self, response):
+        return Response(self.get_paginated_data(response))
+
+    def _get_page_link(self, page, total_pages):
+        if page < 1 or page > total_pages:
+            return None
+        url = self.url or self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.page_query_param, page)
+
+    def _get_next_offset_link(self, total):
+        if self.offset + self.page_size >= total:
+            return None
+        url = self.url or self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.page_size)
+        offset = self.offset + self.page_size
+        return replace_query_param(url, self.offset_query_param, offset)
+
+    def _get_previous_offset_link(self):
+        if self.offset <= 0:
+            return None
+        url = self.url or self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.page_size)
+        if self.offset - self.page_size <= 0:
+            return remove_query_param(url, self.offset_query_param)
+        offset = self.offset - self.page_size
+        return replace_query_param(url, self.offset_query_param, offset)
+
+
+def approximate_count(queryset):
+    """
+    Number of rows of queryset estimated by the PostgreSQL planner.
+
+    The estimate comes from table statistics (refreshed by ANALYZE) instead of
+    a full COUNT(*) scan, other databases fall back to an exact count.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return queryset.count()
+    sql, params = queryset.order_by().values("pk").query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        (plan,) = cursor.fetchone()
+    return plan[0]["Plan"]["Plan Rows"]
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination of PublicHoliday models.
+
+    Pages are selected with a WHERE clause on the ordering key of the last
+    (or first) row of the previous page, so every page costs an index range
+    scan regardless of its depth and no COUNT(*) is run unless an approximate
+    count is requested with count=approximate.
+    """
+
+    cursor_query_param = "cursor"
+    ordering_query_param = "ordering"
+    page_size_query_param = "page_size"
+    count_query_param = "count"
+    # Unique keys rows can be ordered by, the primary key breaks ties
+    orderings = {"id": ("id",), "country": ("country", "date", "id")}
+    default_ordering = "id"
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        ordering = request.query_params.get(self.ordering_query_param)
+        self.fields = self.orderings.get(
+            ordering, self.orderings[self.default_ordering]
+        )
+        self.count = None
+        if request.query_params.get(self.count_query_param) == "approximate":
+            self.count = approximate_count(queryset)
+
+        reverse, position = self.decode_cursor(request)
+        prefix = "-" if reverse else ""
+        queryset = queryset.order_by(*(prefix + field for field in self.fields))
+        if position is not None:
+            try:
+                queryset = queryset.filter(self.after(position, reverse))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound("Invalid cursor")
+
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if reverse:
+            results.reverse()
+        has_next, has_previous = has_more, position is not None
+        if reverse:
+            has_next, has_previous = has_previous, has_next
+        self.next_position = self.get_position(results[-1]) if results else None
+        self.previous_position = self.get_position(results[0]) if results else None
+        self.has_next = has_next and results
+        self.has_previous = has_previous and results
+        return results
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return api_settings.PAGE_SIZE
+
+    def after(self, position, reverse=False):
+        """
+        Rows past position in the ordering, ie. (a, b, c) > (x, y, z) as
+        a > x OR (a = x AND (b > y OR (b = y AND c > z))).
+        """
+        if len(position) != len(self.fields):
+            raise ValueError("Cursor does not match ordering")
+        lookup = "lt" if reverse else "gt"
+        condition = Q(**{f"{self.fields[-1]}__{lookup}": position[-1]})
+        for field, value in zip(self.fields[-2::-1], position[-2::-1]):
+            condition = Q(**{f"{field}__{lookup}": value}) | (
+                Q(**{field: value}) & condition
+            )
+        # Redundant bound on the leading column, so that the database can
+        # start an index range scan at the cursor
+        return Q(**{f"{self.fields[0]}__{lookup}e": position[0]}) & condition
+
+    def get_position(self, instance):
+        position = []
+        for field in self.fields:
+            value = getattr(instance, field)
+            position.append(value if isinstance(value, int) else str(value))
+        return position
+
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps({"p": position, "r": int(reverse)})
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return False, None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            return bool(payload["r"]), list(payload["p"])
+        except (TypeError, ValueError, KeyError, binascii.Error):
+            raise NotFound("Invalid cursor")
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def get_paginated_response(self, data):
+        response = {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+        if self.count is not None:
+            response = {"count": self.count, **response}
+        return Response(response)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Enables keyset pagination, "
+                + "empty for the first page or the next/previous cursor.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.ordering_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Keyset pagination ordering.",
+                "schema": {"type": "string", "enum": list(self.orderings)},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Keyset pagination page size.",
+                "schema": {"type": "integer"},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Adds an approximate count to keyset pages.",
+                "schema": {"type": "string", "enum": ["approximate"]},
+            },
+        ]
+
+
+class PublicHolidayPagination(PageNumberPagination):
+    """
+    Page number pagination, or keyset pagination once a cursor parameter is
+    given (use an empty one for the first page).
+    """
+
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(
+            view
+        ) + self.keyset_class().get_schema_operation_parameters(view)
@@ -0,0 +1,65 @@
+import logging
+from functools import reduce
+from operator import or_
+
+import redis
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .conditional import TABLE_MARKER, touch_marker
+from .models import DeletedPublicHoliday, PublicHoliday
+from .outbox import get_outbox
+from .signals import post_bulk_create
+
+logger = logging.getLogger(__name__)
+
+
+def _enqueue(pks, using):
+    def _committed():
+        get_outbox().add(pks)
+        # Validators of responses read before the change no longer match
+        try:
+            touch_marker(TABLE_MARKER)
+        except redis.RedisError:
+            logger.warning("Unable to touch %s marker", TABLE_MARKER, exc_info=True)
+
+    # Changes are only visible to the outbox worker once committed
+    transaction.on_commit(_committed, using=using)
+
+
+@receiver(post_save, sender=PublicHoliday)
+def enqueue_saved(sender, instance, using, **kwargs):
+    _enqueue([instance.pk], using)
+
+
+@receiver(post_delete, sender=PublicHoliday)
+def enqueue_deleted(sender, instance, using, **kwargs):
+    _enqueue([instance.pk], using)
+
+
+@receiver(post_delete, sender=PublicHoliday)
+def record_deleted(sender, instance, using, **kwargs):
+    # Tombstones are rolled back along with the deletion
+    DeletedPublicHoliday.objects.using(using).create(holiday_id=instance.pk)
+
+
+@receiver(post_bulk_create, sender=PublicHoliday)
+def enqueue_bulk_created(sender, objs, using, **kwargs):
+    pks = [obj.pk for obj in objs if obj.pk is not None]
+    # Primary keys are not set when conflicts are ignored or updated,
+    # look rows up by their natural key instead
+    unsaved = [obj for obj in objs if obj.pk is None]
+    if unsaved:
+        natural_keys = reduce(
+            or_,
+            (
+                Q(country=obj.country, date=obj.date, local_name=obj.local_name)
+                for obj in unsaved
+            ),
+        )
+        pks += sender.objects.using(using).filter(natural_keys).values_list(
+            "pk", flat=True
+        )
+    _enqueue(pks, using)
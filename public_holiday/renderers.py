@@ -0,0 +1,106 @@
+import csv
+import io
+import json
+from itertools import islice
+
+import orjson
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import encoders
+
+
+class RawJSON(bytes):
+    """
+    Already encoded JSON, embedded as it is in ORJSONRenderer output.
+    """
+
+
+class _JSONEncoder(encoders.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, RawJSON):
+            return json.loads(obj)
+        return super().default(obj)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer encoding with orjson.
+
+    Output is the same as JSONRenderer's: types orjson does not handle the
+    same way (datetimes, decimals, lazy strings...) are encoded by the DRF
+    encoder and indented or ASCII only output is rendered by JSONRenderer.
+    RawJSON values are embedded without being decoded and encoded again.
+    """
+
+    encoder_class = _JSONEncoder
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context) or (
+            self.ensure_ascii
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        # DRF escapes these separators, valid JSON but not valid JavaScript
+        rendered = orjson.dumps(data, default=self._default, option=self.options)
+        if b"\xe2\x80\xa8" in rendered or b"\xe2\x80\xa9" in rendered:
+            rendered = rendered.replace(b"\xe2\x80\xa8", b"\\u2028")
+            rendered = rendered.replace(b"\xe2\x80\xa9", b"\\u2029")
+        return rendered
+
+    def _default(self, obj):
+        if isinstance(obj, RawJSON):
+            return orjson.Fragment(bytes(obj))
+        return self.encoder_class().default(obj)
+
+
+class StreamingRenderer(BaseRenderer):
+    """
+    Renderer of exports streamed by StreamingHttpResponse.
+
+    stream() encodes rows (dicts of the same fields) chunk_size rows at a
+    time, render() encodes responses that are not streamed, such as errors.
+    """
+
+    chunk_size = 1000
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return self.render_rows([data])
+
+    def stream(self, rows):
+        rows = iter(rows)
+        first = True
+        while chunk := list(islice(rows, self.chunk_size)):
+            yield self.render_rows(chunk, first)
+            first = False
+
+    def render_rows(self, rows, first=True):
+        raise NotImplementedError
+
+
+class NDJSONRenderer(StreamingRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = None
+
+    def render_rows(self, rows, first=True):
+        return b"".join(
+            orjson.dumps(row, option=orjson.OPT_NON_STR_KEYS) + b"\n" for row in rows
+        )
+
+
+class CSVRenderer(StreamingRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+    def render_rows(self, rows, first=True):
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=list(rows[0]))
+        # Only the first chunk starts with the header
+        if first:
+            writer.writeheader()
+        writer.writerows(rows)
+        return buffer.getvalue().encode()
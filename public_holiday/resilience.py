@@ -0,0 +1,328 @@
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent import futures
+
+from django.conf import settings
+from meilisearch.errors import (
+    MeilisearchApiError,
+    MeilisearchCommunicationError,
+    MeilisearchTimeoutError,
+)
+
+from .metrics import BREAKER_REJECTED_CALLS, BREAKER_STATE
+
+# Statuses of a Meilisearch instance restarting or hidden behind a proxy
+UNAVAILABLE_STATUSES = (502, 503, 504)
+
+# Result of a hedge which was not needed
+_NOT_SENT = object()
+
+
+def is_unavailable(error):
+    """
+    Whether error means Meilisearch could not serve the call at all, as
+    opposed to rejecting it (invalid parameters, missing index...).
+    """
+    if isinstance(error, (MeilisearchCommunicationError, MeilisearchTimeoutError)):
+        return True
+    return (
+        isinstance(error, MeilisearchApiError)
+        and error.status_code in UNAVAILABLE_STATUSES
+    )
+
+
+class CircuitOpenError(MeilisearchCommunicationError):
+    """
+    Raised instead of calling Meilisearch while the circuit breaker is open.
+    """
+
+    def __init__(self, name):
+        super().__init__(f"Circuit breaker {name} is open")
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker of calls to a remote service.
+
+    After failure_threshold consecutive failed calls the circuit opens and
+    calls fail immediately with CircuitOpenError. Once reset_timeout seconds
+    elapsed it is half-open: a single trial call is let through, closing the
+    circuit when it succeeds and opening it again otherwise. A trial which is
+    cancelled, or still pending after reset_timeout seconds, is replaced by
+    the next call. Only errors of an unavailable service count as failures.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_threshold, reset_timeout):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = None
+        self._set_state(self.CLOSED)
+        self.failures = 0
+        self.opened_at = None
+        self._opened = 0.0
+        self._trial = False
+        self._trial_started = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def healthy(self):
+        return self.state == self.CLOSED and self.failures == 0
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == self.OPEN and now - self._opened >= self.reset_timeout:
+                self._set_state(self.HALF_OPEN)
+                self._trial = False
+            if self.state == self.HALF_OPEN and (
+                not self._trial or now - self._trial_started >= self.reset_timeout
+            ):
+                self._trial = True
+                self._trial_started = now
+                return True
+            return False
+
+    def release(self):
+        """
+        Give up the trial of a call which ended without an outcome (cancelled
+        or interrupted), so that the next call runs a new one.
+        """
+        with self._lock:
+            self._trial = False
+
+    def record_success(self):
+        with self._lock:
+            self._set_state(self.CLOSED)
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self._set_state(self.OPEN)
+                self.opened_at = time.time()
+                self._opened = time.monotonic()
+                self._trial = False
+
+    def _set_state(self, state):
+        if state == self.state:
+            return
+        self.state = state
+        for name in (self.CLOSED, self.OPEN, self.HALF_OPEN):
+            BREAKER_STATE.labels(self.name, name).set(int(name == state))
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "name": self.name,
+                "state": self.state,
+                "failures": self.failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout": self.reset_timeout,
+                "opened_at": self.opened_at,
+            }
+
+    def call(self, func):
+        self._check()
+        try:
+            result = func()
+        except Exception as e:
+            self._record(e)
+            raise
+        except BaseException:
+            self.release()
+            raise
+        self.record_success()
+        return result
+
+    async def acall(self, func):
+        self._check()
+        try:
+            result = await func()
+        except Exception as e:
+            self._record(e)
+            raise
+        except BaseException:
+            # Cancelled (asyncio.CancelledError is not an Exception)
+            self.release()
+            raise
+        self.record_success()
+        return result
+
+    def _check(self):
+        if not self.allow():
+            BREAKER_REJECTED_CALLS.labels(self.name).inc()
+            raise CircuitOpenError(self.name)
+
+    def _record(self, error):
+        # A rejected call still proves the service is up
+        if is_unavailable(error):
+            self.record_failure()
+        else:
+            self.record_success()
+
+
+class ReadPolicy:
+    """
+    Latency budget, retries and hedging of idempotent Meilisearch reads.
+
+    send(timeout) performs the read with timeout seconds left of the budget.
+    Reads failing because Meilisearch is unavailable are retried up to
+    retries times while the budget lasts. With a hedge_delay, a read still
+    pending after hedge_delay seconds is sent a second time: asynchronous
+    reads return the first response, synchronous ones (which can not leave a
+    blocking call) fall back to the hedge when the first read fails.
+    """
+
+    def __init__(self, budget, retries=0, hedge_delay=0):
+        self.budget = budget
+        self.retries = retries
+        self.hedge_delay = hedge_delay
+
+    def call(self, send):
+        deadline = time.monotonic() + self.budget
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                if self.hedge_delay:
+                    return self._hedged(send, remaining)
+                return send(remaining)
+            except Exception as e:
+                attempt += 1
+                if (
+                    not is_unavailable(e)
+                    or attempt > self.retries
+                    or time.monotonic() >= deadline
+                ):
+                    raise
+
+    async def acall(self, send):
+        deadline = time.monotonic() + self.budget
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                if self.hedge_delay:
+                    return await self._ahedged(send, remaining)
+                return await _within(send(remaining), remaining)
+            except Exception as e:
+                attempt += 1
+                if (
+                    not is_unavailable(e)
+                    or attempt > self.retries
+                    or time.monotonic() >= deadline
+                ):
+                    raise
+
+    def _hedged(self, send, remaining):
+        # The read is sent from the calling thread, threads of the shared pool
+        # only send hedges, so reads never queue behind each other's
+        deadline = time.monotonic() + remaining
+        hedge_at = time.monotonic() + min(self.hedge_delay, remaining)
+        finished = threading.Event()
+
+        def hedge():
+            if finished.wait(max(hedge_at - time.monotonic(), 0)):
+                return _NOT_SENT
+            return send(deadline - time.monotonic())
+
+        future = _get_hedge_executor().submit(hedge)
+        try:
+            return send(remaining)
+        except Exception as e:
+            finished.set()
+            if not is_unavailable(e):
+                raise
+            # A hedge already sent may still answer within the budget
+            try:
+                result = future.result(timeout=max(deadline - time.monotonic(), 0))
+            except Exception:
+                raise e
+            if result is _NOT_SENT:
+                raise
+            return result
+        finally:
+            finished.set()
+            future.cancel()
+
+    async def _ahedged(self, send, remaining):
+        deadline = time.monotonic() + remaining
+        pending = {asyncio.ensure_future(send(remaining))}
+        done, _ = await asyncio.wait(pending, timeout=min(self.hedge_delay, remaining))
+        if not done:
+            pending.add(asyncio.ensure_future(send(deadline - time.monotonic())))
+        try:
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=max(deadline - time.monotonic(), 0),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    raise MeilisearchTimeoutError("Latency budget exceeded")
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+async def _within(coroutine, timeout):
+    try:
+        return await asyncio.wait_for(coroutine, max(timeout, 0))
+    except asyncio.TimeoutError as e:
+        raise MeilisearchTimeoutError("Latency budget exceeded") from e
+
+
+@functools.cache
+def _get_hedge_executor():
+    return futures.ThreadPoolExecutor(
+        max_workers=settings.MEILISEARCH_POOL_MAXSIZE,
+        thread_name_prefix="meilisearch-hedge",
+    )
+
+
+@functools.cache
+def get_breaker():
+    """
+    Return the circuit breaker shared by every Meilisearch call of the process.
+    """
+    return CircuitBreaker(
+        "meilisearch",
+        failure_threshold=settings.MEILISEARCH_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout=settings.MEILISEARCH_BREAKER_RESET_TIMEOUT,
+    )
+
+
+def get_read_policy():
+    return ReadPolicy(
+        settings.MEILISEARCH_READ_BUDGET,
+        retries=settings.MEILISEARCH_READ_RETRIES,
+        hedge_delay=settings.MEILISEARCH_HEDGE_DELAY,
+    )
+
+
+def _reset_after_fork():
+    # Locks and pool threads are not inherited in a usable state
+    get_breaker.cache_clear()
+    _get_hedge_executor.cache_clear()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
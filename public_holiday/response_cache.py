@@ -0,0 +1,107 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    On-disk cache of HTTP response bodies, keyed by URL.
+
+    Every entry is a JSON file holding the body along with its ETag and
+    Last-Modified validators, so stale entries can be revalidated with a
+    conditional request. Once the directory grows past max_size bytes the
+    least recently used entries are evicted.
+    """
+
+    def __init__(self, directory, ttl, max_size):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+
+    def path(self, url):
+        return self.directory / f"{hashlib.sha256(url.encode()).hexdigest()}.json"
+
+    def get(self, url):
+        """
+        Cached entry of url, None when missing or unreadable.
+        """
+        path = self.path(url)
+        try:
+            entry = json.loads(path.read_text())
+            # Modification times track the last use, for eviction
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            logger.warning("Unable to read cached response of %s", url, exc_info=True)
+            return None
+        return entry
+
+    def is_fresh(self, entry):
+        return time.time() - entry["fetched_at"] < self.ttl
+
+    def set(self, url, body, etag=None, last_modified=None):
+        entry = {
+            "url": url,
+            "body": body,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time(),
+        }
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Readers never see a partially written entry
+            with tempfile.NamedTemporaryFile(
+                "w", dir=self.directory, suffix=".tmp", delete=False
+            ) as file:
+                json.dump(entry, file)
+            os.replace(file.name, self.path(url))
+        except OSError:
+            logger.warning("Unable to cache response of %s", url, exc_info=True)
+            return entry
+        self.evict()
+        return entry
+
+    def touch(self, entry):
+        """
+        Mark a revalidated entry as fresh again.
+        """
+        return self.set(
+            entry["url"], entry["body"], entry["etag"], entry["last_modified"]
+        )
+
+    def evict(self):
+        with self._lock:
+            entries = []
+            for path in self.directory.glob("*.json"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+            size = sum(entry_size for _, entry_size, _ in entries)
+            for _, entry_size, path in sorted(entries):
+                if size <= self.max_size:
+                    break
+                path.unlink(missing_ok=True)
+                size -= entry_size
+
+    @staticmethod
+    def conditional_headers(entry):
+        """
+        Headers revalidating a cached entry.
+        """
+        headers = {}
+        if entry and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
@@ -0,0 +1,262 @@
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import redis
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from .indexes import INDEX_NAME, get_generation
+
+logger = logging.getLogger(__name__)
+
+# How long a worker trusts its last read of the index generation, this bounds
+# how stale results can be after a reindex
+GENERATION_REFRESH_INTERVAL = 1.0
+
+
+class _Flight:
+    """
+    Upstream search in progress, shared by concurrent identical misses.
+    """
+
+    def __init__(self, event_class=threading.Event):
+        self.done = event_class()
+        self.result = None
+        self.error = None
+
+
+class SearchCache:
+    """
+    Two-tier cache of Meilisearch search responses.
+
+    Responses are looked up in a per-process LRU first, then in the shared
+    Django cache (Redis). Keys embed the index generation, bumped by every
+    indexing run, so stale entries are never served and simply expire.
+    Concurrent misses of the same key in a process share one upstream call.
+    """
+
+    def __init__(self, maxsize, local_ttl, ttl, index_name=INDEX_NAME):
+        self.maxsize = maxsize
+        self.local_ttl = local_ttl
+        self.ttl = ttl
+        self.index_name = index_name
+        self._lock = threading.Lock()
+        self._local = OrderedDict()
+        self._flights = {}
+        # Flights of the asynchronous path, only touched from the event loop
+        self._async_flights = {}
+        self._generation = (0, None)
+
+    def generation(self):
+        expires_at, generation = self._generation
+        now = time.monotonic()
+        if now >= expires_at:
+            try:
+                generation = get_generation(self.index_name)
+            except redis.RedisError:
+                logger.warning("Unable to read index generation", exc_info=True)
+            self._generation = (now + GENERATION_REFRESH_INTERVAL, generation)
+        return generation
+
+    async def ageneration(self):
+        expires_at, generation = self._generation
+        now = time.monotonic()
+        if now >= expires_at:
+            try:
+                generation = await _run_sync(get_generation)(self.index_name)
+            except redis.RedisError:
+                logger.warning("Unable to read index generation", exc_info=True)
+            self._generation = (now + GENERATION_REFRESH_INTERVAL, generation)
+        return generation
+
+    def key(self, query, params, generation=None, variant=None):
+        if generation is None:
+            generation = self.generation()
+        parts = [self.index_name, generation, query, params]
+        if variant is not None:
+            parts.append(variant)
+        payload = json.dumps(
+            parts,
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return f"meilisearch:search:{hashlib.sha256(payload.encode()).hexdigest()}"
+
+    def get_or_search(self, query, params, search, variant=None):
+        """
+        Return the cached response of search(query, params), calling it on miss.
+
+        Responses of searches post-processing Meilisearch responses differently
+        are told apart by variant.
+        """
+        key = self.key(query, params, variant=variant)
+        response = self._get_local(key)
+        if response is not None:
+            return response
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            response = self._get_shared(key)
+            if response is None:
+                response = search(query, params)
+                self._set_shared(key, response)
+            self._set_local(key, response)
+            flight.result = response
+            return response
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def get_many_or_search(self, queries, multi_search):
+        """
+        Cached responses of a list of (query, params), in order.
+
+        Queries missing from both tiers are sent together in a single
+        multi_search(queries) call, which returns their responses in order.
+        """
+        keys = [self.key(query, params) for query, params in queries]
+        responses = [self._get_local(key) for key in keys]
+        missing = [key for key, response in zip(keys, responses) if response is None]
+        shared = self._get_many_shared(missing) if missing else {}
+        misses = [
+            i
+            for i, (key, response) in enumerate(zip(keys, responses))
+            if response is None and key not in shared
+        ]
+        if misses:
+            searched = multi_search([queries[i] for i in misses])
+            fetched = {keys[i]: response for i, response in zip(misses, searched)}
+            self._set_many_shared(fetched)
+            shared.update(fetched)
+        for i, key in enumerate(keys):
+            if responses[i] is None:
+                responses[i] = shared[key]
+                self._set_local(key, responses[i])
+        return responses
+
+    async def aget_or_search(self, query, params, search):
+        """
+        Asynchronous get_or_search, search is a coroutine function.
+
+        Concurrent misses of the same key on the event loop share one upstream
+        call, cache reads and writes run in a thread so the loop never blocks.
+        """
+        key = self.key(query, params, generation=await self.ageneration())
+        response = self._get_local(key)
+        if response is not None:
+            return response
+
+        flight = self._async_flights.get(key)
+        if flight is not None:
+            await flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        flight = self._async_flights[key] = _Flight(asyncio.Event)
+        try:
+            response = await _run_sync(self._get_shared)(key)
+            if response is None:
+                response = await search(query, params)
+                await _run_sync(self._set_shared)(key, response)
+            self._set_local(key, response)
+            flight.result = response
+            return response
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            del self._async_flights[key]
+            flight.done.set()
+
+    def clear(self):
+        """
+        Drop the local tier and force a fresh read of the index generation.
+        """
+        with self._lock:
+            self._local.clear()
+            self._generation = (0, None)
+
+    def _get_local(self, key):
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            expires_at, response = entry
+            if time.monotonic() >= expires_at:
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return response
+
+    def _set_local(self, key, response):
+        with self._lock:
+            self._local[key] = (time.monotonic() + self.local_ttl, response)
+            self._local.move_to_end(key)
+            while len(self._local) > self.maxsize:
+                self._local.popitem(last=False)
+
+    def _get_shared(self, key):
+        try:
+            return cache.get(key)
+        except redis.RedisError:
+            logger.warning("Unable to read cached search response", exc_info=True)
+            return None
+
+    def _set_shared(self, key, response):
+        try:
+            cache.set(key, response, timeout=self.ttl)
+        except redis.RedisError:
+            logger.warning("Unable to cache search response", exc_info=True)
+
+    def _get_many_shared(self, keys):
+        try:
+            return cache.get_many(keys)
+        except redis.RedisError:
+            logger.warning("Unable to read cached search responses", exc_info=True)
+            return {}
+
+    def _set_many_shared(self, responses):
+        try:
+            cache.set_many(responses, timeout=self.ttl)
+        except redis.RedisError:
+            logger.warning("Unable to cache search responses", exc_info=True)
+
+
+def _run_sync(func):
+    # Cache calls are independent of the request thread, do not serialize them
+    # on the single thread used by thread sensitive calls
+    return sync_to_async(func, thread_sensitive=False)
+
+
+@functools.cache
+def get_search_cache():
+    """
+    Return the process-wide search cache configured from settings.
+    """
+    return SearchCache(
+        maxsize=settings.SEARCH_CACHE_LOCAL_MAXSIZE,
+        local_ttl=settings.SEARCH_CACHE_LOCAL_TTL,
+        ttl=settings.SEARCH_CACHE_TTL,
+    )
@@ -1,8 +1,98 @@
-from rest_framework import serializers
+import datetime
+
+from django.conf import settings
+from django_countries import countries
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
 from .models import PublicHoliday
 
+# Attributes whose distribution can be requested along with search results
+SEARCH_FACETS = ("country", "year")
+
 
 class PublicholidaySerializer(serializers.ModelSerializer):
     class Meta:
         model = PublicHoliday
-        fields = "__all__"
+        exclude = ("updated_at", "search_vector")
+
+
+class ValuesSerializer:
+    """
+    Read-only fast path of a ModelSerializer.
+
+    Maps values_list rows of the serializer fields to the same representation
+    with converters precomputed per field, without instantiating models nor
+    running the serializer machinery for every field of every row.
+    """
+
+    def __init__(self, serializer_class):
+        fields = serializer_class().fields
+        self.fields = tuple(fields)
+        self.converters = tuple(_converter(field) for field in fields.values())
+
+    def to_representation(self, row):
+        return {
+            name: value if convert is None else convert(value)
+            for name, convert, value in zip(self.fields, self.converters, row)
+        }
+
+    def serialize(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+
+def _converter(field):
+    """
+    Converter of database values to the representation of field, None when
+    database values are represented as they are.
+    """
+    if isinstance(field, serializers.DateField):
+        output_format = getattr(field, "format", api_settings.DATE_FORMAT)
+        if str(output_format).lower() == ISO_8601:
+            return datetime.date.isoformat
+        return field.to_representation
+    # Model integer and char columns are already fetched as int and str
+    if isinstance(field, (serializers.IntegerField, serializers.CharField)):
+        return None
+    return field.to_representation
+
+
+publicholiday_values = ValuesSerializer(PublicholidaySerializer)
+
+
+class SearchFilterSerializer(serializers.Serializer):
+    """
+    Filter and facet parameters of a search request.
+    """
+
+    country = serializers.ListField(
+        child=serializers.ChoiceField(choices=[code for code, _ in countries]),
+        required=False,
+    )
+    year = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=9999), required=False
+    )
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    facets = serializers.ListField(
+        child=serializers.ChoiceField(choices=SEARCH_FACETS), required=False
+    )
+
+    def validate(self, data):
+        if data.get("date_from") and data.get("date_to"):
+            if data["date_from"] > data["date_to"]:
+                raise serializers.ValidationError(
+                    {"date_to": "date_to must not be before date_from."}
+                )
+        return data
+
+
+class MultiSearchSerializer(serializers.Serializer):
+    """
+    Multi-search request, every query accepts the search action parameters.
+    """
+
+    queries = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=settings.SEARCH_MAX_MULTI_QUERIES,
+    )
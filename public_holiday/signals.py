@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent by PublicHolidayQuerySet.bulk_create with the created objects,
+# which bypasses post_save
+post_bulk_create = Signal()
@@ -1,17 +1,37 @@
+import calendar
 import factory
+import itertools
 import json
 import random
 
+import redis
 import requests
 
 from django_countries import countries
 
+from public_holiday.serializers import PublicholidaySerializer
+
 
 def _get_random_country():
     (country_code, _) = random.choice(list(countries))
     return country_code
 
 
+# Expected Meilisearch documents of models, serializer fields
+# plus the numeric attributes used by search filters
+def documents_of(models):
+    return [
+        {
+            **data,
+            "year": model.date.year,
+            "timestamp": calendar.timegm(model.date.timetuple()),
+        }
+        for model, data in zip(
+            models, PublicholidaySerializer(models, many=True).data
+        )
+    ]
+
+
 # This create anonymous objects with properties passed as arguments
 def Object(**kwargs):
     return type("Object", (), kwargs)
@@ -45,3 +65,53 @@ class PublicHolidayFactory(factory.django.DjangoModelFactory):
 
     class Meta:
         model = "public_holiday.PublicHoliday"
+
+
+def mock_task_queue(client, status="succeeded", error=None):
+    """
+    Make a mocked MeiliSearch client enqueue a task for each document batch
+    and report every polled task with the given status.
+    """
+    task_uids = itertools.count(1)
+    client.index.return_value.add_documents.side_effect = lambda *args: Object(
+        task_uid=next(task_uids)
+    )
+    client.get_tasks.side_effect = lambda parameters: Object(
+        results=[
+            Object(uid=uid, status=status, error=error)
+            for uid in parameters["uids"]
+        ]
+    )
+    return client
+
+
+class FakeRedis:
+    """
+    In-memory stand-in for the subset of Redis set commands used by the outbox.
+    """
+
+    def __init__(self):
+        self.data = {}
+
+    def sadd(self, key, *members):
+        members = {str(member).encode() for member in members}
+        added = members - self.data.get(key, set())
+        self.data.setdefault(key, set()).update(members)
+        return len(added)
+
+    def smembers(self, key):
+        return set(self.data.get(key, set()))
+
+    def scard(self, key):
+        return len(self.data.get(key, set()))
+
+    def exists(self, key):
+        return int(key in self.data)
+
+    def rename(self, key, new_key):
+        if key not in self.data:
+            raise redis.ResponseError("no such key")
+        self.data[new_key] = self.data.pop(key)
+
+    def delete(self, key):
+        return int(self.data.pop(key, None) is not None)
@@ -0,0 +1,93 @@
+import pytest
+
+from benchmarks.stub_meilisearch import StubMeilisearch
+from benchmarks.suite import (
+    compare,
+    environment,
+    latency_stats,
+    load_dataset,
+    run_suite,
+)
+from public_holiday.clients import PooledClient, reset_clients
+from public_holiday.models import PublicHoliday
+from public_holiday.resilience import get_breaker
+
+
+@pytest.fixture
+def stub(settings):
+    with StubMeilisearch() as stub:
+        settings.MEILISEARCH_URL = stub.url
+        reset_clients()
+        get_breaker.cache_clear()
+        yield stub
+    reset_clients()
+
+
+class TestStubMeilisearch:
+    def test_documents_and_search(self, stub):
+        client = PooledClient(stub.url)
+        index = client.index("public_holiday")
+        task = index.add_documents([{"id": 2, "name": "b"}, {"id": 1, "name": "a"}])
+        tasks = client.get_tasks({"uids": [str(task.task_uid)], "limit": 1})
+        assert [task.status for task in tasks.results] == ["succeeded"]
+
+        response = index.search("", {"limit": 1, "attributesToRetrieve": ["id"]})
+        assert response["hits"] == [{"id": 1}]
+        assert response["estimatedTotalHits"] == 2
+        results = client.multi_search([{"indexUid": "public_holiday", "q": "a"}])
+        assert results["results"][0]["hits"][1] == {"id": 2, "name": "b"}
+        assert client.health() == {"status": "available"}
+        with pytest.raises(Exception, match="Unsupported stub call"):
+            client.get_keys()
+
+
+@pytest.mark.django_db
+class TestSuite:
+    def test_load_dataset(self):
+        assert load_dataset(5) == 5
+        assert load_dataset(8) == 3
+        assert load_dataset(4) == 0
+        assert PublicHoliday.objects.count() == 8
+
+    def test_run_suite(self, stub):
+        results = run_suite([20, 10], requests=5, warmup=1, batch_size=4)
+        assert [(r["benchmark"], r["size"]) for r in results][:7] == [
+            ("populate_meilisearch_index", 10),
+            ("list", 10),
+            ("list_filtered", 10),
+            ("detail", 10),
+            ("search", 10),
+            ("search_cached", 10),
+            ("populate_meilisearch_index", 20),
+        ]
+        assert results[0]["documents"] == 10
+        assert len(stub.documents) == 20
+        for result in results[1:6]:
+            assert result["requests"] == 5
+            assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+        assert environment()["database"] in ("sqlite", "postgresql")
+
+
+def test_latency_stats():
+    stats = latency_stats([0.001 * n for n in range(1, 101)], seconds=2)
+    assert stats["requests_per_second"] == 50
+    assert (stats["p50_ms"], stats["p95_ms"], stats["p99_ms"]) == (
+        pytest.approx(50.5),
+        pytest.approx(95.05),
+        pytest.approx(99.01),
+    )
+
+
+def test_compare():
+    baseline = [
+        {"benchmark": "list", "size": 10, "requests_per_second": 100, "p95_ms": 2},
+        {"benchmark": "gone", "size": 10, "requests_per_second": 100},
+    ]
+    results = [
+        {"benchmark": "list", "size": 10, "requests_per_second": 150, "p95_ms": 4},
+        {"benchmark": "new", "size": 10, "requests_per_second": 100},
+    ]
+    lines = compare(results, baseline)
+    assert len(lines) == 2
+    assert lines[0].endswith("+50.0%")
+    assert lines[1].endswith("-100.0%")
@@ -0,0 +1,280 @@
+import asyncio
+import json
+from unittest import mock
+
+import httpx
+import pytest
+import requests
+from django.conf import settings
+from meilisearch.config import Config
+from meilisearch.errors import (
+    MeilisearchApiError,
+    MeilisearchCommunicationError,
+    MeilisearchTimeoutError,
+)
+
+from public_holiday import clients
+from public_holiday.clients import (
+    AsyncClient,
+    PooledHttpRequests,
+    get_async_client,
+    get_client,
+    reset_clients,
+)
+from public_holiday.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ReadPolicy,
+    get_breaker,
+)
+
+
+def pooled_http(session, **kwargs):
+    config = Config("http://meilisearch:7700", timeout=(1.0, 5.0))
+    return PooledHttpRequests(config, session, **kwargs)
+
+
+def mock_session():
+    session = mock.MagicMock()
+    for method in ("get", "post", "patch", "put", "delete"):
+        getattr(session, method).__name__ = method
+        getattr(session, method).return_value.content = b"{}"
+        getattr(session, method).return_value.json.return_value = {}
+    return session
+
+
+@pytest.fixture(autouse=True)
+def _clean_registry():
+    reset_clients()
+    yield
+    reset_clients()
+
+
+class TestClientRegistry:
+    def test_get_client_is_shared(self):
+        client = get_client()
+        assert get_client() is client
+        assert client.config.url == settings.MEILISEARCH_URL
+        assert client.config.api_key == settings.MEILISEARCH_API_KEY
+        assert client.config.timeout == (
+            settings.MEILISEARCH_CONNECT_TIMEOUT,
+            settings.MEILISEARCH_READ_TIMEOUT,
+        )
+
+    def test_session_pool_size(self):
+        adapter = get_client().session.get_adapter(settings.MEILISEARCH_URL)
+        assert adapter._pool_connections == settings.MEILISEARCH_POOL_CONNECTIONS
+        assert adapter._pool_maxsize == settings.MEILISEARCH_POOL_MAXSIZE
+
+    def test_index_uses_pooled_session(self):
+        client = get_client()
+        index = client.index("public_holiday")
+        assert isinstance(index.http, PooledHttpRequests)
+        assert index.http.session is client.session
+        assert index.task_handler.http.session is client.session
+        assert client.task_handler.http.session is client.session
+
+    def test_client_rebuilt_in_forked_process(self):
+        client = get_client()
+        with mock.patch("public_holiday.clients.os.getpid", return_value=-1):
+            forked_client = get_client()
+        assert forked_client is not client
+        assert clients._pid == -1
+
+    def test_reset_after_fork(self):
+        client = get_client()
+        clients._reset_after_fork()
+        assert get_client() is not client
+
+    def test_client_resilience(self):
+        client = get_client()
+        index = client.index("public_holiday")
+        for http in (client.http, client.task_handler.http, index.http):
+            assert http.breaker is get_breaker()
+            assert http.read_policy.budget == settings.MEILISEARCH_READ_BUDGET
+            assert http.read_policy.retries == settings.MEILISEARCH_READ_RETRIES
+
+    def test_reset_clients_closes_session(self):
+        client = get_client()
+        with mock.patch.object(client.session, "close") as close:
+            reset_clients()
+        close.assert_called_once()
+        assert get_client() is not client
+
+
+class TestPooledHttpRequests:
+    @pytest.mark.parametrize("method", ["get", "post", "patch", "put", "delete"])
+    def test_requests_go_through_session(self, method):
+        session = mock.MagicMock()
+        getattr(session, method).__name__ = method
+        getattr(session, method).return_value.content = b""
+        http = PooledHttpRequests(get_client().config, session)
+        getattr(http, method)("health")
+        args, kwargs = getattr(session, method).call_args
+        assert args[0] == f"{settings.MEILISEARCH_URL}/health"
+        assert kwargs["timeout"] == get_client().config.timeout
+
+    @pytest.mark.parametrize(
+        "method, path",
+        [
+            ("get", "tasks/1"),
+            ("post", "indexes/public_holiday/search"),
+            ("post", "multi-search"),
+            ("post", "indexes/public_holiday/documents/fetch"),
+        ],
+    )
+    def test_reads_follow_read_policy(self, method, path):
+        session = mock_session()
+        getattr(session, method).side_effect = [
+            requests.exceptions.ConnectionError("Connection refused"),
+            getattr(session, method).return_value,
+        ]
+        http = pooled_http(session, read_policy=ReadPolicy(budget=0.5, retries=1))
+        assert getattr(http, method)(path) == {}
+        timeouts = [
+            call.kwargs["timeout"] for call in getattr(session, method).call_args_list
+        ]
+        assert len(timeouts) == 2
+        for connect, read in timeouts:
+            assert 0 < connect <= 0.5 and connect == read
+
+    def test_read_timeouts(self):
+        http = pooled_http(mock_session())
+        assert http._read_timeout(2.0) == (1.0, 2.0)
+        assert http._read_timeout(0.5) == (0.5, 0.5)
+        assert http._read_timeout(-1) == (0.001, 0.001)
+        http.config.timeout = 3.0
+        assert http._read_timeout(2.0) == (2.0, 2.0)
+        http.config.timeout = None
+        assert http._read_timeout(2.0) == 2.0
+
+    def test_writes_are_not_retried(self):
+        session = mock_session()
+        session.post.side_effect = requests.exceptions.Timeout("Read timed out")
+        http = pooled_http(session, read_policy=ReadPolicy(budget=0.5, retries=3))
+        with pytest.raises(MeilisearchTimeoutError):
+            http.post("indexes/public_holiday/documents", [{"id": 1}])
+        session.post.assert_called_once()
+        assert session.post.call_args.kwargs["timeout"] == (1.0, 5.0)
+
+    def test_circuit_breaker(self):
+        session = mock_session()
+        session.get.side_effect = requests.exceptions.ConnectionError("refused")
+        breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=30)
+        http = pooled_http(session, breaker=breaker)
+        for _ in range(2):
+            with pytest.raises(MeilisearchCommunicationError):
+                http.get("health")
+        with pytest.raises(CircuitOpenError):
+            http.delete("indexes/public_holiday")
+        assert session.get.call_count == 2
+        session.delete.assert_not_called()
+        assert breaker.snapshot()["state"] == "open"
+
+
+class TestAsyncClient:
+    def test_get_async_client_per_loop(self):
+        async def _get_clients():
+            return get_async_client(), get_async_client()
+
+        first, second = asyncio.run(_get_clients())
+        assert first is second
+        assert first.http.base_url == settings.MEILISEARCH_URL
+        assert first.http.headers["Authorization"] == (
+            f"Bearer {settings.MEILISEARCH_API_KEY}"
+        )
+        assert first.http.timeout == httpx.Timeout(
+            settings.MEILISEARCH_READ_TIMEOUT,
+            connect=settings.MEILISEARCH_CONNECT_TIMEOUT,
+        )
+        assert first.breaker is get_breaker()
+        assert first.read_policy.budget == settings.MEILISEARCH_READ_BUDGET
+        # Another event loop gets its own connection pool
+        other, _ = asyncio.run(_get_clients())
+        assert other is not first
+        clients._reset_after_fork()
+        assert len(clients._async_clients) == 0
+
+    def test_search(self):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, json={"hits": [{"id": 1}]})
+
+        async def _search():
+            client = AsyncClient(
+                "http://meilisearch:7700", "key", transport=httpx.MockTransport(handler)
+            )
+            try:
+                return await client.search("public_holiday", "natale", {"limit": 5})
+            finally:
+                await client.aclose()
+
+        assert asyncio.run(_search()) == {"hits": [{"id": 1}]}
+        assert requests[0].method == "POST"
+        assert requests[0].url == "http://meilisearch:7700/indexes/public_holiday/search"
+        assert requests[0].headers["Authorization"] == "Bearer key"
+        assert json.loads(requests[0].content) == {"limit": 5, "q": "natale"}
+
+    def test_search_errors(self):
+        def handler(request):
+            if request.url.path.startswith("/indexes/missing"):
+                return httpx.Response(
+                    404, json={"message": "Index not found", "code": "index_not_found"}
+                )
+            raise httpx.ConnectError("Connection refused")
+
+        async def _search(index_uid):
+            client = AsyncClient(
+                "http://meilisearch:7700", transport=httpx.MockTransport(handler)
+            )
+            async with client.http:
+                return await client.search(index_uid, "")
+
+        with pytest.raises(MeilisearchApiError) as error:
+            asyncio.run(_search("missing"))
+        assert error.value.code == "index_not_found"
+        with pytest.raises(MeilisearchCommunicationError):
+            asyncio.run(_search("public_holiday"))
+
+    def test_search_resilience(self):
+        sent = []
+        responses = [
+            httpx.ReadTimeout("Read timed out"),
+            httpx.Response(503, json={"message": "Service Unavailable"}),
+            httpx.Response(200, json={"hits": []}),
+            httpx.ReadTimeout("Read timed out"),
+        ]
+
+        def handler(request):
+            sent.append(request)
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+
+        async def _search(read_policy):
+            client = AsyncClient(
+                "http://meilisearch:7700",
+                timeout=httpx.Timeout(5.0, connect=1.0),
+                transport=httpx.MockTransport(handler),
+                breaker=breaker,
+                read_policy=read_policy,
+            )
+            async with client.http:
+                return await client.search("public_holiday", "")
+
+        assert asyncio.run(_search(ReadPolicy(budget=0.5, retries=2))) == {"hits": []}
+        timeouts = [request.extensions["timeout"] for request in sent]
+        assert len(timeouts) == 3
+        for timeout in timeouts:
+            assert 0 < timeout["connect"] <= timeout["read"] <= 0.5
+
+        with pytest.raises(MeilisearchTimeoutError):
+            asyncio.run(_search(ReadPolicy(budget=0.5)))
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(CircuitOpenError):
+            asyncio.run(_search(None))
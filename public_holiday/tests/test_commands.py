@@ -1,12 +1,25 @@
+import datetime
+import json
+import os
 import pytest
+import requests
 
 from io import StringIO
 
+from django.core.cache import cache
 from django.core.management import call_command
-from django.conf import settings
-from public_holiday.tests.factories import MockResponse
-from public_holiday.models import PublicHoliday
-from public_holiday.serializers import PublicholidaySerializer
+from django.core.management.base import CommandError
+from django.db import connection
+from django.utils import timezone
+from prometheus_client import REGISTRY
+from public_holiday.tests.factories import (
+    MockResponse,
+    Object,
+    documents_of,
+    mock_task_queue,
+)
+from public_holiday.indexes import IndexSyncError, get_watermark, set_watermark
+from public_holiday.models import DeletedPublicHoliday, PublicHoliday
 from public_holiday.tests.factories import PublicHolidayFactory
 from meilisearch.errors import MeilisearchApiError, MeilisearchCommunicationError
 from unittest import mock
@@ -27,55 +40,70 @@ def _call_command(command="populate_models", get_err=False, *args, **kwargs):
 
 @pytest.mark.django_db
 class TestPopulateModelsCommand:
-    @mock.patch("requests.get")
+    @pytest.fixture(autouse=True)
+    def _response_cache(self, settings, tmp_path):
+        settings.PUBLIC_HOLIDAY_API_CACHE_DIR = str(tmp_path)
+
+    @pytest.fixture(autouse=True)
+    def _no_backoff(self):
+        with mock.patch("public_holiday.holiday_api.time.sleep") as sleep:
+            yield sleep
+
+    @mock.patch("requests.Session.get")
     @mock.patch("random.choice")
     def test_populate_commands_success(self, fake_choice, fake_get):
         data = open("public_holiday/tests/fixtures.json").read()
         fake_get.side_effect = [MockResponse(str(data), 200)]
         fake_choice.return_value = ("PA", "Panama")
-        result = _call_command()
+        result = _call_command(years=[2023])
         assert (
-            "Successfully populate data for country Panama, 13 record processed\n"
+            "Successfully populate data for country Panama in 2023, "
+            + "13 record processed\n"
             == result
         )
         ph_set = PublicHoliday.objects.all()
         assert len(ph_set) == 13
         for ph in ph_set:
             assert ph.country == "PA"
+        assert fake_get.call_args.args[0].endswith("/publicholidays/2023/PA")
 
-    @mock.patch("requests.get")
+    @mock.patch("requests.Session.get")
     def test_populate_commands_exception(self, fake_get):
-        fake_get.side_effect = Exception("Network Error")
-        with pytest.raises(Exception) as e_info:
-            _call_command()
-        assert (
-            str(e_info.value)
-            == "Error while fetching Public Holiday API [Network Error]"
+        fake_get.side_effect = requests.ConnectionError("Network Error")
+        with pytest.raises(CommandError) as e_info:
+            _call_command(countries=["PA"], years=[2023], retries=1)
+        assert str(e_info.value) == (
+            "Error while fetching Public Holiday API for 1 of 1 countries and years"
         )
+        assert fake_get.call_count == 2
         ph_set = PublicHoliday.objects.all()
         assert len(ph_set) == 0
 
-    @mock.patch("requests.get")
-    def test_populate_commands_server_errror(self, fake_get):
-        fake_get.side_effect = [MockResponse("", 500, error="Server Error")]
-        with pytest.raises(Exception) as e_info:
-            _call_command()
-        assert (
-            str(e_info.value)
-            == "Error while fetching Public Holiday API [Server Error]"
+    @mock.patch("requests.Session.get")
+    def test_populate_commands_server_errror(self, fake_get, _no_backoff):
+        fake_get.side_effect = [MockResponse("", 500, error="Server Error")] * 4
+        err = StringIO()
+        with pytest.raises(CommandError):
+            call_command("populate_models", countries=["PA"], years=[2023], stderr=err)
+        assert err.getvalue() == (
+            "Error while fetching Public Holiday API for Panama in 2023 "
+            + "[Server Error (after 4 attempts)]\n"
         )
+        # Exponential backoff between attempts
+        assert [call.args[0] for call in _no_backoff.call_args_list] == [0.5, 1, 2]
         ph_set = PublicHoliday.objects.all()
         assert len(ph_set) == 0
 
-    @mock.patch("requests.get")
+    @mock.patch("requests.Session.get")
     @mock.patch("random.choice")
     def test_populate_commands_empty_response(self, fake_choice, fake_get):
         data = open("public_holiday/tests/fixtures.json").read()
         fake_get.side_effect = [MockResponse("[]", 204), MockResponse(str(data), 200)]
         fake_choice.return_value = ("PA", "Panama")
-        result = _call_command()
+        result = _call_command(years=[2023])
         assert (
-            "Successfully populate data for country Panama, 13 record processed\n"
+            "Successfully populate data for country Panama in 2023, "
+            + "13 record processed\n"
             == result
         )
         ph_set = PublicHoliday.objects.all()
@@ -83,36 +111,232 @@ class TestPopulateModelsCommand:
         for ph in ph_set:
             assert ph.country == "PA"
 
+    @mock.patch("requests.Session.get")
+    def test_populate_commands_countries_and_years(self, fake_get):
+        data = json.loads(open("public_holiday/tests/fixtures.json").read())
+
+        def _get(url, **kwargs):
+            _, year, country_code = url.rsplit("/", 2)
+            if country_code == "IT" and year == "2024":
+                return MockResponse("", 404, error="Not Found")
+            holidays = [
+                {**hd, "date": f"{year}{hd['date'][4:]}", "countryCode": country_code}
+                for hd in data
+            ]
+            return MockResponse(json.dumps(holidays), 200)
+
+        fake_get.side_effect = _get
+        out = StringIO()
+        err = StringIO()
+        with pytest.raises(CommandError) as e_info:
+            call_command(
+                "populate_models",
+                countries=["pa", "IT"],
+                years=[2023, 2024],
+                concurrency=4,
+                stdout=out,
+                stderr=err,
+            )
+        assert str(e_info.value) == (
+            "Error while fetching Public Holiday API for 1 of 4 countries and years"
+        )
+        # Results are reported in order, failures do not abort the run
+        assert out.getvalue().splitlines() == [
+            "Successfully populate data for country Panama in 2023, "
+            + "13 record processed",
+            "Successfully populate data for country Panama in 2024, "
+            + "13 record processed",
+            "Successfully populate data for country Italy in 2023, "
+            + "13 record processed",
+        ]
+        assert err.getvalue() == (
+            "Error while fetching Public Holiday API for Italy in 2024 [Not Found]\n"
+        )
+        assert PublicHoliday.objects.count() == 39
+        assert fake_get.call_count == 4
+
+    @mock.patch("requests.Session.get")
+    def test_populate_commands_all_countries(self, fake_get):
+        fake_get.side_effect = [
+            MockResponse('[{"countryCode": "PA", "name": "Panama"}]', 200),
+            MockResponse("[]", 200),
+        ]
+        result = _call_command(all=True, years=[2023])
+        assert result == (
+            "Successfully populate data for country Panama in 2023, "
+            + "0 record processed\n"
+        )
+        assert fake_get.call_args_list[0].args[0].endswith("/AvailableCountries")
+
+    @mock.patch("requests.Session.get")
+    def test_populate_commands_all_countries_error(self, fake_get):
+        fake_get.side_effect = [MockResponse("", 403, error="Forbidden")]
+        with pytest.raises(CommandError) as e_info:
+            _call_command(all=True)
+        assert str(e_info.value) == (
+            "Error while fetching Public Holiday API [Forbidden]"
+        )
+
+    @mock.patch("requests.Session.get")
+    def test_populate_commands_updates_renamed_holidays(self, fake_get):
+        PublicHolidayFactory(
+            name="Christmas", local_name="Natale", country="IT", date="2023-12-25"
+        )
+        fake_get.side_effect = [
+            MockResponse(
+                '[{"date": "2023-12-25", "localName": "Natale", '
+                + '"name": "Christmas Day", "countryCode": "IT"}]',
+                200,
+            )
+        ]
+        _call_command(countries=["IT"], years=[2023], batch_size=10)
+        assert PublicHoliday.objects.get().name == "Christmas Day"
+
+    @pytest.mark.skipif(
+        connection.vendor != "postgresql", reason="COPY requires PostgreSQL"
+    )
+    @mock.patch("requests.Session.get")
+    def test_populate_commands_copy(self, fake_get):
+        data = open("public_holiday/tests/fixtures.json").read()
+        fake_get.side_effect = [MockResponse(str(data), 200)]
+        result = _call_command(countries=["PA"], years=[2023], copy=True)
+        assert result.splitlines()[-1] == (
+            "Loaded 13 records with COPY, 13 inserted or updated"
+        )
+        assert PublicHoliday.objects.count() == 13
+
+    def test_populate_commands_copy_unsupported(self):
+        with mock.patch(
+            "public_holiday.management.commands.populate_models.connection"
+        ) as connection:
+            connection.vendor = "sqlite"
+            with pytest.raises(CommandError) as e_info:
+                _call_command(copy=True)
+        assert str(e_info.value) == "--copy is only supported on PostgreSQL"
+
+    @pytest.mark.parametrize("option", ["--batch-size", "--concurrency"])
+    def test_populate_commands_invalid_sizes(self, option):
+        with pytest.raises(CommandError) as e_info:
+            _call_command("populate_models", False, option, "0")
+        assert str(e_info.value) == (
+            f"Error: argument {option}: must be a positive integer: 0"
+        )
+
+    def test_populate_commands_invalid_retries(self):
+        with pytest.raises(CommandError) as e_info:
+            _call_command("populate_models", False, "--retries", "-1")
+        assert str(e_info.value) == (
+            "Error: argument --retries: must be a non-negative integer: -1"
+        )
+
+    @mock.patch("requests.Session.get")
+    def test_populate_commands_cached_responses(self, fake_get):
+        data = open("public_holiday/tests/fixtures.json").read()
+        fake_get.side_effect = [MockResponse(str(data), 200)]
+        _call_command(countries=["PA"], years=[2023])
+        PublicHoliday.objects.all().delete()
+
+        # Served from the cache without network access
+        result = _call_command(countries=["PA"], years=[2023], offline=True)
+        assert result == (
+            "Successfully populate data for country Panama in 2023, "
+            + "13 record processed\n"
+        )
+        assert PublicHoliday.objects.count() == 13
+        assert fake_get.call_count == 1
+
+        err = StringIO()
+        with pytest.raises(CommandError):
+            call_command(
+                "populate_models",
+                countries=["IT"],
+                years=[2023],
+                offline=True,
+                stderr=err,
+            )
+        assert "is not cached" in err.getvalue()
+
+    @mock.patch("requests.Session.get")
+    def test_populate_commands_no_cache(self, fake_get, settings):
+        data = open("public_holiday/tests/fixtures.json").read()
+        fake_get.side_effect = [MockResponse(str(data), 200)] * 2
+        _call_command(countries=["PA"], years=[2023], no_cache=True)
+        _call_command(countries=["PA"], years=[2023], no_cache=True)
+        assert fake_get.call_count == 2
+        assert not os.listdir(settings.PUBLIC_HOLIDAY_API_CACHE_DIR)
+
+    def test_populate_commands_unknown_country(self):
+        with pytest.raises(CommandError) as e_info:
+            _call_command(countries=["IT", "XX"])
+        assert str(e_info.value) == "Unknown country codes: XX"
+
 
 @pytest.mark.django_db
 class TestPopulateMeilisearchIndexCommand:
+    @pytest.fixture(autouse=True)
+    def _clear_cache(self):
+        cache.clear()
+        yield
+        cache.clear()
+
     @mock.patch(
-        "public_holiday.management.commands.populate_meilisearch_index.meilisearch.Client"
+        "public_holiday.management.commands.populate_meilisearch_index.get_client"
     )
     def test_command_with_public_holidays(self, mock_client):
         # Mock the MeiliSearch client and index
         mock_index = mock_client.return_value.index.return_value
         mock_index_name = "public_holiday"
+        mock_task_queue(mock_client.return_value)
 
         # Create test data using factory
         public_holidays = PublicHolidayFactory.create_batch(2)
-        documents = PublicholidaySerializer(public_holidays, many=True)
+        documents = documents_of(public_holidays)
         # Call the command to get the output
         result = _call_command("populate_meilisearch_index")
 
         # Assertions
-        mock_client.assert_called_once_with(
-            settings.MEILISEARCH_URL, settings.MEILISEARCH_API_KEY
-        )
+        mock_client.assert_called_once_with()
         mock_client.return_value.index.assert_called_once_with(mock_index_name)
-        mock_index.add_documents.assert_called_once_with(documents.data)
-        assert (
+        mock_index.add_documents.assert_called_once_with(documents)
+        # The command waits for the enqueued task before reporting success
+        mock_client.return_value.get_tasks.assert_called_once_with(
+            {"uids": ["1"], "limit": 1}
+        )
+        assert result.startswith(
             'Successfully populated "public_holiday" index with 2 documents.\n'
-            == result
+            + "Indexed 2 documents in "
+        )
+        rate = REGISTRY.get_sample_value(
+            "indexing_documents_per_second", {"index": "public_holiday"}
+        )
+        assert f"({rate:.1f} documents/s)" in result
+
+    @mock.patch(
+        "public_holiday.management.commands.populate_meilisearch_index.get_client"
+    )
+    def test_command_in_batches(self, mock_client):
+        mock_index = mock_client.return_value.index.return_value
+        mock_task_queue(mock_client.return_value)
+        public_holidays = PublicHolidayFactory.create_batch(5)
+        documents = documents_of(public_holidays)
+
+        result = _call_command(
+            "populate_meilisearch_index", batch_size=2, concurrency=2
+        )
+
+        # Batches are sent from concurrent threads, in any order
+        batches = [call.args[0] for call in mock_index.add_documents.call_args_list]
+        assert sorted(batches, key=lambda batch: batch[0]["id"]) == [
+            documents[0:2],
+            documents[2:4],
+            documents[4:5],
+        ]
+        assert result.startswith(
+            'Successfully populated "public_holiday" index with 5 documents.\n'
         )
 
     @mock.patch(
-        "public_holiday.management.commands.populate_meilisearch_index.meilisearch.Client"
+        "public_holiday.management.commands.populate_meilisearch_index.get_client"
     )
     def test_command_without_public_holidays(self, mock_client):
         # Mock the MeiliSearch client and index
@@ -123,15 +347,13 @@ class TestPopulateMeilisearchIndexCommand:
         result = _call_command("populate_meilisearch_index")
 
         # Assertions
-        mock_client.assert_called_once_with(
-            settings.MEILISEARCH_URL, settings.MEILISEARCH_API_KEY
-        )
+        mock_client.assert_called_once_with()
         mock_client.return_value.index.assert_called_once_with(mock_index_name)
         assert not mock_index.add_documents.called
         assert "No models found in your database\n" == result
 
     @mock.patch(
-        "public_holiday.management.commands.populate_meilisearch_index.meilisearch.Client"
+        "public_holiday.management.commands.populate_meilisearch_index.get_client"
     )
     def test_command_meilisearch_api_error(self, mock_client):
         # Mock the MeiliSearch client and index to raise MeilisearchApiError
@@ -148,18 +370,38 @@ class TestPopulateMeilisearchIndexCommand:
         result = _call_command("populate_meilisearch_index", get_err=True)
 
         # Assertions
-        mock_client.assert_called_once_with(
-            settings.MEILISEARCH_URL, settings.MEILISEARCH_API_KEY
-        )
+        mock_client.assert_called_once_with()
         mock_client.return_value.index.assert_called_once_with("public_holiday")
         mock_index.add_documents.assert_called_once()
-        assert (
-            result
-            == "Error connecting to MeiliSearch: MeilisearchApiError. API error\n"
+        assert result == (
+            "Batch 1 (2 documents) failed: MeilisearchApiError. API error\n"
+            + '1 of 1 batches failed on "public_holiday"\n'
+        )
+
+    @mock.patch(
+        "public_holiday.management.commands.populate_meilisearch_index.get_client"
+    )
+    def test_command_failed_task(self, mock_client):
+        mock_task_queue(
+            mock_client.return_value,
+            status="failed",
+            error={"message": "Invalid document"},
+        )
+        PublicHolidayFactory.create_batch(3)
+
+        out = StringIO()
+        err = StringIO()
+        call_command("populate_meilisearch_index", batch_size=2, stdout=out, stderr=err)
+
+        assert out.getvalue() == ""
+        assert err.getvalue() == (
+            "Batch 1 (2 documents) failed: Invalid document\n"
+            + "Batch 2 (1 documents) failed: Invalid document\n"
+            + '2 of 2 batches failed on "public_holiday"\n'
         )
 
     @mock.patch(
-        "public_holiday.management.commands.populate_meilisearch_index.meilisearch.Client"
+        "public_holiday.management.commands.populate_meilisearch_index.get_client"
     )
     def test_command_meilisearch_communication_error(self, mock_client):
         # Mock the MeiliSearch client to raise MeilisearchCommunicationError
@@ -169,12 +411,361 @@ class TestPopulateMeilisearchIndexCommand:
         result = _call_command("populate_meilisearch_index", get_err=True)
 
         # Assertions
-        mock_client.assert_called_once_with(
-            settings.MEILISEARCH_URL, settings.MEILISEARCH_API_KEY
-        )
+        mock_client.assert_called_once_with()
         assert not mock_client.return_value.index.called
         assert (
             result
             == "Error connecting to MeiliSearch: MeilisearchCommunicationError, "
             + "Communication error\n"
         )
+
+    @pytest.fixture
+    def delta_client(self):
+        # Two models are indexed, one of them was deleted meanwhile
+        old, recent = PublicHolidayFactory.create_batch(2)
+        PublicHoliday.objects.filter(pk=old.pk).update(
+            updated_at=datetime.datetime(2023, 1, 1, tzinfo=datetime.timezone.utc)
+        )
+        DeletedPublicHoliday.objects.create(holiday_id=999)
+        client = mock_task_queue(mock.MagicMock())
+        client.index.return_value.delete_documents.return_value = Object(
+            task_uid=10, index_uid="public_holiday"
+        )
+        client.wait_for_task.return_value = Object(
+            uid=10, status="succeeded", error=None
+        )
+        with mock.patch(
+            "public_holiday.management.commands.populate_meilisearch_index"
+            + ".get_client",
+            return_value=client,
+        ):
+            yield client, recent
+
+    def test_command_since(self, delta_client):
+        client, recent = delta_client
+        result = _call_command(
+            "populate_meilisearch_index", since="2023-06-01T00:00:00"
+        )
+        index = client.index.return_value
+        index.add_documents.assert_called_once_with(
+            documents_of([recent])
+        )
+        index.delete_documents.assert_called_once_with([999])
+        assert result.startswith(
+            'Deleted 1 removed documents from "public_holiday" index.\n'
+            + 'Successfully populated "public_holiday" index with 1 documents.\n'
+        )
+        assert get_watermark() is not None
+
+    def test_command_since_beyond_retention(self, delta_client):
+        client, _ = delta_client
+        expired = DeletedPublicHoliday.objects.create(holiday_id=998)
+        DeletedPublicHoliday.objects.filter(pk=expired.pk).update(
+            deleted_at=timezone.now() - datetime.timedelta(days=31)
+        )
+        result = _call_command(
+            "populate_meilisearch_index", get_err=True, since="2023-06-01T00:00:00"
+        )
+        assert result == (
+            "Deletions are only tracked for 30 days, models deleted earlier "
+            + "may still be indexed (use --shadow)\n"
+        )
+        client.index.return_value.delete_documents.assert_called_once_with([998, 999])
+        # Expired tombstones are pruned by successful runs
+        assert list(
+            DeletedPublicHoliday.objects.values_list("holiday_id", flat=True)
+        ) == [999]
+
+    def test_command_since_nothing_changed(self, delta_client):
+        client, _ = delta_client
+        result = _call_command(
+            "populate_meilisearch_index", since="2099-01-01T00:00:00+00:00"
+        )
+        assert not client.index.return_value.add_documents.called
+        assert not client.index.return_value.delete_documents.called
+        assert "No models changed since 2099-01-01T00:00:00+00:00\n" == result
+
+    def test_command_incremental(self, delta_client):
+        client, recent = delta_client
+        watermark = timezone.now() - datetime.timedelta(days=1)
+        set_watermark(watermark)
+
+        _call_command("populate_meilisearch_index", incremental=True)
+
+        client.index.return_value.add_documents.assert_called_once_with(
+            documents_of([recent])
+        )
+        client.index.return_value.delete_documents.assert_called_once_with([999])
+        assert get_watermark() > watermark
+
+    def test_command_incremental_without_watermark(self, delta_client):
+        client, _ = delta_client
+        _call_command("populate_meilisearch_index", incremental=True)
+        # Without a previous run every model is sent
+        client.index.return_value.add_documents.assert_called_once()
+        assert len(client.index.return_value.add_documents.call_args.args[0]) == 2
+        assert not client.index.return_value.delete_documents.called
+
+    def test_command_failed_run_keeps_watermark(self, delta_client):
+        client, _ = delta_client
+        watermark = timezone.now() - datetime.timedelta(days=1)
+        set_watermark(watermark)
+        client.wait_for_task.return_value = Object(
+            uid=10, status="failed", error={"message": "Internal error"}
+        )
+        result = _call_command(
+            "populate_meilisearch_index", get_err=True, incremental=True
+        )
+        assert result.startswith("Error connecting to MeiliSearch: Task 10")
+        assert get_watermark() == watermark
+
+    @pytest.fixture
+    def shadow_client(self):
+        client = mock_task_queue(mock.MagicMock())
+        client.wait_for_task.return_value = Object(
+            uid=10, status="succeeded", error=None
+        )
+        with mock.patch(
+            "public_holiday.management.commands.populate_meilisearch_index"
+            + ".get_client",
+            return_value=client,
+        ):
+            yield client
+
+    def test_command_shadow(self, shadow_client):
+        shadow_client.index.return_value.get_stats.return_value = Object(
+            number_of_documents=3
+        )
+        holidays = PublicHolidayFactory.create_batch(3)
+        PublicHoliday.objects.filter(pk__in=[h.pk for h in holidays[:2]]).update(
+            updated_at=datetime.datetime(2023, 1, 1, tzinfo=datetime.timezone.utc)
+        )
+        result = _call_command("populate_meilisearch_index", shadow=True)
+
+        shadow_client.create_index.assert_any_call(
+            "public_holiday_shadow", {"primaryKey": "id"}
+        )
+        # Every document is sent to the shadow index, then the recent changes
+        # the outbox sent to the replaced index are replayed
+        assert [call.args for call in shadow_client.index.call_args_list][:2] == [
+            ("public_holiday_shadow",),
+            ("public_holiday_shadow",),
+        ]
+        assert shadow_client.index.return_value.add_documents.call_args_list[
+            -1
+        ].args == (documents_of([holidays[2]]),)
+        shadow_client.swap_indexes.assert_called_once_with(
+            [{"indexes": ["public_holiday", "public_holiday_shadow"]}]
+        )
+        assert result.startswith(
+            'Swapped "public_holiday_shadow" index with "public_holiday".\n'
+            + "Replayed 1 changed and 0 deleted models since the rebuild started.\n"
+            + 'Successfully populated "public_holiday" index with 3 documents.\n'
+        )
+
+    def test_command_shadow_replays_deletions(self, shadow_client):
+        shadow_client.index.return_value.get_stats.return_value = Object(
+            number_of_documents=1
+        )
+        PublicHolidayFactory()
+        DeletedPublicHoliday.objects.create(holiday_id=999)
+        _call_command("populate_meilisearch_index", shadow=True)
+        shadow_client.index.return_value.delete_documents.assert_called_once_with(
+            [999]
+        )
+
+        shadow_client.index.return_value.delete_documents.side_effect = (
+            MeilisearchCommunicationError("Communication error")
+        )
+        result = _call_command("populate_meilisearch_index", get_err=True, shadow=True)
+        assert result == (
+            "Error connecting to MeiliSearch: MeilisearchCommunicationError, "
+            + "Communication error\n"
+        )
+
+    def test_command_shadow_replay_errors(self, shadow_client):
+        shadow_client.index.return_value.get_stats.return_value = Object(
+            number_of_documents=1
+        )
+        PublicHolidayFactory()
+        add_documents = shadow_client.index.return_value.add_documents
+        tasks = iter([Object(task_uid=1)])
+
+        def _add_documents(batch):
+            # The shadow index is populated, replayed changes fail
+            try:
+                return next(tasks)
+            except StopIteration:
+                raise MeilisearchCommunicationError("Communication error")
+
+        add_documents.side_effect = _add_documents
+        result = _call_command("populate_meilisearch_index", get_err=True, shadow=True)
+        assert result == (
+            "1 of 1 batches of changes made during the rebuild failed "
+            + 'on "public_holiday"\n'
+        )
+        assert get_watermark() is None
+
+        # Populating the shadow index fails
+        mock_task_queue(shadow_client)
+        shadow_client.delete_index.reset_mock()
+        shadow_client.get_tasks.side_effect = MeilisearchCommunicationError(
+            "Communication error"
+        )
+        result = _call_command("populate_meilisearch_index", get_err=True, shadow=True)
+        assert result == (
+            "Error connecting to MeiliSearch: MeilisearchCommunicationError, "
+            + "Communication error\n"
+        )
+        # The shadow index is dropped, not left behind until the next run
+        assert shadow_client.delete_index.call_args_list[-1].args == (
+            "public_holiday_shadow",
+        )
+
+    def test_command_shadow_failed_batches(self, shadow_client):
+        mock_task_queue(shadow_client, status="failed", error={"message": "Invalid"})
+        PublicHolidayFactory()
+        shadow_client.delete_index.side_effect = [
+            Object(task_uid=10, index_uid="public_holiday_shadow"),
+            MeilisearchCommunicationError("Communication error"),
+        ]
+        result = _call_command("populate_meilisearch_index", get_err=True, shadow=True)
+        assert not shadow_client.swap_indexes.called
+        assert shadow_client.delete_index.call_count == 2
+        assert result.endswith(
+            '1 of 1 batches failed on "public_holiday_shadow"\n'
+            + 'Unable to drop "public_holiday_shadow" index: '
+            + "MeilisearchCommunicationError, Communication error\n"
+        )
+
+    def test_command_shadow_count_mismatch(self, shadow_client):
+        shadow_client.index.return_value.get_stats.return_value = Object(
+            number_of_documents=2
+        )
+        PublicHolidayFactory.create_batch(3)
+        result = _call_command("populate_meilisearch_index", get_err=True, shadow=True)
+
+        assert not shadow_client.swap_indexes.called
+        assert shadow_client.delete_index.call_args_list[-1].args == (
+            "public_holiday_shadow",
+        )
+        assert result == (
+            '"public_holiday_shadow" index holds 2 documents instead of 3, '
+            + '"public_holiday" was not replaced\n'
+        )
+        assert get_watermark() is None
+
+    def test_command_shadow_swap_error(self, shadow_client):
+        shadow_client.index.return_value.get_stats.return_value = Object(
+            number_of_documents=1
+        )
+        shadow_client.swap_indexes.side_effect = MeilisearchCommunicationError(
+            "Communication error"
+        )
+        PublicHolidayFactory()
+        result = _call_command("populate_meilisearch_index", get_err=True, shadow=True)
+        assert result == (
+            "Error connecting to MeiliSearch: MeilisearchCommunicationError, "
+            + "Communication error\n"
+        )
+        assert get_watermark() is None
+
+    def test_command_invalid_since(self):
+        with pytest.raises(CommandError) as e_info:
+            _call_command("populate_meilisearch_index", since="yesterday")
+        assert str(e_info.value) == "Invalid --since datetime: yesterday"
+
+    @pytest.mark.parametrize(
+        "option", ["--batch-size", "--concurrency", "--max-in-flight"]
+    )
+    def test_command_invalid_sizes(self, option):
+        with pytest.raises(CommandError) as e_info:
+            _call_command("populate_meilisearch_index", False, option, "0")
+        assert str(e_info.value) == (
+            f"Error: argument {option}: must be a positive integer: 0"
+        )
+
+
+@pytest.mark.django_db
+class TestSyncMeilisearchSettingsCommand:
+    @mock.patch(
+        "public_holiday.management.commands.sync_meilisearch_settings"
+        + ".sync_index_settings"
+    )
+    @mock.patch(
+        "public_holiday.management.commands.sync_meilisearch_settings.get_client"
+    )
+    def test_command_updates_settings(self, mock_get_client, mock_sync):
+        mock_sync.return_value = True
+        result = _call_command("sync_meilisearch_settings")
+        mock_sync.assert_called_once_with(mock_get_client.return_value, force=False)
+        assert 'Successfully updated "public_holiday" settings\n' == result
+
+    @mock.patch(
+        "public_holiday.management.commands.sync_meilisearch_settings"
+        + ".sync_index_settings"
+    )
+    @mock.patch(
+        "public_holiday.management.commands.sync_meilisearch_settings.get_client"
+    )
+    def test_command_settings_up_to_date(self, mock_get_client, mock_sync):
+        mock_sync.return_value = False
+        result = _call_command("sync_meilisearch_settings", force=True)
+        mock_sync.assert_called_once_with(mock_get_client.return_value, force=True)
+        assert '"public_holiday" settings are already up to date\n' == result
+
+    @mock.patch(
+        "public_holiday.management.commands.sync_meilisearch_settings"
+        + ".sync_index_settings"
+    )
+    @mock.patch(
+        "public_holiday.management.commands.sync_meilisearch_settings.get_client"
+    )
+    def test_command_error(self, mock_get_client, mock_sync):
+        mock_sync.side_effect = MeilisearchCommunicationError("Communication error")
+        result = _call_command("sync_meilisearch_settings", get_err=True)
+        assert (
+            result
+            == "Error syncing MeiliSearch settings: MeilisearchCommunicationError, "
+            + "Communication error\n"
+        )
+
+
+@pytest.mark.django_db
+class TestFlushMeilisearchOutboxCommand:
+    @mock.patch("public_holiday.management.commands.flush_meilisearch_outbox.get_client")
+    @mock.patch("public_holiday.management.commands.flush_meilisearch_outbox.get_outbox")
+    def test_command_once(self, mock_get_outbox, mock_get_client):
+        mock_outbox = mock_get_outbox.return_value
+        mock_outbox.flush.return_value = (3, 1)
+        result = _call_command("flush_meilisearch_outbox", once=True, batch_size=10)
+        mock_outbox.flush.assert_called_once_with(mock_get_client.return_value, 10)
+        assert (
+            "Successfully flushed outbox, 3 documents upserted and 1 deleted.\n"
+            == result
+        )
+
+    def test_command_invalid_batch_size(self):
+        with pytest.raises(CommandError) as e_info:
+            _call_command("flush_meilisearch_outbox", False, "--batch-size", "-1")
+        assert str(e_info.value) == (
+            "Error: argument --batch-size: must be a positive integer: -1"
+        )
+
+    @mock.patch("public_holiday.management.commands.flush_meilisearch_outbox.get_client")
+    @mock.patch("public_holiday.management.commands.flush_meilisearch_outbox.get_outbox")
+    @mock.patch("public_holiday.management.commands.flush_meilisearch_outbox.time")
+    def test_command_loop(self, mock_time, mock_get_outbox, mock_get_client):
+        mock_outbox = mock_get_outbox.return_value
+        mock_outbox.flush.side_effect = [(0, 0), IndexSyncError("Task failed")]
+        mock_time.sleep.side_effect = [None, KeyboardInterrupt]
+        out = StringIO()
+        err = StringIO()
+        with pytest.raises(KeyboardInterrupt):
+            call_command(
+                "flush_meilisearch_outbox", interval=0.5, stdout=out, stderr=err
+            )
+        assert mock_outbox.flush.call_count == 2
+        mock_time.sleep.assert_called_with(0.5)
+        assert out.getvalue() == ""
+        assert err.getvalue() == "Error flushing outbox: Task failed\n"
@@ -0,0 +1,64 @@
+from unittest import mock
+
+import pytest
+import redis
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from public_holiday.conditional import get_marker, make_etag, touch_marker
+from public_holiday.models import PublicHoliday
+
+factory = APIRequestFactory()
+
+
+def request_for(path, media_type="application/json"):
+    request = Request(factory.get(path))
+    request.accepted_media_type = media_type
+    return request
+
+
+class TestMarkers:
+    def test_missing_markers_start_now(self):
+        with mock.patch("public_holiday.conditional.time.time", return_value=10.5):
+            assert get_marker("test") == 10.5
+        # Reads do not move the marker
+        assert get_marker("test") == 10.5
+        with mock.patch("public_holiday.conditional.time.time", return_value=12.0):
+            touch_marker("test")
+        assert get_marker("test") == 12.0
+
+    def test_etag(self):
+        etag = make_etag(request_for("/public_holiday/?page=2"), 10.5)
+        assert etag.startswith('"') and etag.endswith('"')
+        assert etag == make_etag(request_for("/public_holiday/?page=2"), 10.5)
+        assert etag != make_etag(request_for("/public_holiday/?page=3"), 10.5)
+        assert etag != make_etag(request_for("/public_holiday/?page=2"), 12.0)
+        assert etag != make_etag(
+            request_for("/public_holiday/?page=2", "text/csv"), 10.5
+        )
+
+
+@pytest.mark.django_db
+class TestConditionalViews:
+    def test_redis_errors_skip_validators(self, caplog):
+        with mock.patch(
+            "public_holiday.conditional.get_marker",
+            side_effect=redis.ConnectionError(),
+        ):
+            response = APIClient().get("/public_holiday/")
+        assert response.status_code == 200
+        assert "ETag" not in response
+        assert "Unable to read table:public_holiday marker" in caplog.text
+
+    def test_redis_errors_do_not_fail_writes(
+        self, caplog, django_capture_on_commit_callbacks
+    ):
+        with mock.patch("public_holiday.receivers.get_outbox"), mock.patch(
+            "public_holiday.conditional.cache.set",
+            side_effect=redis.ConnectionError(),
+        ), django_capture_on_commit_callbacks(execute=True):
+            PublicHoliday.objects.create(
+                name="Christmas", local_name="Natale", country="IT", date="2023-12-25"
+            )
+        assert PublicHoliday.objects.filter(local_name="Natale").exists()
+        assert "Unable to touch table:public_holiday marker" in caplog.text
@@ -0,0 +1,39 @@
+import datetime
+
+import pytest
+
+from public_holiday.documents import batched, iter_documents
+from public_holiday.models import PublicHoliday
+from public_holiday.serializers import PublicholidaySerializer
+from public_holiday.tests.factories import PublicHolidayFactory, documents_of
+
+
+@pytest.mark.django_db
+class TestDocuments:
+    def test_documents_match_serializer(self):
+        PublicHolidayFactory.create_batch(5)
+        holidays = PublicHoliday.objects.order_by("pk")
+        serialized = PublicholidaySerializer(holidays, many=True).data
+        documents = list(iter_documents(chunk_size=2))
+        assert documents == documents_of(holidays)
+        # Keys are emitted in the serializer order, followed by filter attributes
+        assert [list(doc) for doc in documents] == [
+            [*doc, "year", "timestamp"] for doc in serialized
+        ]
+
+    def test_filter_attributes(self):
+        PublicHolidayFactory(date=datetime.date(2023, 12, 25))
+        (document,) = iter_documents()
+        assert document["year"] == 2023
+        assert document["timestamp"] == 1703462400
+
+    def test_documents_from_queryset(self):
+        holiday, _ = PublicHolidayFactory.create_batch(2)
+        documents = list(iter_documents(PublicHoliday.objects.filter(pk=holiday.pk)))
+        assert [doc["id"] for doc in documents] == [holiday.pk]
+
+
+class TestBatched:
+    def test_batched(self):
+        assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+        assert list(batched([], 2)) == []
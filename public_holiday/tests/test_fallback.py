@@ -0,0 +1,93 @@
+import datetime
+
+import pytest
+from django.db.models import Q
+
+from public_holiday import fallback
+from public_holiday.models import PublicHoliday
+from public_holiday.tests.factories import PublicHolidayFactory
+
+
+def params(**extra):
+    return {
+        "sort": ["id:asc"],
+        "attributesToRetrieve": ["*"],
+        "offset": 0,
+        "limit": 10,
+        **extra,
+    }
+
+
+@pytest.fixture
+def holidays():
+    return [
+        PublicHolidayFactory(
+            name="Christmas Day",
+            local_name="Natale",
+            country="IT",
+            date=datetime.date(2023, 12, 25),
+        ),
+        PublicHolidayFactory(
+            name="Christmas Day",
+            local_name="Noël",
+            country="FR",
+            date=datetime.date(2022, 12, 25),
+        ),
+        PublicHolidayFactory(
+            name="Saint Stephen's Day",
+            local_name="Santo Stefano",
+            country="IT",
+            date=datetime.date(2023, 12, 26),
+        ),
+    ]
+
+
+@pytest.mark.django_db
+class TestFallbackSearch:
+    def test_search_vector_is_maintained(self, holidays):
+        christmas = holidays[0]
+        PublicHoliday.objects.filter(pk=christmas.pk).update(local_name="Natale!")
+        ids = [
+            hit["id"]
+            for hit in fallback.search("natale christmas", params())["hits"]
+        ]
+        assert ids == [christmas.id]
+
+    def test_prefix_matching(self, holidays):
+        response = fallback.search("chri d", params())
+        assert [hit["id"] for hit in response["hits"]] == [
+            holidays[0].id,
+            holidays[1].id,
+        ]
+        assert response["estimatedTotalHits"] == 2
+        assert fallback.search("santo", params())["hits"][0]["id"] == holidays[2].id
+        # Queries without words match every model
+        assert len(fallback.search("!!", params())["hits"]) == 3
+
+    def test_sort_fields_and_pages(self, holidays):
+        response = fallback.search(
+            "",
+            params(sort=["date:desc"], attributesToRetrieve=["date", "name"], limit=2),
+        )
+        assert response["hits"] == [
+            {"name": "Saint Stephen's Day", "date": "2023-12-26"},
+            {"name": "Christmas Day", "date": "2023-12-25"},
+        ]
+        assert response["offset"] == 0 and response["limit"] == 2
+
+        response = fallback.search(
+            "",
+            {
+                "sort": ["id:asc"],
+                "attributesToRetrieve": ["id"],
+                "page": 2,
+                "hitsPerPage": 2,
+            },
+        )
+        assert response["hits"] == [{"id": holidays[2].id}]
+        assert response["totalHits"] == 3 and response["totalPages"] == 2
+
+    def test_condition(self, holidays):
+        response = fallback.search("christmas", params(), Q(country="FR"))
+        assert [hit["local_name"] for hit in response["hits"]] == ["Noël"]
+
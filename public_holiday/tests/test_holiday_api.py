@@ -0,0 +1,113 @@
+from unittest import mock
+
+import pytest
+import requests
+
+from public_holiday.holiday_api import HolidayApiClient, HolidayApiError
+from public_holiday.response_cache import ResponseCache
+from public_holiday.tests.factories import MockResponse
+
+
+@pytest.fixture
+def session():
+    return mock.Mock(spec=requests.Session)
+
+
+class TestHolidayApiClient:
+    @mock.patch("public_holiday.holiday_api.time.sleep")
+    def test_retries_empty_responses(self, sleep, session):
+        session.get.return_value = MockResponse("", 200)
+        client = HolidayApiClient("http://api", retries=2, backoff=1, session=session)
+        with pytest.raises(HolidayApiError) as error:
+            client.public_holidays(2023, "IT")
+        assert str(error.value) == "No content (after 3 attempts)"
+        assert [call.args[0] for call in sleep.call_args_list] == [1, 2]
+        session.get.assert_called_with(
+            "http://api/publicholidays/2023/IT", headers={}, timeout=client.timeout
+        )
+
+    @mock.patch("public_holiday.holiday_api.time.sleep")
+    def test_retries_invalid_json(self, sleep, session):
+        session.get.side_effect = [
+            MockResponse("<html>Just a moment...</html>", 200),
+            MockResponse('[{"date": "2023-12-25"}]', 200),
+        ]
+        client = HolidayApiClient("http://api", session=session)
+        assert client.public_holidays(2023, "IT") == [{"date": "2023-12-25"}]
+
+        session.get.side_effect = None
+        session.get.return_value = MockResponse("<html></html>", 200)
+        results = list(client.fetch_many([("IT", 2023)]))
+        assert str(results[0][2]) == "Invalid JSON content (after 4 attempts)"
+
+    def test_client_errors_are_not_retried(self, session):
+        session.get.return_value = MockResponse("", 404, error="Not Found")
+        client = HolidayApiClient("http://api", session=session)
+        with pytest.raises(HolidayApiError):
+            client.public_holidays(2023, "XX")
+        session.get.assert_called_once()
+
+    def test_fetch_many(self, session):
+        def _get(url, **kwargs):
+            if url.endswith("/FR"):
+                return MockResponse("", 404, error="Not Found")
+            return MockResponse(f'[{{"url": "{url}"}}]', 200)
+
+        session.get.side_effect = _get
+        client = HolidayApiClient("http://api", session=session)
+        results = list(client.fetch_many([("IT", 2023), ("FR", 2023), ("IT", 2024)]))
+        assert [(pair, data) for pair, data, _ in results] == [
+            (("IT", 2023), [{"url": "http://api/publicholidays/2023/IT"}]),
+            (("FR", 2023), None),
+            (("IT", 2024), [{"url": "http://api/publicholidays/2024/IT"}]),
+        ]
+        assert isinstance(results[1][2], HolidayApiError)
+
+    def test_pooled_session(self):
+        client = HolidayApiClient("http://api", pool_maxsize=16)
+        assert client.session.get_adapter("http://api")._pool_maxsize == 16
+
+
+class TestCachedHolidayApiClient:
+    @pytest.fixture
+    def cache(self, tmp_path):
+        return ResponseCache(tmp_path, ttl=60, max_size=1024)
+
+    def test_fresh_responses_are_served_from_cache(self, session, cache):
+        response = MockResponse('[{"name": "Natale"}]', 200)
+        response.headers = {"ETag": '"v1"', "Last-Modified": "yesterday"}
+        session.get.return_value = response
+        client = HolidayApiClient("http://api", session=session, cache=cache)
+        assert client.public_holidays(2023, "IT") == [{"name": "Natale"}]
+        assert client.public_holidays(2023, "IT") == [{"name": "Natale"}]
+        session.get.assert_called_once()
+        assert cache.get("http://api/publicholidays/2023/IT")["etag"] == '"v1"'
+
+    def test_stale_responses_are_revalidated(self, session, cache):
+        cache.set("http://api/publicholidays/2023/IT", "[1]", etag='"v1"')
+        cache.ttl = 0
+        session.get.return_value = MockResponse("", 304)
+        client = HolidayApiClient("http://api", session=session, cache=cache)
+        assert client.public_holidays(2023, "IT") == [1]
+        session.get.assert_called_once_with(
+            "http://api/publicholidays/2023/IT",
+            headers={"If-None-Match": '"v1"'},
+            timeout=client.timeout,
+        )
+
+        session.get.return_value = MockResponse("[2]", 200)
+        assert client.public_holidays(2023, "IT") == [2]
+        assert cache.get("http://api/publicholidays/2023/IT")["body"] == "[2]"
+
+    def test_offline(self, session, cache):
+        cache.set("http://api/publicholidays/2023/IT", "[1]")
+        cache.ttl = 0
+        client = HolidayApiClient(
+            "http://api", session=session, cache=cache, offline=True
+        )
+        # Expired entries are served as well
+        assert client.public_holidays(2023, "IT") == [1]
+        with pytest.raises(HolidayApiError) as error:
+            client.public_holidays(2023, "FR")
+        assert str(error.value) == "http://api/publicholidays/2023/FR is not cached"
+        assert not session.get.called
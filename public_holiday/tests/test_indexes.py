@@ -0,0 +1,155 @@
+from unittest.mock import MagicMock
+
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+from meilisearch.errors import MeilisearchApiError
+
+from public_holiday.indexes import (
+    INDEX_NAME,
+    INDEX_SETTINGS,
+    SHADOW_INDEX_NAME,
+    IndexSyncError,
+    create_shadow_index,
+    get_watermark,
+    set_watermark,
+    settings_fingerprint,
+    swap_shadow_index,
+    sync_index_settings,
+    wait_for_task,
+)
+from public_holiday.tests.factories import MockResponse, Object
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def _mock_client(status="succeeded"):
+    client = MagicMock()
+    client.index.return_value.update_settings.return_value = Object(
+        task_uid=7, index_uid=INDEX_NAME
+    )
+    client.wait_for_task.return_value = Object(uid=7, status=status, error=None)
+    client.get_raw_index.return_value = {"createdAt": "2024-01-01T00:00:00Z"}
+    return client
+
+
+class TestIndexSettings:
+    def test_fingerprint_ignores_key_order(self):
+        reordered = dict(reversed(list(INDEX_SETTINGS.items())))
+        assert settings_fingerprint(reordered) == settings_fingerprint(INDEX_SETTINGS)
+        assert settings_fingerprint(
+            {**INDEX_SETTINGS, "filterableAttributes": []}
+        ) != settings_fingerprint(INDEX_SETTINGS)
+
+    def test_sync_sends_settings_once(self):
+        client = _mock_client()
+        assert sync_index_settings(client) is True
+        client.index.assert_called_once_with(INDEX_NAME)
+        client.index.return_value.update_settings.assert_called_once_with(
+            INDEX_SETTINGS
+        )
+        client.wait_for_task.assert_called_once()
+        assert client.wait_for_task.call_args.args == (7,)
+
+        # Fingerprint is unchanged, nothing is sent
+        assert sync_index_settings(client) is False
+        assert client.index.return_value.update_settings.call_count == 1
+
+    def test_sync_sends_changed_settings(self):
+        client = _mock_client()
+        sync_index_settings(client)
+        changed = {**INDEX_SETTINGS, "displayedAttributes": ["name"]}
+        assert sync_index_settings(client, index_settings=changed) is True
+        assert client.index.return_value.update_settings.call_count == 2
+
+    def test_sync_force(self):
+        client = _mock_client()
+        sync_index_settings(client)
+        assert sync_index_settings(client, force=True) is True
+        assert client.index.return_value.update_settings.call_count == 2
+
+    def test_sync_failed_task(self):
+        client = _mock_client(status="failed")
+        with pytest.raises(IndexSyncError):
+            sync_index_settings(client)
+        # A failed sync must be retried on the next run
+        client.wait_for_task.return_value = Object(
+            uid=8, status="succeeded", error=None
+        )
+        assert sync_index_settings(client) is True
+
+    def test_sync_recreated_index(self):
+        client = _mock_client()
+        sync_index_settings(client)
+        # Meilisearch lost the index, the fingerprint is kept by the cache
+        client.get_raw_index.side_effect = MeilisearchApiError(
+            "Index not found",
+            MockResponse('{"code": "index_not_found"}', 404),
+        )
+        assert sync_index_settings(client) is True
+        client.get_raw_index.side_effect = None
+        client.get_raw_index.return_value = {"createdAt": "2024-02-01T00:00:00Z"}
+        assert sync_index_settings(client) is True
+        assert sync_index_settings(client) is False
+        assert client.index.return_value.update_settings.call_count == 3
+
+    def test_sync_index_errors(self):
+        client = _mock_client()
+        client.get_raw_index.side_effect = MeilisearchApiError(
+            "Invalid API key", MockResponse('{"code": "invalid_api_key"}', 403)
+        )
+        with pytest.raises(MeilisearchApiError):
+            sync_index_settings(client)
+        client.index.return_value.update_settings.assert_not_called()
+
+
+class TestWatermark:
+    def test_watermark(self):
+        assert get_watermark() is None
+        now = timezone.now()
+        set_watermark(now)
+        assert get_watermark() == now
+        assert get_watermark("other_index") is None
+
+
+class TestShadowIndex:
+    def test_wait_for_task_ignored_codes(self):
+        client = _mock_client(status="failed")
+        client.wait_for_task.return_value = Object(
+            uid=7, status="failed", error={"code": "index_not_found"}
+        )
+        task_info = Object(task_uid=7, index_uid=SHADOW_INDEX_NAME)
+        assert wait_for_task(client, task_info, ignored_codes=("index_not_found",))
+        with pytest.raises(IndexSyncError):
+            wait_for_task(client, task_info)
+
+    def test_create_shadow_index(self):
+        client = _mock_client()
+        assert create_shadow_index(client) == SHADOW_INDEX_NAME
+        client.delete_index.assert_called_once_with(SHADOW_INDEX_NAME)
+        client.create_index.assert_called_once_with(
+            SHADOW_INDEX_NAME, {"primaryKey": "id"}
+        )
+        client.index.assert_called_once_with(SHADOW_INDEX_NAME)
+        client.index.return_value.update_settings.assert_called_once_with(
+            INDEX_SETTINGS
+        )
+        assert client.wait_for_task.call_count == 3
+
+    def test_swap_shadow_index(self):
+        client = _mock_client()
+        create_shadow_index(client)
+        swap_shadow_index(client)
+        client.create_index.assert_called_with(INDEX_NAME, {"primaryKey": "id"})
+        client.swap_indexes.assert_called_once_with(
+            [{"indexes": [INDEX_NAME, SHADOW_INDEX_NAME]}]
+        )
+        assert client.delete_index.call_args_list[-1].args == (SHADOW_INDEX_NAME,)
+        # The live index now has the declared settings
+        assert sync_index_settings(client) is False
+        assert client.index.return_value.update_settings.call_count == 1
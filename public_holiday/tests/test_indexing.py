@@ -0,0 +1,136 @@
+import datetime
+from unittest import mock
+from unittest.mock import MagicMock
+
+import pytest
+from django.utils import timezone
+from meilisearch.errors import MeilisearchCommunicationError
+from prometheus_client import REGISTRY
+
+from public_holiday.indexing import (
+    TASKS_PER_SENDER,
+    BatchIndexer,
+    BatchResult,
+    deleted_ids,
+    prune_deleted,
+)
+from public_holiday.models import DeletedPublicHoliday, PublicHoliday
+from public_holiday.tests.factories import (
+    Object,
+    PublicHolidayFactory,
+    mock_task_queue,
+)
+
+
+class TestBatchIndexer:
+    def test_run_waits_for_tasks(self):
+        labels = {"index": "public_holiday"}
+        indexed = REGISTRY.get_sample_value("indexed_documents_total", labels) or 0
+        waits = (
+            REGISTRY.get_sample_value("meilisearch_task_wait_seconds_count", labels)
+            or 0
+        )
+        client = mock_task_queue(MagicMock())
+        indexer = BatchIndexer(client, concurrency=3, max_in_flight=2)
+        results = indexer.run([[{"id": 1}], [{"id": 2}, {"id": 3}], [{"id": 4}]])
+        assert [(r.number, r.size, r.status) for r in results] == [
+            (1, 1, "succeeded"),
+            (2, 2, "succeeded"),
+            (3, 1, "succeeded"),
+        ]
+        assert client.index.return_value.add_documents.call_count == 3
+        assert indexer.in_flight == 0
+        assert REGISTRY.get_sample_value("indexed_documents_total", labels) == (
+            indexed + 4
+        )
+        assert REGISTRY.get_sample_value(
+            "meilisearch_task_wait_seconds_count", labels
+        ) == (waits + 3)
+
+    def test_in_flight_is_bounded(self):
+        client = mock_task_queue(MagicMock())
+        indexer = BatchIndexer(client, concurrency=4, max_in_flight=2)
+        in_flight = []
+        add_documents = client.index.return_value.add_documents.side_effect
+
+        def _add_documents(batch):
+            in_flight.append(indexer.in_flight)
+            return add_documents(batch)
+
+        client.index.return_value.add_documents.side_effect = _add_documents
+        indexer.run([[{"id": pk}] for pk in range(10)])
+        assert max(in_flight) <= 2
+
+    def test_default_in_flight(self):
+        # Tasks queue up instead of being sent one at a time
+        assert BatchIndexer(MagicMock()).max_in_flight == TASKS_PER_SENDER
+        assert BatchIndexer(MagicMock(), concurrency=2).max_in_flight == (
+            2 * TASKS_PER_SENDER
+        )
+
+    def test_polling_backs_off(self):
+        client = MagicMock()
+        client.index.return_value.add_documents.return_value = Object(task_uid=1)
+        statuses = iter(["enqueued", "processing", "processing", "succeeded"])
+        client.get_tasks.side_effect = lambda parameters: Object(
+            results=[Object(uid=1, status=next(statuses), error=None)]
+        )
+        indexer = BatchIndexer(
+            client, poll_interval_ms=1000, max_poll_interval_ms=2500
+        )
+        with mock.patch("public_holiday.indexing.time.sleep") as sleep:
+            results = indexer.run([[{"id": 1}]])
+        assert [call.args[0] for call in sleep.call_args_list] == [1, 2, 2.5]
+        assert results == [BatchResult(1, 1, 1, "succeeded", None)]
+
+    def test_submit_error(self):
+        client = MagicMock()
+        client.index.return_value.add_documents.side_effect = (
+            MeilisearchCommunicationError("Communication error")
+        )
+        results = BatchIndexer(client).run([[{"id": 1}]])
+        assert results == [
+            BatchResult(
+                1,
+                1,
+                None,
+                "failed",
+                "MeilisearchCommunicationError, Communication error",
+            )
+        ]
+        assert not client.get_tasks.called
+
+    def test_task_timeout(self):
+        client = MagicMock()
+        client.index.return_value.add_documents.return_value = Object(task_uid=5)
+        client.get_tasks.return_value = Object(
+            results=[Object(uid=5, status="processing", error=None)]
+        )
+        indexer = BatchIndexer(client, task_timeout_ms=0, poll_interval_ms=1)
+        results = indexer.run([[{"id": 1}]])
+        assert results == [BatchResult(1, 1, "5", "timed out", None)]
+
+
+@pytest.mark.django_db
+class TestDeletedIds:
+    def test_deleted_ids(self):
+        kept, deleted, old = PublicHolidayFactory.create_batch(3)
+        old_pk = old.pk
+        with mock.patch(
+            "django.utils.timezone.now",
+            return_value=datetime.datetime(2023, 1, 1, tzinfo=datetime.timezone.utc),
+        ):
+            old.delete()
+        deleted_pk = deleted.pk
+        PublicHoliday.objects.filter(pk=deleted_pk).delete()
+        since = datetime.datetime(2023, 6, 1, tzinfo=datetime.timezone.utc)
+        assert deleted_ids(since) == [deleted_pk]
+
+        assert prune_deleted(since) == 1
+        assert DeletedPublicHoliday.objects.filter(holiday_id=old_pk).count() == 0
+        assert deleted_ids(since - datetime.timedelta(days=365)) == [deleted_pk]
+
+    def test_deleted_ids_skip_existing_models(self):
+        holiday = PublicHolidayFactory()
+        DeletedPublicHoliday.objects.create(holiday_id=holiday.pk)
+        assert deleted_ids(timezone.now() - datetime.timedelta(days=1)) == []
@@ -0,0 +1,120 @@
+import datetime
+from unittest import mock
+
+import pytest
+from django.db import connection
+
+from public_holiday.ingestion import copy_holidays, upsert_holidays
+from public_holiday.models import PublicHoliday
+from public_holiday.outbox import Outbox
+from public_holiday.tests.factories import FakeRedis, PublicHolidayFactory
+
+postgresql_only = pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="COPY requires PostgreSQL"
+)
+
+
+@pytest.fixture
+def outbox():
+    outbox = Outbox(FakeRedis())
+    with mock.patch("public_holiday.receivers.get_outbox", return_value=outbox):
+        yield outbox
+
+
+@pytest.fixture
+def existing():
+    return PublicHolidayFactory(
+        name="Christmas",
+        local_name="Natale",
+        country="IT",
+        date=datetime.date(2023, 12, 25),
+    )
+
+
+def _holidays():
+    return [
+        # Renamed
+        PublicHoliday(
+            name="Christmas Day", local_name="Natale", country="IT", date="2023-12-25"
+        ),
+        # Unchanged
+        PublicHoliday(
+            name="New Year's Day",
+            local_name="Capodanno",
+            country="IT",
+            date="2023-01-01",
+        ),
+        # Duplicated natural key
+        PublicHoliday(
+            name="New Year's Day",
+            local_name="Capodanno",
+            country="IT",
+            date="2023-01-01",
+        ),
+    ]
+
+
+@pytest.mark.django_db
+class TestUpsertHolidays:
+    def test_upsert(self, existing):
+        bulk_create = PublicHoliday.objects.bulk_create
+        with mock.patch.object(
+            PublicHoliday.objects, "bulk_create", wraps=bulk_create
+        ) as bulk_create:
+            assert upsert_holidays(_holidays(), batch_size=2) == 2
+        # The duplicate of the second batch was inserted by the first one
+        assert [len(call.args[0]) for call in bulk_create.call_args_list] == [2]
+
+        existing.refresh_from_db()
+        assert existing.name == "Christmas Day"
+        assert PublicHoliday.objects.count() == 2
+
+    def test_upsert_enqueues_changes(
+        self, existing, outbox, django_capture_on_commit_callbacks
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            upsert_holidays(_holidays())
+        assert len(outbox) == 2
+
+    def test_upsert_skips_unchanged(
+        self, existing, outbox, django_capture_on_commit_callbacks
+    ):
+        unchanged = PublicHoliday(
+            name="Christmas", local_name="Natale", country="IT", date="2023-12-25"
+        )
+        with django_capture_on_commit_callbacks(execute=True):
+            assert upsert_holidays([unchanged]) == 0
+        # Only inserted or renamed rows are synced to the index
+        assert len(outbox) == 0
+        assert PublicHoliday.objects.get(pk=existing.pk).updated_at == (
+            existing.updated_at
+        )
+
+
+@postgresql_only
+@pytest.mark.django_db
+class TestCopyHolidays:
+    def test_copy(self, existing, outbox, django_capture_on_commit_callbacks):
+        unchanged = PublicHolidayFactory(
+            name="Easter", local_name="Pasqua", country="IT", date="2023-04-09"
+        )
+        holidays = _holidays() + [
+            PublicHoliday(
+                name="Easter", local_name="Pasqua", country="IT", date="2023-04-09"
+            )
+        ]
+        with django_capture_on_commit_callbacks(execute=True):
+            assert copy_holidays(holidays) == 2
+
+        existing.refresh_from_db()
+        assert existing.name == "Christmas Day"
+        assert PublicHoliday.objects.count() == 3
+        created = PublicHoliday.objects.get(local_name="Capodanno")
+        # Only inserted or renamed rows are synced to the index
+        assert outbox.redis.smembers(outbox.key) == {
+            str(existing.pk).encode(),
+            str(created.pk).encode(),
+        }
+        assert PublicHoliday.objects.get(pk=unchanged.pk).updated_at == (
+            unchanged.updated_at
+        )
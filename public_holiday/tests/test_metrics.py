@@ -0,0 +1,76 @@
+import pytest
+from django.db import connection
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY
+
+from public_holiday.metrics import (
+    QueryMetrics,
+    observe_processing_time,
+    render_metrics,
+    search_phase,
+    track_queries,
+)
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class TestSearchMetrics:
+    def test_search_phase(self):
+        count = sample("search_phase_seconds_count", endpoint="test", phase="lookup")
+        with search_phase("test", "lookup"):
+            pass
+        assert sample(
+            "search_phase_seconds_count", endpoint="test", phase="lookup"
+        ) == (count + 1)
+
+    def test_observe_processing_time(self):
+        total = sample("meilisearch_processing_seconds_sum", endpoint="test")
+        observe_processing_time("test", {"hits": [], "processingTimeMs": 12})
+        observe_processing_time("test", {"hits": []})
+        assert sample("meilisearch_processing_seconds_sum", endpoint="test") == (
+            pytest.approx(total + 0.012)
+        )
+
+
+@pytest.mark.django_db
+class TestQueryMetrics:
+    def test_counts_queries(self):
+        queries = QueryMetrics()
+        with connection.execute_wrapper(queries):
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.execute("SELECT 2")
+        assert queries.count == 2
+        assert queries.seconds > 0
+
+    def test_track_queries(self):
+        class View:
+            @track_queries("test")
+            def action(self, request):
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                raise ValueError("failed")
+
+        count = sample("db_queries_count", endpoint="test")
+        queries = sample("db_queries_sum", endpoint="test")
+        # Failed requests are observed too
+        with pytest.raises(ValueError):
+            View().action(None)
+        assert sample("db_queries_count", endpoint="test") == count + 1
+        assert sample("db_queries_sum", endpoint="test") == queries + 1
+        assert sample("db_query_seconds_count", endpoint="test") >= 1
+
+
+class TestRenderMetrics:
+    def test_render_metrics(self, monkeypatch):
+        monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+        content, content_type = render_metrics()
+        assert content_type == CONTENT_TYPE_LATEST
+        assert b"# TYPE search_phase_seconds histogram" in content
+
+    def test_multiprocess(self, monkeypatch, tmp_path):
+        # Samples are read from the files written by every process
+        monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+        content, _ = render_metrics()
+        assert content == b""
@@ -1,8 +1,14 @@
+import datetime
+
 import pytest
 
+from django.db import connection
 from django.utils import timezone
 
+from public_holiday import fallback
+from public_holiday.models import PublicHoliday
 from public_holiday.tests.factories import PublicHolidayFactory
+from public_holiday.views import _queryset_filter
 
 
 @pytest.mark.django_db
@@ -15,3 +21,51 @@ class TestPublicHoliday:
         assert (
             str(model) == f"[{model.country.name} | {today}] Holy Moly (Santo Cielo!)"
         )
+
+
+@pytest.fixture
+def analyzed_holidays():
+    PublicHolidayFactory.create_batch(50)
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE public_holiday_publicholiday")
+            # Small tables are cheaper to scan, only index usability matters
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "filters, ordering, index",
+    [
+        (
+            {
+                "date_from": datetime.date(2023, 1, 1),
+                "date_to": datetime.date(2023, 3, 1),
+            },
+            ("id",),
+            "publicholiday_date_idx",
+        ),
+        ({"year": [2022, 2023]}, ("id",), "publicholiday_date_idx"),
+        (
+            {"country": ["IT"], "date_from": datetime.date(2023, 1, 1)},
+            ("country", "date", "id"),
+            "publicholiday_country_date_idx",
+        ),
+    ],
+)
+def test_filters_query_plans(analyzed_holidays, filters, ordering, index):
+    queryset = PublicHoliday.objects.filter(_queryset_filter(filters))
+    plan = queryset.order_by(*ordering)[:10].explain()
+    assert index in plan
+    if ordering != ("id",):
+        # Rows are read in index order, without sorting them
+        assert "Sort" not in plan and "B-TREE" not in plan
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="Full-text search requires PostgreSQL"
+)
+def test_full_text_query_plan(analyzed_holidays):
+    queryset = PublicHoliday.objects.filter(fallback._match(["natale"], "default"))
+    assert "publicholiday_search_vector_idx" in queryset.explain()
@@ -0,0 +1,154 @@
+from unittest import mock
+from unittest.mock import MagicMock
+
+import pytest
+import redis
+from django.conf import settings
+
+from public_holiday.models import DeletedPublicHoliday, PublicHoliday
+from public_holiday.outbox import Outbox, get_outbox
+from public_holiday.indexes import IndexSyncError
+from public_holiday.tests.factories import (
+    FakeRedis,
+    Object,
+    PublicHolidayFactory,
+    documents_of,
+)
+
+
+@pytest.fixture
+def outbox():
+    outbox = Outbox(FakeRedis())
+    with mock.patch("public_holiday.receivers.get_outbox", return_value=outbox):
+        yield outbox
+
+
+def _mock_client(status="succeeded"):
+    client = MagicMock()
+    client.index.return_value.add_documents.return_value = Object(
+        task_uid=1, index_uid="public_holiday"
+    )
+    client.index.return_value.delete_documents.return_value = Object(
+        task_uid=2, index_uid="public_holiday"
+    )
+    client.wait_for_task.return_value = Object(uid=1, status=status, error=None)
+    return client
+
+
+class TestOutbox:
+    def test_add_coalesces_ids(self, outbox):
+        outbox.add([1, 2])
+        outbox.add([2, 3])
+        outbox.add([])
+        assert len(outbox) == 3
+
+    def test_add_redis_error(self, outbox, caplog):
+        outbox.redis = MagicMock()
+        outbox.redis.sadd.side_effect = redis.ConnectionError("Connection refused")
+        outbox.add([1])
+        assert "Unable to add 1 ids to the outbox" in caplog.text
+
+    def test_get_outbox(self):
+        outbox = get_outbox()
+        assert get_outbox() is outbox
+        kwargs = outbox.redis.connection_pool.connection_kwargs
+        assert f"redis://{kwargs['host']}:{kwargs['port']}/{kwargs['db']}" == (
+            settings.REDIS_URL
+        )
+
+    @pytest.mark.django_db
+    def test_flush_upserts_and_deletes(self, outbox):
+        holidays = PublicHolidayFactory.create_batch(3)
+        pks = [holiday.pk for holiday in holidays]
+        holidays[-1].delete()
+        outbox.add(pks)
+        client = _mock_client()
+
+        assert outbox.flush(client, batch_size=10) == (2, 1)
+
+        index = client.index.return_value
+        index.add_documents.assert_called_once_with(
+            documents_of(holidays[:2])
+        )
+        index.delete_documents.assert_called_once_with(pks[-1:])
+        assert client.wait_for_task.call_count == 2
+        assert len(outbox) == 0
+        # Nothing left to flush
+        assert outbox.flush(client) == (0, 0)
+        assert index.add_documents.call_count == 1
+
+    @pytest.mark.django_db
+    def test_flush_in_batches(self, outbox):
+        holidays = PublicHolidayFactory.create_batch(3)
+        outbox.add([holiday.pk for holiday in holidays])
+        client = _mock_client()
+
+        assert outbox.flush(client, batch_size=2) == (3, 0)
+        assert client.index.return_value.add_documents.call_count == 2
+        assert not client.index.return_value.delete_documents.called
+
+    @pytest.mark.django_db
+    def test_failed_flush_is_resumed(self, outbox):
+        holiday = PublicHolidayFactory()
+        outbox.add([holiday.pk])
+        client = _mock_client(status="failed")
+        with pytest.raises(IndexSyncError):
+            outbox.flush(client)
+        assert len(outbox) == 1
+
+        # Changes made meanwhile wait for the next flush
+        other = PublicHolidayFactory()
+        outbox.add([other.pk])
+        client = _mock_client()
+        assert outbox.flush(client) == (1, 0)
+        client.index.return_value.add_documents.assert_called_once_with(
+            documents_of([holiday])
+        )
+        assert outbox.flush(client) == (1, 0)
+        assert len(outbox) == 0
+
+
+@pytest.mark.django_db
+class TestOutboxReceivers:
+    def test_save_and_delete(self, outbox, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            holiday = PublicHolidayFactory()
+            holiday.name = "Renamed"
+            holiday.save()
+        assert outbox.redis.smembers(outbox.key) == {str(holiday.pk).encode()}
+
+        pk = holiday.pk
+        with django_capture_on_commit_callbacks(execute=True):
+            holiday.delete()
+        assert outbox.redis.smembers(outbox.key) == {str(pk).encode()}
+        # Read by delta reindexes
+        assert DeletedPublicHoliday.objects.filter(holiday_id=pk).exists()
+
+    def test_nothing_enqueued_before_commit(
+        self, outbox, django_capture_on_commit_callbacks
+    ):
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            PublicHolidayFactory()
+        assert len(callbacks) == 1
+        assert len(outbox) == 0
+
+    def test_bulk_create(self, outbox, django_capture_on_commit_callbacks):
+        existing = PublicHolidayFactory(country="IT")
+        holidays = [
+            PublicHoliday(
+                name=existing.name,
+                local_name=existing.local_name,
+                country=existing.country,
+                date=existing.date,
+            ),
+            PublicHoliday(
+                name="Christmas", local_name="Natale", country="IT", date="2023-12-25"
+            ),
+        ]
+        with django_capture_on_commit_callbacks(execute=True):
+            PublicHoliday.objects.bulk_create(holidays, ignore_conflicts=True)
+        created = PublicHoliday.objects.get(local_name="Natale")
+        assert outbox.redis.smembers(outbox.key) == {
+            str(existing.pk).encode(),
+            str(created.pk).encode(),
+        }
@@ -0,0 +1,220 @@
+import base64
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from django.db import connection
+from django.test import override_settings
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from public_holiday.models import PublicHoliday
+from public_holiday.pagination import (
+    KeysetPagination,
+    PublicHolidayPagination,
+    SearchPagination,
+    approximate_count,
+)
+from public_holiday.tests.factories import PublicHolidayFactory
+
+factory = APIRequestFactory()
+
+
+def paginator_for(params):
+    return SearchPagination(Request(factory.get("/public_holiday/search/", params)))
+
+
+def test_default_page():
+    paginator = paginator_for({})
+    assert paginator.get_search_params() == {"offset": 0, "limit": 10}
+
+
+def test_limit_offset_page():
+    paginator = paginator_for({"q": "natale", "limit": 5, "offset": 5})
+    assert paginator.get_search_params() == {"offset": 5, "limit": 5}
+
+    data = paginator.get_paginated_data(
+        {"hits": [{"id": 6}], "estimatedTotalHits": 12, "offset": 5, "limit": 5}
+    )
+    assert data == {
+        "estimatedTotalHits": 12,
+        "offset": 5,
+        "limit": 5,
+        "next": "http://testserver/public_holiday/search/"
+        + "?limit=5&offset=10&q=natale",
+        "previous": "http://testserver/public_holiday/search/?limit=5&q=natale",
+        "results": [{"id": 6}],
+    }
+
+
+def test_limit_offset_last_page():
+    paginator = paginator_for({"limit": 5, "offset": 12})
+    data = paginator.get_paginated_data({"hits": [], "estimatedTotalHits": 14})
+    assert data["next"] is None
+    assert data["previous"] == (
+        "http://testserver/public_holiday/search/?limit=5&offset=7"
+    )
+
+
+def test_limit_offset_first_page():
+    data = paginator_for({"limit": 5}).get_paginated_data(
+        {"hits": [], "estimatedTotalHits": 3}
+    )
+    assert data["next"] is None
+    assert data["previous"] is None
+
+
+def test_numbered_page():
+    paginator = paginator_for({"page": 2, "hitsPerPage": 20})
+    assert paginator.get_search_params() == {"page": 2, "hitsPerPage": 20}
+
+    data = paginator.get_paginated_data(
+        {"hits": [{"id": 21}], "totalHits": 45, "totalPages": 3}
+    )
+    assert data == {
+        "totalHits": 45,
+        "totalPages": 3,
+        "page": 2,
+        "hitsPerPage": 20,
+        "next": "http://testserver/public_holiday/search/?hitsPerPage=20&page=3",
+        "previous": "http://testserver/public_holiday/search/?hitsPerPage=20&page=1",
+        "results": [{"id": 21}],
+    }
+
+
+def test_numbered_page_bounds():
+    data = paginator_for({"page": 1}).get_paginated_data(
+        {"hits": [], "totalHits": 0, "totalPages": 0}
+    )
+    assert data["hitsPerPage"] == 10
+    assert data["next"] is None
+    assert data["previous"] is None
+
+
+@override_settings(SEARCH_MAX_PAGE_SIZE=50)
+def test_page_size_capped():
+    assert paginator_for({"limit": 1000}).get_search_params()["limit"] == 50
+    assert paginator_for({"hitsPerPage": 1000}).get_search_params() == {
+        "page": 1,
+        "hitsPerPage": 50,
+    }
+
+
+def test_invalid_values_fallback_to_defaults():
+    assert paginator_for({"limit": "many", "offset": -3}).get_search_params() == {
+        "offset": 0,
+        "limit": 10,
+    }
+    assert paginator_for({"page": 0, "hitsPerPage": 0}).get_search_params() == {
+        "page": 1,
+        "hitsPerPage": 10,
+    }
+
+
+def keyset_page(params):
+    paginator = KeysetPagination()
+    request = Request(factory.get("/public_holiday/", params))
+    results = paginator.paginate_queryset(PublicHoliday.objects.all(), request)
+    return paginator, results
+
+
+def cursor_of(link):
+    return parse_qs(urlparse(link).query)["cursor"][0]
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    def test_pages_by_id(self):
+        holidays = PublicHolidayFactory.create_batch(5)
+        paginator, results = keyset_page({"cursor": "", "page_size": 2})
+        assert results == holidays[:2]
+        assert paginator.get_previous_link() is None
+        assert paginator.count is None
+
+        cursor = cursor_of(paginator.get_next_link())
+        paginator, results = keyset_page({"cursor": cursor, "page_size": 2})
+        assert results == holidays[2:4]
+
+        last = cursor_of(paginator.get_next_link())
+        paginator, results = keyset_page({"cursor": last, "page_size": 2})
+        assert results == holidays[4:]
+        assert paginator.get_next_link() is None
+
+        # Back from the last page
+        previous = cursor_of(paginator.get_previous_link())
+        paginator, results = keyset_page({"cursor": previous, "page_size": 2})
+        assert results == holidays[2:4]
+        previous = cursor_of(paginator.get_previous_link())
+        paginator, results = keyset_page({"cursor": previous, "page_size": 2})
+        assert results == holidays[:2]
+        assert paginator.get_previous_link() is None
+        assert cursor_of(paginator.get_next_link()) == cursor
+
+    def test_pages_by_country_and_date(self):
+        holidays = [
+            PublicHolidayFactory(country=country, date=date)
+            for country, date in (
+                ("IT", "2023-12-25"),
+                ("FR", "2023-07-14"),
+                ("IT", "2023-01-01"),
+                ("FR", "2023-07-14"),
+                ("DE", "2023-10-03"),
+            )
+        ]
+        expected = [holidays[i] for i in (4, 1, 3, 2, 0)]
+        params = {"cursor": "", "ordering": "country", "page_size": 2}
+        results = []
+        while True:
+            paginator, page = keyset_page(params)
+            results += page
+            if not paginator.get_next_link():
+                break
+            params["cursor"] = cursor_of(paginator.get_next_link())
+        assert results == expected
+
+    def test_approximate_count(self):
+        PublicHolidayFactory.create_batch(3)
+        with patch(
+            "public_holiday.pagination.approximate_count", return_value=1000
+        ) as approximate_count:
+            paginator, _ = keyset_page({"cursor": "", "count": "approximate"})
+        assert approximate_count.called
+        assert paginator.get_paginated_response([]).data["count"] == 1000
+
+    def test_approximate_count_of_queryset(self):
+        PublicHolidayFactory.create_batch(3)
+        count = approximate_count(PublicHoliday.objects.all())
+        if connection.vendor == "postgresql":
+            # An estimate, the table has never been analyzed
+            assert isinstance(count, int)
+        else:
+            assert count == 3
+
+    @pytest.mark.parametrize(
+        "cursor",
+        [
+            "not base64!",
+            base64.urlsafe_b64encode(b"{}").decode(),
+            base64.urlsafe_b64encode(b'{"p": [1, 2], "r": 0}').decode(),
+            base64.urlsafe_b64encode(b'{"p": ["x"], "r": 0}').decode(),
+        ],
+    )
+    def test_invalid_cursor(self, cursor):
+        with pytest.raises(NotFound):
+            keyset_page({"cursor": cursor})
+
+    def test_page_size_capped(self):
+        paginator, _ = keyset_page({"cursor": "", "page_size": 10**6})
+        assert paginator.page_size == KeysetPagination.max_page_size
+
+
+def test_schema_parameters():
+    parameters = PublicHolidayPagination().get_schema_operation_parameters(None)
+    assert [parameter["name"] for parameter in parameters] == [
+        "page",
+        "cursor",
+        "ordering",
+        "page_size",
+        "count",
+    ]
@@ -0,0 +1,77 @@
+import datetime
+import decimal
+import uuid
+
+import pytest
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from public_holiday.renderers import (
+    CSVRenderer,
+    NDJSONRenderer,
+    ORJSONRenderer,
+    RawJSON,
+    StreamingRenderer,
+)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"results": [{"id": 1, "name": "Natale", "date": datetime.date(2023, 12, 25)}]},
+        {"created": datetime.datetime(2023, 1, 1, 12, 30, 15, 123456)},
+        {"created": datetime.datetime(2023, 1, 1, tzinfo=datetime.timezone.utc)},
+        {"time": datetime.time(12, 30, 15, 123456)},
+        {"amount": decimal.Decimal("1.10"), "uuid": uuid.UUID(int=1)},
+        {"name": "Fête nationale 圣诞节   ", "lazy": gettext_lazy("Hello")},
+        {1: "non string keys", "none": None, "float": 1.5, "bool": True},
+        [],
+    ],
+)
+def test_same_output_as_json_renderer(data):
+    assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+def test_empty_response():
+    assert ORJSONRenderer().render(None) == b""
+
+
+def test_raw_json():
+    data = {"results": RawJSON(b'[{"id":1}]'), "next": None}
+    assert ORJSONRenderer().render(data) == b'{"results":[{"id":1}],"next":null}'
+
+
+def test_indented_output():
+    data = {"results": RawJSON(b'[{"id":1}]')}
+    rendered = ORJSONRenderer().render(data, "application/json; indent=2")
+    assert rendered == JSONRenderer().render(
+        {"results": [{"id": 1}]}, "application/json; indent=2"
+    )
+
+
+def test_ndjson_stream():
+    renderer = NDJSONRenderer()
+    renderer.chunk_size = 2
+    rows = ({"id": i, "name": "Natale"} for i in range(3))
+    assert list(renderer.stream(rows)) == [
+        b'{"id":0,"name":"Natale"}\n{"id":1,"name":"Natale"}\n',
+        b'{"id":2,"name":"Natale"}\n',
+    ]
+    assert renderer.render({"detail": "Not found."}) == b'{"detail":"Not found."}\n'
+    assert renderer.render(None) == b""
+
+
+def test_csv_stream():
+    renderer = CSVRenderer()
+    renderer.chunk_size = 2
+    rows = ({"id": i, "name": f"Natale, {i}"} for i in range(3))
+    assert list(renderer.stream(rows)) == [
+        b'id,name\r\n0,"Natale, 0"\r\n1,"Natale, 1"\r\n',
+        b'2,"Natale, 2"\r\n',
+    ]
+    assert list(renderer.stream([])) == []
+
+
+def test_streaming_renderer_is_abstract():
+    with pytest.raises(NotImplementedError):
+        StreamingRenderer().render({})
@@ -0,0 +1,334 @@
+import asyncio
+import threading
+import time
+from unittest import mock
+
+import pytest
+from django.conf import settings
+from prometheus_client import REGISTRY
+from meilisearch.errors import (
+    MeilisearchApiError,
+    MeilisearchCommunicationError,
+    MeilisearchTimeoutError,
+)
+
+from public_holiday import resilience
+from public_holiday.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ReadPolicy,
+    get_breaker,
+    get_read_policy,
+    is_unavailable,
+)
+from public_holiday.tests.factories import MockResponse
+
+UNAVAILABLE = MeilisearchCommunicationError("Connection refused")
+REJECTED = MeilisearchApiError("Index not found", MockResponse("", 404))
+
+
+@pytest.fixture(autouse=True)
+def _clear_breaker():
+    get_breaker.cache_clear()
+    yield
+    get_breaker.cache_clear()
+
+
+@pytest.mark.parametrize(
+    "error, unavailable",
+    [
+        (UNAVAILABLE, True),
+        (MeilisearchTimeoutError("Read timed out"), True),
+        (CircuitOpenError("meilisearch"), True),
+        (MeilisearchApiError("Bad Gateway", MockResponse("", 502)), True),
+        (MeilisearchApiError("An error occurred.", MockResponse("", 500)), False),
+        (REJECTED, False),
+        (ValueError(), False),
+    ],
+)
+def test_is_unavailable(error, unavailable):
+    assert is_unavailable(error) is unavailable
+
+
+def fail(error):
+    def func():
+        raise error
+
+    return func
+
+
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=30)
+        assert breaker.healthy
+        for _ in range(2):
+            with pytest.raises(MeilisearchCommunicationError):
+                breaker.call(fail(UNAVAILABLE))
+        assert breaker.state == CircuitBreaker.OPEN
+        func = mock.Mock()
+        with pytest.raises(CircuitOpenError):
+            breaker.call(func)
+        func.assert_not_called()
+
+    def test_successes_reset_failures(self):
+        breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=30)
+        with pytest.raises(MeilisearchCommunicationError):
+            breaker.call(fail(UNAVAILABLE))
+        assert not breaker.healthy
+        assert breaker.call(lambda: "result") == "result"
+        assert breaker.healthy
+        # Rejected calls are answered by a running service
+        with pytest.raises(MeilisearchCommunicationError):
+            breaker.call(fail(UNAVAILABLE))
+        with pytest.raises(MeilisearchApiError):
+            breaker.call(fail(REJECTED))
+        assert breaker.failures == 0
+
+    def test_half_open_trial(self):
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+        with mock.patch("public_holiday.resilience.time.monotonic") as monotonic:
+            monotonic.return_value = 100
+            breaker.record_failure()
+            assert not breaker.allow()
+            monotonic.return_value = 130
+            # A single trial call is let through
+            assert breaker.allow()
+            assert breaker.state == CircuitBreaker.HALF_OPEN
+            assert not breaker.allow()
+            # Its failure opens the circuit for another reset_timeout
+            breaker.record_failure()
+            assert not breaker.allow()
+            monotonic.return_value = 160
+            assert breaker.call(lambda: "result") == "result"
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_cancelled_trial(self):
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+
+        async def pending():
+            await asyncio.sleep(60)
+
+        async def cancel_trial():
+            task = asyncio.ensure_future(breaker.acall(pending))
+            await asyncio.sleep(0)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        with mock.patch("public_holiday.resilience.time.monotonic") as monotonic:
+            monotonic.return_value = 100
+            breaker.record_failure()
+            monotonic.return_value = 130
+            asyncio.run(cancel_trial())
+            # The next call runs a new trial
+            assert breaker.state == CircuitBreaker.HALF_OPEN
+            assert breaker.call(lambda: "result") == "result"
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_stale_trial_replaced(self):
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+        with mock.patch("public_holiday.resilience.time.monotonic") as monotonic:
+            monotonic.return_value = 100
+            breaker.record_failure()
+            monotonic.return_value = 130
+            assert breaker.allow()
+            monotonic.return_value = 159
+            assert not breaker.allow()
+            # The first trial hangs, another one is let through
+            monotonic.return_value = 160
+            assert breaker.allow()
+            assert not breaker.allow()
+
+    def test_state_metrics(self):
+        def state(name):
+            return REGISTRY.get_sample_value(
+                "circuit_breaker_state", {"name": "metrics", "state": name}
+            )
+
+        breaker = CircuitBreaker("metrics", failure_threshold=1, reset_timeout=30)
+        assert (state("closed"), state("open")) == (1, 0)
+        breaker.record_failure()
+        assert (state("closed"), state("open")) == (0, 1)
+        with pytest.raises(CircuitOpenError):
+            breaker.call(mock.Mock())
+        assert REGISTRY.get_sample_value(
+            "circuit_breaker_rejected_calls_total", {"name": "metrics"}
+        ) == 1
+
+    def test_snapshot(self):
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+        with mock.patch("public_holiday.resilience.time.time", return_value=1000):
+            breaker.record_failure()
+        assert breaker.snapshot() == {
+            "name": "test",
+            "state": "open",
+            "failures": 1,
+            "failure_threshold": 1,
+            "reset_timeout": 30,
+            "opened_at": 1000,
+        }
+
+    def test_acall(self):
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+
+        async def result():
+            return "result"
+
+        async def unavailable():
+            raise UNAVAILABLE
+
+        assert asyncio.run(breaker.acall(result)) == "result"
+        with pytest.raises(MeilisearchCommunicationError):
+            asyncio.run(breaker.acall(unavailable))
+        with pytest.raises(CircuitOpenError):
+            asyncio.run(breaker.acall(result))
+
+    def test_get_breaker(self):
+        breaker = get_breaker()
+        assert get_breaker() is breaker
+        assert breaker.failure_threshold == (
+            settings.MEILISEARCH_BREAKER_FAILURE_THRESHOLD
+        )
+        assert breaker.reset_timeout == settings.MEILISEARCH_BREAKER_RESET_TIMEOUT
+        resilience._reset_after_fork()
+        assert get_breaker() is not breaker
+
+
+class TestReadPolicy:
+    def test_get_read_policy(self):
+        policy = get_read_policy()
+        assert policy.budget == settings.MEILISEARCH_READ_BUDGET
+        assert policy.retries == settings.MEILISEARCH_READ_RETRIES
+        assert policy.hedge_delay == settings.MEILISEARCH_HEDGE_DELAY
+
+    def test_retries_unavailable_reads(self):
+        send = mock.Mock(side_effect=[UNAVAILABLE, UNAVAILABLE, "result"])
+        assert ReadPolicy(budget=1, retries=2).call(send) == "result"
+        assert send.call_count == 3
+        # Timeouts are what is left of the budget
+        timeouts = [call.args[0] for call in send.call_args_list]
+        assert 1 >= timeouts[0] >= timeouts[1] >= timeouts[2] > 0
+
+    def test_retries_are_bounded(self):
+        send = mock.Mock(side_effect=UNAVAILABLE)
+        with pytest.raises(MeilisearchCommunicationError):
+            ReadPolicy(budget=1, retries=2).call(send)
+        assert send.call_count == 3
+
+    def test_rejected_reads_are_not_retried(self):
+        send = mock.Mock(side_effect=REJECTED)
+        with pytest.raises(MeilisearchApiError):
+            ReadPolicy(budget=1, retries=2).call(send)
+        send.assert_called_once()
+
+    def test_no_retry_once_budget_spent(self):
+        def slow_failure(timeout):
+            time.sleep(0.02)
+            raise UNAVAILABLE
+
+        send = mock.Mock(side_effect=slow_failure)
+        with pytest.raises(MeilisearchCommunicationError):
+            ReadPolicy(budget=0.01, retries=5).call(send)
+        send.assert_called_once()
+
+    def test_hedged_read(self):
+        threads = []
+
+        def send(timeout):
+            threads.append(threading.current_thread())
+            # The first read fails after the hedge was sent
+            if len(threads) == 1:
+                time.sleep(0.05)
+                raise UNAVAILABLE
+            return "hedged"
+
+        assert ReadPolicy(budget=1, hedge_delay=0.01).call(send) == "hedged"
+        # Only the hedge is sent from the pool
+        assert threads[0] == threading.current_thread()
+        assert threads[1] != threading.current_thread()
+
+    def test_hedging_not_needed(self):
+        send = mock.Mock(return_value="result")
+        assert ReadPolicy(budget=1, hedge_delay=0.5).call(send) == "result"
+        send.assert_called_once()
+
+    def test_hedged_read_errors(self):
+        send = mock.Mock(side_effect=REJECTED)
+        with pytest.raises(MeilisearchApiError):
+            ReadPolicy(budget=1, hedge_delay=0.5).call(send)
+        # Failed before the hedge delay, no hedge is sent
+        send = mock.Mock(side_effect=UNAVAILABLE)
+        with pytest.raises(MeilisearchCommunicationError):
+            ReadPolicy(budget=1, hedge_delay=0.5).call(send)
+        send.assert_called_once()
+
+        def stuck(timeout):
+            time.sleep(timeout)
+            raise MeilisearchTimeoutError("Read timed out")
+
+        with pytest.raises(MeilisearchTimeoutError):
+            ReadPolicy(budget=0.05, hedge_delay=0.01).call(stuck)
+
+    def test_hedged_read_keeps_first_response(self):
+        calls = []
+
+        def send(timeout):
+            calls.append(timeout)
+            if len(calls) == 1:
+                time.sleep(0.05)
+                return "slow"
+            raise UNAVAILABLE
+
+        assert ReadPolicy(budget=1, hedge_delay=0.01).call(send) == "slow"
+        assert len(calls) == 2
+
+    def test_acall(self):
+        attempts = []
+
+        async def send(timeout):
+            attempts.append(timeout)
+            if len(attempts) == 1:
+                raise UNAVAILABLE
+            return "result"
+
+        policy = ReadPolicy(budget=1, retries=1)
+        assert asyncio.run(policy.acall(send)) == "result"
+        assert len(attempts) == 2
+
+        async def rejected(timeout):
+            raise REJECTED
+
+        with pytest.raises(MeilisearchApiError):
+            asyncio.run(policy.acall(rejected))
+
+    def test_acall_budget(self):
+        async def stuck(timeout):
+            await asyncio.sleep(1)
+
+        with pytest.raises(MeilisearchTimeoutError):
+            asyncio.run(ReadPolicy(budget=0.01).acall(stuck))
+
+    def test_ahedged_read(self):
+        attempts = []
+
+        async def send(timeout):
+            attempts.append(timeout)
+            if len(attempts) == 1:
+                await asyncio.sleep(1)
+                return "slow"
+            return "fast"
+
+        policy = ReadPolicy(budget=1, hedge_delay=0.01)
+        assert asyncio.run(policy.acall(send)) == "fast"
+
+        async def stuck(timeout):
+            await asyncio.sleep(1)
+
+        with pytest.raises(MeilisearchTimeoutError):
+            asyncio.run(ReadPolicy(budget=0.05, hedge_delay=0.01).acall(stuck))
+
+        async def unavailable(timeout):
+            raise UNAVAILABLE
+
+        with pytest.raises(MeilisearchCommunicationError):
+            asyncio.run(policy.acall(unavailable))
@@ -0,0 +1,60 @@
+import os
+from unittest import mock
+
+from public_holiday.response_cache import ResponseCache
+
+
+class TestResponseCache:
+    def test_set_and_get(self, tmp_path):
+        cache = ResponseCache(tmp_path / "cache", ttl=60, max_size=1024)
+        assert cache.get("http://api/a") is None
+        cache.set("http://api/a", "[]", etag='"v1"', last_modified="yesterday")
+        entry = cache.get("http://api/a")
+        assert entry["body"] == "[]"
+        assert cache.is_fresh(entry)
+        assert cache.conditional_headers(entry) == {
+            "If-None-Match": '"v1"',
+            "If-Modified-Since": "yesterday",
+        }
+        assert cache.conditional_headers(None) == {}
+
+    def test_expiry_and_touch(self, tmp_path):
+        cache = ResponseCache(tmp_path, ttl=60, max_size=1024)
+        entry = cache.set("http://api/a", "[]", etag='"v1"')
+        with mock.patch("public_holiday.response_cache.time.time") as now:
+            now.return_value = entry["fetched_at"] + 61
+            assert not cache.is_fresh(cache.get("http://api/a"))
+            touched = cache.touch(entry)
+        assert touched["fetched_at"] == entry["fetched_at"] + 61
+        assert touched["etag"] == '"v1"'
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = ResponseCache(tmp_path, ttl=60, max_size=10**6)
+        body = "x" * 100
+        cache.set("http://api/a", body)
+        # Room for three and a half entries
+        cache.max_size = cache.path("http://api/a").stat().st_size * 7 // 2
+        for i, url in enumerate(("http://api/a", "http://api/b", "http://api/c")):
+            cache.set(url, body)
+            os.utime(cache.path(url), (i, i))
+        # Reading an entry makes it the most recently used one
+        assert cache.get("http://api/a") is not None
+        cache.set("http://api/d", body)
+        assert cache.get("http://api/b") is None
+        assert {path.name for path in tmp_path.iterdir()} == {
+            cache.path(url).name
+            for url in ("http://api/a", "http://api/c", "http://api/d")
+        }
+
+    def test_unreadable_entries(self, tmp_path, caplog):
+        cache = ResponseCache(tmp_path, ttl=60, max_size=1024)
+        cache.path("http://api/a").write_text("{")
+        assert cache.get("http://api/a") is None
+        assert "Unable to read cached response of http://api/a" in caplog.text
+
+    def test_unwritable_directory(self, tmp_path, caplog):
+        (tmp_path / "file").write_text("")
+        cache = ResponseCache(tmp_path / "file", ttl=60, max_size=1024)
+        entry = cache.set("http://api/a", "[]")
+        assert entry["body"] == "[]"
+        assert "Unable to cache response of http://api/a" in caplog.text
@@ -0,0 +1,245 @@
+import asyncio
+import threading
+from unittest import mock
+
+import pytest
+import redis
+from django.core.cache import cache
+
+from public_holiday.indexes import bump_generation, get_generation
+from public_holiday.search_cache import SearchCache, get_search_cache
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def _search(query, params):
+    return {"hits": [{"q": query, **params}]}
+
+
+class TestGeneration:
+    def test_bump_generation(self):
+        assert get_generation() == 0
+        assert bump_generation() == 1
+        assert bump_generation() == 2
+        assert get_generation() == 2
+
+
+class TestSearchCache:
+    def test_local_tier(self):
+        search = mock.Mock(side_effect=_search)
+        search_cache = SearchCache(maxsize=10, local_ttl=60, ttl=60)
+        first = search_cache.get_or_search("q", {"sort": ["id:asc"]}, search)
+        second = search_cache.get_or_search("q", {"sort": ["id:asc"]}, search)
+        assert first is second
+        search.assert_called_once_with("q", {"sort": ["id:asc"]})
+
+    def test_shared_tier(self):
+        search = mock.Mock(side_effect=_search)
+        SearchCache(maxsize=10, local_ttl=60, ttl=60).get_or_search("q", {}, search)
+        # Another worker process only shares the Redis tier
+        response = SearchCache(maxsize=10, local_ttl=60, ttl=60).get_or_search(
+            "q", {}, search
+        )
+        assert response == _search("q", {})
+        search.assert_called_once()
+
+    def test_local_tier_expiry_and_eviction(self):
+        search = mock.Mock(side_effect=_search)
+        search_cache = SearchCache(maxsize=2, local_ttl=0, ttl=60)
+        search_cache.get_or_search("a", {}, search)
+        with mock.patch.object(search_cache, "_get_shared", return_value=None):
+            search_cache.get_or_search("a", {}, search)
+        assert search.call_count == 2
+
+        search_cache.local_ttl = 60
+        for query in ("a", "b", "c"):
+            search_cache.get_or_search(query, {}, search)
+        assert list(search_cache._local) == [
+            search_cache.key(query, {}) for query in ("b", "c")
+        ]
+
+    def test_generation_invalidates(self):
+        search = mock.Mock(side_effect=_search)
+        search_cache = SearchCache(maxsize=10, local_ttl=60, ttl=60)
+        search_cache.get_or_search("q", {}, search)
+        bump_generation()
+        # The generation is re-read at most once per refresh interval
+        search_cache.get_or_search("q", {}, search)
+        assert search.call_count == 1
+        with mock.patch("public_holiday.search_cache.time.monotonic") as monotonic:
+            monotonic.return_value = 10**9
+            search_cache.get_or_search("q", {}, search)
+        assert search.call_count == 2
+
+    def test_single_flight(self):
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def _slow_search(query, params):
+            calls.append(query)
+            started.set()
+            release.wait(5)
+            return _search(query, params)
+
+        search_cache = SearchCache(maxsize=10, local_ttl=60, ttl=60)
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    search_cache.get_or_search("q", {}, _slow_search)
+                )
+            )
+            for _ in range(5)
+        ]
+        threads[0].start()
+        started.wait(5)
+        # Count followers waiting for the leader's upstream call
+        flight = search_cache._flights[search_cache.key("q", {})]
+        waiting = threading.Semaphore(0)
+        done_wait = flight.done.wait
+        flight.done.wait = lambda: waiting.release() or done_wait()
+        for thread in threads[1:]:
+            thread.start()
+        for _ in threads[1:]:
+            assert waiting.acquire(timeout=5)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        assert calls == ["q"]
+        assert len(results) == 5
+        assert all(result is results[0] for result in results)
+
+    def test_single_flight_error(self):
+        search_cache = SearchCache(maxsize=10, local_ttl=60, ttl=60)
+        key = search_cache.key("q", {})
+        flight = mock.Mock(error=ValueError("Upstream error"))
+        search_cache._flights[key] = flight
+        with pytest.raises(ValueError):
+            search_cache.get_or_search("q", {}, _search)
+        flight.done.wait.assert_called_once()
+
+        del search_cache._flights[key]
+        with pytest.raises(ValueError):
+            search_cache.get_or_search("q", {}, mock.Mock(side_effect=ValueError))
+        assert search_cache._flights == {}
+
+    def test_redis_errors(self, caplog):
+        search = mock.Mock(side_effect=_search)
+        search_cache = SearchCache(maxsize=10, local_ttl=60, ttl=60)
+        error = redis.ConnectionError("Connection refused")
+        with mock.patch("public_holiday.search_cache.cache") as broken_cache:
+            broken_cache.get.side_effect = error
+            broken_cache.set.side_effect = error
+            with mock.patch(
+                "public_holiday.search_cache.get_generation", side_effect=error
+            ):
+                assert search_cache.get_or_search("q", {}, search) == _search("q", {})
+        assert "Unable to read index generation" in caplog.text
+        assert "Unable to read cached search response" in caplog.text
+        assert "Unable to cache search response" in caplog.text
+
+    def test_get_many_or_search(self):
+        multi_search = mock.Mock(
+            side_effect=lambda queries: [_search(*query) for query in queries]
+        )
+        search_cache = SearchCache(maxsize=10, local_ttl=60, ttl=60)
+        search_cache.get_or_search("a", {}, _search)
+        # Only in the shared tier, as if cached by another worker process
+        cache.set(search_cache.key("b", {}), _search("b", {}))
+
+        queries = [("a", {}), ("b", {}), ("c", {"limit": 5}), ("d", {})]
+        responses = search_cache.get_many_or_search(queries, multi_search)
+        assert responses == [_search(*query) for query in queries]
+        multi_search.assert_called_once_with([("c", {"limit": 5}), ("d", {})])
+
+        assert search_cache.get_many_or_search(queries, multi_search) == responses
+        assert multi_search.call_count == 1
+        assert cache.get(search_cache.key("d", {})) == _search("d", {})
+
+    def test_get_many_or_search_redis_errors(self, caplog):
+        search_cache = SearchCache(maxsize=10, local_ttl=60, ttl=60)
+        error = redis.ConnectionError("Connection refused")
+        with mock.patch("public_holiday.search_cache.cache") as broken_cache:
+            broken_cache.get_many.side_effect = error
+            broken_cache.set_many.side_effect = error
+            responses = search_cache.get_many_or_search(
+                [("q", {})], lambda queries: [_search(*query) for query in queries]
+            )
+        assert responses == [_search("q", {})]
+        assert "Unable to read cached search responses" in caplog.text
+        assert "Unable to cache search responses" in caplog.text
+
+    def test_get_search_cache(self):
+        assert get_search_cache() is get_search_cache()
+
+
+async def _asearch(query, params):
+    return _search(query, params)
+
+
+class TestAsyncSearchCache:
+    def test_tiers(self):
+        search = mock.AsyncMock(side_effect=_asearch)
+        search_cache = SearchCache(maxsize=10, local_ttl=60, ttl=60)
+        first = asyncio.run(search_cache.aget_or_search("q", {}, search))
+        second = asyncio.run(search_cache.aget_or_search("q", {}, search))
+        assert first is second
+        # Synchronous and asynchronous paths share keys
+        assert search_cache.get_or_search("q", {}, _search) is first
+        other_worker = SearchCache(maxsize=10, local_ttl=60, ttl=60)
+        assert asyncio.run(other_worker.aget_or_search("q", {}, search)) == first
+        search.assert_awaited_once_with("q", {})
+
+    def test_single_flight(self):
+        search_cache = SearchCache(maxsize=10, local_ttl=60, ttl=60)
+        calls = []
+
+        async def _slow_search(query, params):
+            calls.append(query)
+            await asyncio.sleep(0.01)
+            return _search(query, params)
+
+        async def _gather():
+            return await asyncio.gather(
+                *(search_cache.aget_or_search("q", {}, _slow_search) for _ in range(5))
+            )
+
+        results = asyncio.run(_gather())
+        assert calls == ["q"]
+        assert all(result is results[0] for result in results)
+        assert search_cache._async_flights == {}
+
+    def test_single_flight_error(self):
+        search_cache = SearchCache(maxsize=10, local_ttl=60, ttl=60)
+
+        async def _failing_search(query, params):
+            await asyncio.sleep(0.01)
+            raise ValueError("Upstream error")
+
+        async def _gather():
+            return await asyncio.gather(
+                *(
+                    search_cache.aget_or_search("q", {}, _failing_search)
+                    for _ in range(2)
+                ),
+                return_exceptions=True,
+            )
+
+        errors = asyncio.run(_gather())
+        assert [type(error) for error in errors] == [ValueError, ValueError]
+        assert search_cache._async_flights == {}
+
+    def test_generation_redis_error(self, caplog):
+        search_cache = SearchCache(maxsize=10, local_ttl=60, ttl=60)
+        with mock.patch(
+            "public_holiday.search_cache.get_generation",
+            side_effect=redis.ConnectionError("Connection refused"),
+        ):
+            assert asyncio.run(search_cache.ageneration()) is None
+        assert "Unable to read index generation" in caplog.text
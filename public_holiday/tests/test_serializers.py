@@ -0,0 +1,50 @@
+import datetime
+
+import pytest
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from public_holiday.models import PublicHoliday
+from public_holiday.serializers import (
+    PublicholidaySerializer,
+    ValuesSerializer,
+    publicholiday_values,
+)
+from public_holiday.tests.factories import PublicHolidayFactory
+
+
+@pytest.mark.django_db
+class TestValuesSerializer:
+    def test_output_is_identical_to_serializer(self):
+        PublicHolidayFactory.create_batch(20)
+        PublicHolidayFactory(
+            name='Fête "nationale"', local_name="Fête nationale", country="FR"
+        )
+        PublicHolidayFactory(date=datetime.date(1, 1, 1), local_name="圣诞节")
+        queryset = PublicHoliday.objects.order_by("id")
+        rows = queryset.values_list(*publicholiday_values.fields)
+
+        renderer = JSONRenderer()
+        expected = renderer.render(PublicholidaySerializer(queryset, many=True).data)
+        assert renderer.render(publicholiday_values.serialize(rows)) == expected
+
+    def test_fields_follow_serializer(self):
+        assert publicholiday_values.fields == tuple(PublicholidaySerializer().fields)
+
+    def test_custom_formats_fall_back_to_fields(self):
+        class Serializer(serializers.ModelSerializer):
+            date = serializers.DateField(format="%d/%m/%Y")
+            year = serializers.DecimalField(
+                source="id", max_digits=6, decimal_places=1
+            )
+
+            class Meta:
+                model = PublicHoliday
+                fields = ("date", "year", "country")
+
+        values = ValuesSerializer(Serializer)
+        assert values.to_representation((datetime.date(2023, 12, 25), 2023, "IT")) == {
+            "date": "25/12/2023",
+            "year": "2023.0",
+            "country": "IT",
+        }
@@ -1,13 +1,44 @@
-from unittest.mock import MagicMock, patch
-
-from meilisearch.errors import MeilisearchApiError
+import asyncio
+import csv
+import datetime
+import io
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from asgiref.sync import sync_to_async
+from meilisearch.errors import (
+    MeilisearchApiError,
+    MeilisearchCommunicationError,
+    MeilisearchTimeoutError,
+)
 import pytest
+from django.core.cache import cache
+from django.db import connections
+from django.test import AsyncClient, override_settings
 from django.utils import timezone
+from prometheus_client import REGISTRY
 from rest_framework import status
 from rest_framework.test import APIClient
 
 from .factories import PublicHolidayFactory, MockResponse
+from public_holiday.clients import reset_clients
+from public_holiday.indexes import bump_generation
+from public_holiday.renderers import RawJSON
+from public_holiday.resilience import get_breaker
 from public_holiday.serializers import PublicholidaySerializer
+from public_holiday.search_cache import get_search_cache
+from public_holiday.views import PublicHolidayList
+
+
+@pytest.fixture(autouse=True)
+def _clear_search_cache():
+    cache.clear()
+    get_search_cache().clear()
+    get_breaker.cache_clear()
+    yield
+    cache.clear()
+    get_search_cache().clear()
+    get_breaker.cache_clear()
 
 
 @pytest.mark.django_db
@@ -40,6 +71,148 @@ class TestPublicHolidayAPI:
         for model in response_dict["results"]:
             assert model["id"] in batch_ids
 
+    def test_public_holiday_list_filters(self):
+        italian = PublicHolidayFactory(country="IT", date=datetime.date(2023, 12, 25))
+        PublicHolidayFactory(country="IT", date=datetime.date(2022, 12, 25))
+        french = PublicHolidayFactory(country="FR", date=datetime.date(2023, 7, 14))
+        client = APIClient()
+
+        response = client.get("/public_holiday/", {"year": 2023})
+        assert response.json()["count"] == 2
+        response = client.get(
+            "/public_holiday/", {"country": ["IT", "FR"], "date_from": "2023-01-01"}
+        )
+        assert [model["id"] for model in response.json()["results"]] == [
+            italian.id,
+            french.id,
+        ]
+        response = client.get(
+            "/public_holiday/",
+            {"country": "FR", "date_to": "2023-07-14", "cursor": ""},
+        )
+        assert [model["id"] for model in response.json()["results"]] == [french.id]
+
+        response = client.get("/public_holiday/", {"year": "next"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_public_holiday_list_cursor(self):
+        batch = PublicHolidayFactory.create_batch(3)
+        client = APIClient()
+        response = client.get("/public_holiday/", {"cursor": "", "page_size": 2})
+        assert response.status_code == status.HTTP_200_OK
+        response_dict = response.json()
+        assert "count" not in response_dict
+        assert response_dict["previous"] is None
+        assert [model["id"] for model in response_dict["results"]] == [
+            model.id for model in batch[:2]
+        ]
+
+        response = client.get(response_dict["next"])
+        response_dict = response.json()
+        assert response_dict["next"] is None
+        assert [model["id"] for model in response_dict["results"]] == [batch[2].id]
+
+    def test_public_holiday_list_unpaginated(self):
+        batch = PublicHolidayFactory.create_batch(3)
+        client = APIClient()
+        with patch.object(PublicHolidayList, "pagination_class", None):
+            response = client.get("/public_holiday/")
+        assert [model["id"] for model in response.json()] == [
+            model.id for model in batch
+        ]
+
+    def test_public_holiday_export(self):
+        batch = PublicHolidayFactory.create_batch(3)
+        response = APIClient().get("/public_holiday/export/")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        assert response["Content-Type"] == "application/x-ndjson"
+        assert response["Content-Disposition"] == (
+            'attachment; filename="public_holidays.ndjson"'
+        )
+        lines = b"".join(response.streaming_content).splitlines()
+        assert [json.loads(line)["id"] for line in lines] == [
+            model.id for model in batch
+        ]
+        assert json.loads(lines[0]) == PublicholidaySerializer(batch[0]).data
+
+    def test_public_holiday_export_csv(self):
+        italian = PublicHolidayFactory(country="IT", date=datetime.date(2023, 12, 25))
+        PublicHolidayFactory(country="IT", date=datetime.date(2022, 12, 25))
+        PublicHolidayFactory(country="FR", date=datetime.date(2023, 7, 14))
+        response = APIClient().get(
+            "/public_holiday/export/",
+            {"country": "IT", "date_from": "2023-01-01", "date_to": "2023-12-31"},
+            HTTP_ACCEPT="text/csv",
+        )
+        assert response["Content-Type"] == "text/csv; charset=utf-8"
+        content = b"".join(response.streaming_content).decode()
+        data = PublicholidaySerializer(italian).data
+        assert list(csv.DictReader(io.StringIO(content))) == [
+            {key: str(value) for key, value in data.items()}
+        ]
+
+        response = APIClient().get(
+            "/public_holiday/export/", {"format": "csv", "year": [2022, 2023]}
+        )
+        assert len(b"".join(response.streaming_content).splitlines()) == 4
+
+    def test_public_holiday_export_invalid_filters(self):
+        response = APIClient().get("/public_holiday/export/", {"country": "XX"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "country" in json.loads(response.content)
+
+    def test_public_holiday_list_not_modified(
+        self, django_assert_num_queries, django_capture_on_commit_callbacks
+    ):
+        model = PublicHolidayFactory()
+        client = APIClient()
+        response = client.get("/public_holiday/")
+        etag = response["ETag"]
+        assert "Accept" in response["Vary"]
+
+        # Answered without reading the database
+        with django_assert_num_queries(0):
+            response = client.get("/public_holiday/", HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response["ETag"] == etag
+        response = client.get(
+            "/public_holiday/", HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        # Other pages have their own validators
+        response = client.get("/public_holiday/?page=1", HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+
+        # Committed changes invalidate validators
+        with patch("public_holiday.receivers.get_outbox"), patch(
+            "public_holiday.conditional.time.time", return_value=2e9
+        ), django_capture_on_commit_callbacks(execute=True):
+            model.save()
+        response = client.get("/public_holiday/", HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"] != etag
+
+    def test_public_holiday_detail_not_modified(self):
+        model = PublicHolidayFactory()
+        client = APIClient()
+        etag = client.get(f"/public_holiday/{model.id}/")["ETag"]
+        response = client.get(f"/public_holiday/{model.id}/", HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        # Errors carry no validators
+        assert "ETag" not in client.get("/public_holiday/0/")
+
+    def test_public_holiday_detail_not_found(self):
+        client = APIClient()
+        assert client.get("/public_holiday/0/").status_code == 404
+        assert client.get("/public_holiday/abc/").status_code == 404
+
+    def test_public_holiday_list_invalid_cursor(self):
+        client = APIClient()
+        response = client.get("/public_holiday/", {"cursor": "invalid"})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
     def test_public_holiday_detail_success(self):
         today = timezone.now().date()
         model = PublicHolidayFactory(
@@ -55,12 +228,11 @@ class TestPublicHolidayAPI:
         assert response_dict["local_name"] == model.local_name
         assert response_dict["country"] == str(model.country)
 
-    @patch("public_holiday.views.meilisearch.Client")
+    @patch("public_holiday.views.get_client")
     def test_search_action(self, MockMeiliSearchClient):
         # Mock the MeiliSearch client
         client_instance = MagicMock()
         client_instance.index.return_value = client_instance
-        client_instance.update_sortable_attributes.return_value = client_instance
         client_instance.search.return_value = {"hits": self.meilisearch_response}
         MockMeiliSearchClient.return_value = client_instance
 
@@ -78,13 +250,10 @@ class TestPublicHolidayAPI:
 
         # Assert the response data
         expected_data = self.meilisearch_response
-        assert response.data == expected_data
+        assert response.json()["results"] == expected_data
 
         # Assert the MeiliSearch client calls
         client_instance.index.assert_called_with("public_holiday")
-        client_instance.update_sortable_attributes.assert_called_with(
-            list(PublicholidaySerializer().fields)
-        )
         # Assert proper args are passed to the search method
         args, _ = client_instance.search.call_args
         assert args[0] == "query"
@@ -99,12 +268,11 @@ class TestPublicHolidayAPI:
         assert "country" in attributes_to_retrieve
         assert "name" in attributes_to_retrieve
 
-    @patch("public_holiday.views.meilisearch.Client")
+    @patch("public_holiday.views.get_client")
     def test_search_action_duplicate_fields(self, MockMeiliSearchClient):
         # Mock the MeiliSearch client
         client_instance = MagicMock()
         client_instance.index.return_value = client_instance
-        client_instance.update_sortable_attributes.return_value = client_instance
         client_instance.search.return_value = {"hits": self.meilisearch_response}
         MockMeiliSearchClient.return_value = client_instance
 
@@ -126,13 +294,10 @@ class TestPublicHolidayAPI:
 
         # Assert the response data
         expected_data = self.meilisearch_response
-        assert response.data == expected_data
+        assert response.json()["results"] == expected_data
 
         # Assert the MeiliSearch client calls
         client_instance.index.assert_called_with("public_holiday")
-        client_instance.update_sortable_attributes.assert_called_with(
-            list(PublicholidaySerializer().fields)
-        )
         # Assert proper args are passed to the search method
         args, _ = client_instance.search.call_args
         assert args[0] == "query"
@@ -147,12 +312,11 @@ class TestPublicHolidayAPI:
         assert "country" in attributes_to_retrieve
         assert "name" in attributes_to_retrieve
 
-    @patch("public_holiday.views.meilisearch.Client")
+    @patch("public_holiday.views.get_client")
     def test_search_action_sort_desc(self, MockMeiliSearchClient):
         # Mock the MeiliSearch client
         client_instance = MagicMock()
         client_instance.index.return_value = client_instance
-        client_instance.update_sortable_attributes.return_value = client_instance
         client_instance.search.return_value = {"hits": self.meilisearch_response}
         MockMeiliSearchClient.return_value = client_instance
 
@@ -171,27 +335,23 @@ class TestPublicHolidayAPI:
 
         # Assert the response data
         expected_data = self.meilisearch_response
-        assert response.data == expected_data
+        assert response.json()["results"] == expected_data
 
         # Assert the MeiliSearch client calls
         client_instance.index.assert_called_with("public_holiday")
-        client_instance.update_sortable_attributes.assert_called_with(
-            list(PublicholidaySerializer().fields)
-        )
         # Assert proper args are passed to the search method
         args, _ = client_instance.search.call_args
         assert args[0] == "query"
         assert type(args[1]) == dict
         assert args[1]["sort"] == ["country:desc"]
 
-    @patch("public_holiday.views.meilisearch.Client")
+    @patch("public_holiday.views.get_client")
     def test_search_action_default_sort_with_invalid_sort_param(
         self, MockMeiliSearchClient
     ):
         # Mock the MeiliSearch client
         client_instance = MagicMock()
         client_instance.index.return_value = client_instance
-        client_instance.update_sortable_attributes.return_value = client_instance
         client_instance.search.return_value = {"hits": self.meilisearch_response}
         MockMeiliSearchClient.return_value = client_instance
 
@@ -210,25 +370,21 @@ class TestPublicHolidayAPI:
 
         # Assert the response data
         expected_data = self.meilisearch_response
-        assert response.data == expected_data
+        assert response.json()["results"] == expected_data
 
         # Assert the MeiliSearch client calls
         client_instance.index.assert_called_with("public_holiday")
-        client_instance.update_sortable_attributes.assert_called_with(
-            list(PublicholidaySerializer().fields)
-        )
         # Assert proper args are passed to the search method
         args, _ = client_instance.search.call_args
         assert args[0] == "query"
         assert type(args[1]) == dict
         assert args[1]["sort"] == ["id:asc"]
 
-    @patch("public_holiday.views.meilisearch.Client")
+    @patch("public_holiday.views.get_client")
     def test_search_action_with_invalid_fields(self, MockMeiliSearchClient):
         # Mock the MeiliSearch client
         client_instance = MagicMock()
         client_instance.index.return_value = client_instance
-        client_instance.update_sortable_attributes.return_value = client_instance
         client_instance.search.return_value = {"hits": self.meilisearch_response}
         MockMeiliSearchClient.return_value = client_instance
 
@@ -245,27 +401,25 @@ class TestPublicHolidayAPI:
 
         # Assert that all fields are included in the response data
         expected_data = self.meilisearch_response
-        assert response.data == expected_data
+        assert response.json()["results"] == expected_data
 
         # Assert the MeiliSearch client calls
         client_instance.index.assert_called_with("public_holiday")
-        client_instance.update_sortable_attributes.assert_called_with(
-            list(PublicholidaySerializer().fields)
-        )
         client_instance.search.assert_called_with(
             "",
             {
                 "sort": ["id:asc"],
                 "attributesToRetrieve": ["*"],
+                "offset": 0,
+                "limit": 10,
             },
         )
 
-    @patch("public_holiday.views.meilisearch.Client")
+    @patch("public_holiday.views.get_client")
     def test_search_action_with_error(self, MockMeiliSearchClient):
         # Mock the MeiliSearch client to raise an error
         client_instance = MagicMock()
         client_instance.index.return_value = client_instance
-        client_instance.update_sortable_attributes.return_value = client_instance
         mock_response = MockResponse("", 500, error="Server Error")
         client_instance.search.side_effect = MeilisearchApiError(
             "An error occurred.", mock_response
@@ -289,13 +443,579 @@ class TestPublicHolidayAPI:
 
         # Assert the MeiliSearch client calls
         client_instance.index.assert_called_with("public_holiday")
-        client_instance.update_sortable_attributes.assert_called_with(
-            list(PublicholidaySerializer().fields)
-        )
         client_instance.search.assert_called_with(
             "query",
             {
                 "sort": ["id:asc"],
                 "attributesToRetrieve": ["*"],
+                "offset": 0,
+                "limit": 10,
+            },
+        )
+
+    @patch("public_holiday.views.get_client")
+    def test_search_action_cached(self, MockMeiliSearchClient):
+        client_instance = MagicMock()
+        client_instance.index.return_value = client_instance
+        client_instance.search.return_value = {"hits": self.meilisearch_response}
+        MockMeiliSearchClient.return_value = client_instance
+
+        api_client = APIClient()
+        params = {"q": "query", "sort": "-date", "fields": ["name", "date"]}
+        first = api_client.get("/public_holiday/search/", params)
+        # Same normalized query, fields order does not matter
+        params["fields"] = ["date", "name", "date"]
+        second = api_client.get("/public_holiday/search/", params)
+
+        assert first.content == second.content
+        assert first.json()["results"] == self.meilisearch_response
+        client_instance.search.assert_called_once_with(
+            "query",
+            {
+                "sort": ["date:desc"],
+                "attributesToRetrieve": ["date", "name"],
+                "offset": 0,
+                "limit": 10,
+            },
+        )
+
+        # Reindexing invalidates cached responses
+        bump_generation()
+        get_search_cache().clear()
+        api_client.get("/public_holiday/search/", params)
+        assert client_instance.search.call_count == 2
+
+    @patch("public_holiday.views.get_client")
+    def test_search_action_passthrough(self, MockMeiliSearchClient):
+        client_instance = MagicMock()
+        client_instance.index.return_value = client_instance
+        client_instance.search.return_value = {"hits": self.meilisearch_response}
+        MockMeiliSearchClient.return_value = client_instance
+
+        api_client = APIClient()
+        response = api_client.get("/public_holiday/search/", {"q": "query"})
+        # Hits are cached already encoded
+        assert isinstance(response.data["results"], RawJSON)
+        assert response.json()["results"] == self.meilisearch_response
+
+        with override_settings(SEARCH_PASSTHROUGH=False):
+            response = api_client.get("/public_holiday/search/", {"q": "query"})
+        assert response.data["results"] == self.meilisearch_response
+        # Passthrough and decoded responses are cached apart
+        assert client_instance.search.call_count == 2
+
+    @patch("public_holiday.views.get_client")
+    def test_search_action_does_not_update_settings(self, MockMeiliSearchClient):
+        client_instance = MagicMock()
+        client_instance.index.return_value = client_instance
+        client_instance.search.return_value = {"hits": self.meilisearch_response}
+        MockMeiliSearchClient.return_value = client_instance
+
+        response = APIClient().get("/public_holiday/search/", {"sort": "-date"})
+        assert response.status_code == 200
+        # Settings are applied by sync_meilisearch_settings, not per search
+        assert not client_instance.update_sortable_attributes.called
+        assert not client_instance.update_settings.called
+
+    @patch("public_holiday.views.get_client")
+    def test_search_action_not_modified(self, MockMeiliSearchClient):
+        client_instance = MagicMock()
+        client_instance.index.return_value = client_instance
+        client_instance.search.return_value = {"hits": self.meilisearch_response}
+        MockMeiliSearchClient.return_value = client_instance
+
+        api_client = APIClient()
+        etag = api_client.get("/public_holiday/search/", {"q": "query"})["ETag"]
+        get_search_cache().clear()
+        response = api_client.get(
+            "/public_holiday/search/", {"q": "query"}, HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        # Answered without asking MeiliSearch (nor the cache)
+        client_instance.search.assert_called_once()
+
+        # Reindexing invalidates validators
+        bump_generation()
+        get_search_cache().clear()
+        response = api_client.get(
+            "/public_holiday/search/", {"q": "query"}, HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+    @patch("public_holiday.views.get_client")
+    def test_search_action_fallback(self, MockMeiliSearchClient, caplog):
+        client_instance = MagicMock()
+        client_instance.index.return_value = client_instance
+        client_instance.search.side_effect = MeilisearchCommunicationError(
+            "Connection refused"
+        )
+        MockMeiliSearchClient.return_value = client_instance
+        christmas = PublicHolidayFactory(
+            name="Christmas", local_name="Natale", country="IT"
+        )
+        PublicHolidayFactory(name="Christmas", local_name="Noël", country="FR")
+        PublicHolidayFactory(name="Easter", local_name="Pasqua", country="IT")
+
+        api_client = APIClient()
+        params = {"q": "christ", "country": "IT", "fields": ["name"]}
+        response = api_client.get("/public_holiday/search/", params)
+        assert response.status_code == 200
+        assert response.json()["results"] == [{"name": "Christmas"}]
+        assert response.json()["estimatedTotalHits"] == 1
+        assert "MeiliSearch is unavailable" in caplog.text
+        # Fallback responses are not revalidated, the breaker is still closed
+        assert "ETag" not in response
+        assert "Last-Modified" not in response
+
+        response = api_client.get("/public_holiday/search/", {"q": "natale"})
+        assert response.json()["results"][0]["id"] == christmas.id
+
+    def test_search_action_circuit_open(self, caplog):
+        # Clients hold the breaker they were built with
+        reset_clients()
+        breaker = get_breaker()
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+        PublicHolidayFactory(name="Christmas", local_name="Natale")
+
+        # The pooled client fails fast, without any request to MeiliSearch
+        with patch("requests.Session.send") as send:
+            response = APIClient().get("/public_holiday/search/", {"q": "natale"})
+        send.assert_not_called()
+        assert response.status_code == 200
+        assert len(response.json()["results"]) == 1
+        assert "MeiliSearch is unavailable" not in caplog.text
+
+    @patch("public_holiday.views.get_client")
+    def test_search_action_metrics(self, MockMeiliSearchClient):
+        client_instance = MagicMock()
+        client_instance.index.return_value = client_instance
+        client_instance.search.return_value = {
+            "hits": self.meilisearch_response,
+            "processingTimeMs": 3,
+        }
+        MockMeiliSearchClient.return_value = client_instance
+
+        def phases():
+            return {
+                phase: REGISTRY.get_sample_value(
+                    "search_phase_seconds_count",
+                    {"endpoint": "search", "phase": phase},
+                )
+                or 0
+                for phase in ("validation", "lookup", "meilisearch", "rendering")
+            }
+
+        before = phases()
+        processing = (
+            REGISTRY.get_sample_value(
+                "meilisearch_processing_seconds_count", {"endpoint": "search"}
+            )
+            or 0
+        )
+        api_client = APIClient()
+        api_client.get("/public_holiday/search/", {"q": "query"})
+        # Served by the cache, MeiliSearch is not asked again
+        api_client.get("/public_holiday/search/", {"q": "query"})
+
+        after = phases()
+        assert after["validation"] == before["validation"] + 2
+        assert after["lookup"] == before["lookup"] + 2
+        assert after["rendering"] == before["rendering"] + 2
+        assert after["meilisearch"] == before["meilisearch"] + 1
+        assert REGISTRY.get_sample_value(
+            "meilisearch_processing_seconds_count", {"endpoint": "search"}
+        ) == (processing + 1)
+
+    def test_public_holiday_list_metrics(self):
+        PublicHolidayFactory.create_batch(3)
+        labels = {"endpoint": "list"}
+        count = REGISTRY.get_sample_value("db_queries_count", labels) or 0
+        queries = REGISTRY.get_sample_value("db_queries_sum", labels) or 0
+
+        APIClient().get("/public_holiday/")
+
+        assert REGISTRY.get_sample_value("db_queries_count", labels) == count + 1
+        # Count and page queries
+        assert REGISTRY.get_sample_value("db_queries_sum", labels) == queries + 2
+
+    def test_metrics(self):
+        get_breaker()
+        APIClient().get("/public_holiday/")
+        response = APIClient().get("/metrics")
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain")
+        assert b'db_queries_count{endpoint="list"}' in response.content
+        assert b'circuit_breaker_state{name="meilisearch",state="closed"}' in (
+            response.content
+        )
+
+    def test_meilisearch_health(self):
+        response = APIClient().get("/health/meilisearch/")
+        assert response.status_code == 200
+        assert response.json()["state"] == "closed"
+        get_breaker().record_failure()
+        response = APIClient().get("/health/meilisearch/")
+        assert response.json()["failures"] == 1
+
+    @patch("public_holiday.views.get_client")
+    @pytest.mark.parametrize(
+        "error, status_code",
+        [
+            (MeilisearchApiError("Bad Gateway", MockResponse("", 502)), 200),
+            (MeilisearchTimeoutError("Read timed out"), 200),
+            (MeilisearchApiError("An error occurred.", MockResponse("", 500)), 500),
+        ],
+    )
+    def test_search_action_fallback_statuses(
+        self, MockMeiliSearchClient, error, status_code
+    ):
+        client_instance = MagicMock()
+        client_instance.index.return_value = client_instance
+        client_instance.search.side_effect = error
+        MockMeiliSearchClient.return_value = client_instance
+
+        response = APIClient().get("/public_holiday/search/", {"q": "query"})
+        assert response.status_code == status_code
+
+    @override_settings(SEARCH_FALLBACK=False)
+    @patch("public_holiday.views.get_client")
+    def test_search_action_fallback_disabled(self, MockMeiliSearchClient):
+        client_instance = MagicMock()
+        client_instance.index.return_value = client_instance
+        client_instance.search.side_effect = MeilisearchCommunicationError("")
+        MockMeiliSearchClient.return_value = client_instance
+
+        response = APIClient().get("/public_holiday/search/", {"q": "query"})
+        assert response.status_code == 500
+
+    @patch("public_holiday.views.get_client")
+    def test_multi_search_fallback(self, MockMeiliSearchClient):
+        client_instance = MagicMock()
+        client_instance.multi_search.side_effect = MeilisearchCommunicationError("")
+        MockMeiliSearchClient.return_value = client_instance
+        PublicHolidayFactory(name="Christmas", local_name="Natale", country="IT")
+        PublicHolidayFactory(name="Easter", local_name="Pasqua", country="IT")
+
+        response = APIClient().post(
+            "/public_holiday/multi_search/",
+            {"queries": [{"q": "easter"}, {"q": "", "page": 1, "hitsPerPage": 1}]},
+            format="json",
+        )
+
+        assert response.status_code == 200
+        first, second = response.json()["results"]
+        assert [hit["name"] for hit in first["results"]] == ["Easter"]
+        assert second["totalHits"] == 2
+        assert second["totalPages"] == 2
+
+    @patch("public_holiday.views.get_client")
+    def test_search_action_paginated(self, MockMeiliSearchClient):
+        client_instance = MagicMock()
+        client_instance.index.return_value = client_instance
+        client_instance.search.return_value = {
+            "hits": self.meilisearch_response,
+            "totalHits": 4,
+            "totalPages": 2,
+        }
+        MockMeiliSearchClient.return_value = client_instance
+
+        api_client = APIClient()
+        response = api_client.get(
+            "/public_holiday/search/", {"q": "query", "page": 2, "hitsPerPage": 2}
+        )
+
+        assert response.status_code == 200
+        assert response.json()["totalHits"] == 4
+        assert response.json()["results"] == self.meilisearch_response
+        assert response.json()["next"] is None
+        assert response.json()["previous"].endswith("hitsPerPage=2&page=1&q=query")
+        client_instance.search.assert_called_once_with(
+            "query",
+            {
+                "sort": ["id:asc"],
+                "attributesToRetrieve": ["*"],
+                "page": 2,
+                "hitsPerPage": 2,
+            },
+        )
+
+
+    @patch("public_holiday.views.get_client")
+    def test_multi_search_action(self, MockMeiliSearchClient):
+        client_instance = MagicMock()
+        client_instance.multi_search.return_value = {
+            "results": [
+                {"hits": self.meilisearch_response[:1], "estimatedTotalHits": 20},
+                {"hits": [], "totalHits": 0, "totalPages": 0},
+            ]
+        }
+        MockMeiliSearchClient.return_value = client_instance
+
+        api_client = APIClient()
+        queries = [
+            {"q": "carnevale", "fields": ["name", "date"], "limit": 5},
+            {"sort": "-date", "page": 2},
+        ]
+        response = api_client.post(
+            "/public_holiday/multi_search/", {"queries": queries}, format="json"
+        )
+
+        assert response.status_code == 200
+        first, second = response.data["results"]
+        assert first["results"] == self.meilisearch_response[:1]
+        assert first["next"] == (
+            "http://testserver/public_holiday/search/"
+            + "?fields=name&fields=date&limit=5&offset=5&q=carnevale"
+        )
+        assert second["results"] == []
+        assert second["page"] == 2
+        client_instance.multi_search.assert_called_once_with(
+            [
+                {
+                    "indexUid": "public_holiday",
+                    "q": "carnevale",
+                    "sort": ["id:asc"],
+                    "attributesToRetrieve": ["date", "name"],
+                    "offset": 0,
+                    "limit": 5,
+                },
+                {
+                    "indexUid": "public_holiday",
+                    "q": "",
+                    "sort": ["date:desc"],
+                    "attributesToRetrieve": ["*"],
+                    "page": 2,
+                    "hitsPerPage": 10,
+                },
+            ]
+        )
+
+        # Cached queries are not sent again
+        response = api_client.post(
+            "/public_holiday/multi_search/", {"queries": queries}, format="json"
+        )
+        assert response.data["results"] == [first, second]
+        assert client_instance.multi_search.call_count == 1
+
+    @pytest.mark.parametrize(
+        "body",
+        [{}, {"queries": []}, {"queries": ["query"]}, {"queries": [{}] * 21}],
+    )
+    def test_multi_search_action_invalid(self, body):
+        response = APIClient().post(
+            "/public_holiday/multi_search/", body, format="json"
+        )
+        assert response.status_code == 400
+
+    @patch("public_holiday.views.get_client")
+    def test_multi_search_action_with_error(self, MockMeiliSearchClient):
+        client_instance = MagicMock()
+        client_instance.multi_search.side_effect = MeilisearchApiError(
+            "An error occurred.", MockResponse("", 500)
+        )
+        MockMeiliSearchClient.return_value = client_instance
+
+        response = APIClient().post(
+            "/public_holiday/multi_search/", {"queries": [{}]}, format="json"
+        )
+
+        assert response.status_code == 500
+        assert response.data == {
+            "detail": "Error while fetching data from meilisarch"
+        }
+
+
+    @patch("public_holiday.views.get_client")
+    def test_search_action_filters_and_facets(self, MockMeiliSearchClient):
+        client_instance = MagicMock()
+        client_instance.index.return_value = client_instance
+        facet_distribution = {"country": {"IT": 2}, "year": {"2023": 2}}
+        client_instance.search.return_value = {
+            "hits": self.meilisearch_response,
+            "estimatedTotalHits": 2,
+            "facetDistribution": facet_distribution,
+        }
+        MockMeiliSearchClient.return_value = client_instance
+
+        response = APIClient().get(
+            "/public_holiday/search/",
+            {
+                "country": ["IT", "FR", "IT"],
+                "year": [2023],
+                "date_from": "2023-01-01",
+                "date_to": "2023-12-31",
+                "facets": ["year", "country"],
+            },
+        )
+
+        assert response.status_code == 200
+        assert response.json()["facetDistribution"] == facet_distribution
+        client_instance.search.assert_called_once_with(
+            "",
+            {
+                "sort": ["id:asc"],
+                "attributesToRetrieve": ["*"],
+                "offset": 0,
+                "limit": 10,
+                "filter": [
+                    'country IN ["FR", "IT"]',
+                    "year IN [2023]",
+                    "timestamp >= 1672531200",
+                    "timestamp <= 1703980800",
+                ],
+                "facets": ["country", "year"],
+            },
+        )
+
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {"country": "XX"},
+            {"year": "last"},
+            {"date_from": "yesterday"},
+            {"date_from": "2023-12-31", "date_to": "2023-01-01"},
+            {"facets": "name"},
+        ],
+    )
+    @patch("public_holiday.views.get_client")
+    def test_search_action_invalid_filters(self, MockMeiliSearchClient, params):
+        response = APIClient().get("/public_holiday/search/", params)
+        assert response.status_code == 400
+        assert not MockMeiliSearchClient.called
+
+        response = APIClient().post(
+            "/public_holiday/multi_search/", {"queries": [params]}, format="json"
+        )
+        assert response.status_code == 400
+
+
+@patch("public_holiday.views.get_async_client")
+class TestAsyncSearch:
+    meilisearch_response = TestPublicHolidayAPI.meilisearch_response
+
+    def test_async_search(self, MockAsyncClient):
+        client_instance = MockAsyncClient.return_value
+        client_instance.search = AsyncMock(
+            return_value={
+                "hits": self.meilisearch_response,
+                "estimatedTotalHits": 12,
+            }
+        )
+
+        response = asyncio.run(
+            AsyncClient().get(
+                "/public_holiday/search/async/",
+                {"q": "query", "sort": "-date", "fields": ["name", "date"], "limit": 5},
+            )
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["results"] == self.meilisearch_response
+        assert data["estimatedTotalHits"] == 12
+        assert data["next"].endswith("limit=5&offset=5&q=query&sort=-date")
+        client_instance.search.assert_awaited_once_with(
+            "public_holiday",
+            "query",
+            {
+                "sort": ["date:desc"],
+                "attributesToRetrieve": ["date", "name"],
+                "offset": 0,
+                "limit": 5,
             },
         )
+
+    @patch("public_holiday.views.get_client")
+    def test_async_search_same_response(self, MockMeiliSearchClient, MockAsyncClient):
+        meilisearch_response = {
+            "hits": self.meilisearch_response,
+            "estimatedTotalHits": len(self.meilisearch_response),
+        }
+        MockMeiliSearchClient.return_value.index.return_value.search.return_value = (
+            meilisearch_response
+        )
+        MockAsyncClient.return_value.search = AsyncMock(
+            return_value=meilisearch_response
+        )
+        params = {"q": "query", "limit": 20}
+
+        response = APIClient().get("/public_holiday/search/", params)
+        async_response = asyncio.run(
+            AsyncClient().get("/public_holiday/search/async/", params)
+        )
+        assert async_response.content == response.content
+        assert async_response["Content-Type"] == response["Content-Type"]
+
+    def test_async_search_not_modified(self, MockAsyncClient):
+        client_instance = MockAsyncClient.return_value
+        client_instance.search = AsyncMock(
+            return_value={"hits": self.meilisearch_response}
+        )
+
+        response = asyncio.run(
+            AsyncClient().get("/public_holiday/search/async/", {"q": "query"})
+        )
+        assert "Last-Modified" in response
+        get_search_cache().clear()
+        response = asyncio.run(
+            AsyncClient().get(
+                "/public_holiday/search/async/",
+                {"q": "query"},
+                headers={"If-None-Match": response["ETag"]},
+            )
+        )
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        # Answered without asking MeiliSearch (nor the cache)
+        client_instance.search.assert_awaited_once()
+
+    def test_async_search_invalid_filters(self, MockAsyncClient):
+        response = asyncio.run(
+            AsyncClient().get("/public_holiday/search/async/", {"country": "XX"})
+        )
+        assert response.status_code == 400
+        assert "country" in response.json()
+        assert not MockAsyncClient.called
+
+    @pytest.mark.parametrize(
+        "error",
+        [
+            MeilisearchApiError("An error occurred.", MockResponse("", 500)),
+            MeilisearchCommunicationError("Connection refused"),
+            MeilisearchTimeoutError("Latency budget exceeded"),
+        ],
+    )
+    @override_settings(SEARCH_FALLBACK=False)
+    def test_async_search_with_error(self, MockAsyncClient, error):
+        MockAsyncClient.return_value.search = AsyncMock(side_effect=error)
+
+        response = asyncio.run(AsyncClient().get("/public_holiday/search/async/"))
+
+        assert response.status_code == 500
+        assert response.json() == {
+            "detail": "Error while fetching data from meilisarch"
+        }
+
+    @pytest.mark.django_db(transaction=True)
+    def test_async_search_fallback(self, MockAsyncClient):
+        MockAsyncClient.return_value.search = AsyncMock(
+            side_effect=MeilisearchCommunicationError("Connection refused")
+        )
+        model = PublicHolidayFactory(name="Christmas", local_name="Natale")
+        PublicHolidayFactory(name="Easter", local_name="Pasqua")
+
+        response = asyncio.run(
+            AsyncClient().get("/public_holiday/search/async/", {"q": "nat"})
+        )
+
+        assert response.status_code == 200
+        assert [hit["id"] for hit in response.json()["results"]] == [model.id]
+        # Fallback responses are not revalidated
+        assert "ETag" not in response
+
+        response = asyncio.run(
+            AsyncClient().get("/public_holiday/search/async/", {"q": "pasqua"})
+        )
+        assert len(response.json()["results"]) == 1
+        # Database connections of the thread running synchronous code
+        asyncio.run(sync_to_async(connections.close_all)())
@@ -1,15 +1,242 @@
-import meilisearch
-from django.conf import settings
+import calendar
+import functools
+import json
+import logging
+import operator
+
+import orjson
+from asgiref.sync import sync_to_async
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, extend_schema
-from meilisearch.errors import MeilisearchApiError
-from rest_framework import viewsets
+from django.conf import settings
+from django.db.models import Q
+from django.http import HttpResponse, JsonResponse, QueryDict, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.http import urlencode
+from meilisearch.errors import (
+    MeilisearchApiError,
+    MeilisearchCommunicationError,
+    MeilisearchTimeoutError,
+)
+from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.generics import get_object_or_404
+from rest_framework.request import Request
 from rest_framework.response import Response
-from rest_framework.exceptions import APIException
 
+from . import fallback
+from .clients import get_async_client, get_client
+from .conditional import (
+    TABLE_MARKER,
+    aconditional,
+    conditional,
+    index_marker,
+    skip_validators,
+)
+from .indexes import INDEX_NAME, MODEL_FIELDS
+from .metrics import (
+    observe_processing_time,
+    render_metrics,
+    search_phase,
+    track_queries,
+)
 from .models import PublicHoliday
-from .serializers import PublicholidaySerializer
+from .pagination import PublicHolidayPagination, SearchPagination
+from .renderers import CSVRenderer, NDJSONRenderer, ORJSONRenderer, RawJSON
+from .resilience import CircuitOpenError, get_breaker, is_unavailable
+from .search_cache import get_search_cache
+from .serializers import (
+    SEARCH_FACETS,
+    MultiSearchSerializer,
+    PublicholidaySerializer,
+    SearchFilterSerializer,
+    publicholiday_values,
+)
+
+logger = logging.getLogger(__name__)
+
+# Errors of a failed MeiliSearch call
+MEILISEARCH_ERRORS = (
+    MeilisearchApiError,
+    MeilisearchCommunicationError,
+    MeilisearchTimeoutError,
+)
+
+# Filter parameters of the search, export and list actions
+FILTER_PARAMETERS = [
+    OpenApiParameter("country", OpenApiTypes.STR, OpenApiParameter.QUERY, many=True),
+    OpenApiParameter("year", OpenApiTypes.INT, OpenApiParameter.QUERY, many=True),
+    OpenApiParameter("date_from", OpenApiTypes.DATE, OpenApiParameter.QUERY),
+    OpenApiParameter("date_to", OpenApiTypes.DATE, OpenApiParameter.QUERY),
+]
+
+
+def _search(query, params):
+    with search_phase("search", "meilisearch"):
+        response = get_client().index(INDEX_NAME).search(query, params)
+    observe_processing_time("search", response)
+    return response
+
+
+def _search_passthrough(query, params):
+    """
+    Search whose hits are encoded once, then cached and rendered as they are.
+    """
+    response = _search(query, params)
+    return {**response, "hits": RawJSON(orjson.dumps(response["hits"]))}
+
+
+async def _asearch(query, params):
+    with search_phase("async_search", "meilisearch"):
+        response = await get_async_client().search(INDEX_NAME, query, params)
+    observe_processing_time("async_search", response)
+    return response
+
+
+def _multi_search(queries):
+    with search_phase("multi_search", "meilisearch"):
+        results = get_client().multi_search(
+            [
+                {"indexUid": INDEX_NAME, "q": query, **params}
+                for query, params in queries
+            ]
+        )["results"]
+    for response in results:
+        observe_processing_time("multi_search", response)
+    return results
+
+
+def _fallback_search(query, params, query_params):
+    """
+    Search of the fallback engine, filtered by the filters of query_params.
+    """
+    serializer = SearchFilterSerializer(data=query_params)
+    serializer.is_valid(raise_exception=True)
+    return fallback.search(query, params, _queryset_filter(serializer.validated_data))
+
+
+def _search_or_fallback(endpoint, search, fallback_search):
+    """
+    Return search(), or fallback_search() while MeiliSearch is unavailable.
+    """
+    with search_phase(endpoint, "lookup"):
+        try:
+            return search()
+        except MEILISEARCH_ERRORS as e:
+            _check_fallback(e)
+        with search_phase(endpoint, "fallback"):
+            return fallback_search()
+
+
+async def _asearch_or_fallback(endpoint, search, fallback_search):
+    """
+    Asynchronous counterpart of _search_or_fallback, search is awaited.
+    """
+    with search_phase(endpoint, "lookup"):
+        try:
+            return await search()
+        except MEILISEARCH_ERRORS as e:
+            _check_fallback(e)
+        with search_phase(endpoint, "fallback"):
+            return await sync_to_async(fallback_search)()
+
+
+def _check_fallback(error):
+    # Re-raise errors the fallback engine is not meant to hide
+    if not settings.SEARCH_FALLBACK or not is_unavailable(error):
+        raise error
+    # The circuit breaker already reported MeiliSearch failures
+    if not isinstance(error, CircuitOpenError):
+        logger.warning("MeiliSearch is unavailable, searching the database instead")
+
+
+def _search_params(query_params, paginator):
+    """
+    Validated MeiliSearch query and search parameters of a search request.
+    """
+    # Get fields parameter, cast to set to get unique elements
+    fields = set(query_params.getlist("fields", []))
+
+    # Validate fields parameter, if not valid all the fields would be included
+    attributes_to_retrieve = (
+        sorted(fields)
+        if fields.issubset(set(MODEL_FIELDS)) and len(fields) > 0
+        else ["*"]
+    )
+
+    # Get query filter parameter
+    query = query_params.get("q", "")
+
+    # Get sort parameter
+    sort_field = query_params.get("sort", "id")
+    sort_order = "asc"
+    # Handle descending order if sort param is prefixed by a dash
+    if sort_field.startswith("-"):
+        sort_field = sort_field[1:]
+        sort_order = "desc"
+
+    # Validate sort parameter,
+    # if validation fails fallback sort value to default
+    if sort_field not in MODEL_FIELDS:
+        sort_field = "id"
+        sort_order = "asc"
+
+    params = {
+        "sort": [f"{sort_field}:{sort_order}"],
+        "attributesToRetrieve": attributes_to_retrieve,
+        **paginator.get_search_params(),
+    }
+
+    # Validate filter and facet parameters, invalid values are rejected
+    # since ignoring them would silently widen results
+    serializer = SearchFilterSerializer(data=query_params)
+    serializer.is_valid(raise_exception=True)
+    filters = serializer.validated_data
+    if filter_expression := _search_filter(filters):
+        params["filter"] = filter_expression
+    if filters.get("facets"):
+        params["facets"] = sorted(set(filters["facets"]))
+    return query, params
+
+
+def _search_filter(filters):
+    """
+    MeiliSearch filter expressions of validated filter parameters.
+    """
+    expressions = []
+    if filters.get("country"):
+        codes = ", ".join(json.dumps(code) for code in sorted(set(filters["country"])))
+        expressions.append(f"country IN [{codes}]")
+    if filters.get("year"):
+        years = ", ".join(str(year) for year in sorted(set(filters["year"])))
+        expressions.append(f"year IN [{years}]")
+    if filters.get("date_from"):
+        timestamp = calendar.timegm(filters["date_from"].timetuple())
+        expressions.append(f"timestamp >= {timestamp}")
+    if filters.get("date_to"):
+        timestamp = calendar.timegm(filters["date_to"].timetuple())
+        expressions.append(f"timestamp <= {timestamp}")
+    return expressions
+
+
+def _queryset_filter(filters):
+    """
+    Database counterpart of _search_filter.
+    """
+    condition = Q()
+    if filters.get("country"):
+        condition &= Q(country__in=set(filters["country"]))
+    if filters.get("year"):
+        # Year lookups are compiled to date ranges, unlike __year__in
+        condition &= functools.reduce(
+            operator.or_, (Q(date__year=year) for year in sorted(set(filters["year"])))
+        )
+    if filters.get("date_from"):
+        condition &= Q(date__gte=filters["date_from"])
+    if filters.get("date_to"):
+        condition &= Q(date__lte=filters["date_to"])
+    return condition
 
 
 class PublicHolidayList(viewsets.ReadOnlyModelViewSet):
@@ -19,6 +246,49 @@ class PublicHolidayList(viewsets.ReadOnlyModelViewSet):
 
     queryset = PublicHoliday.objects.all().order_by("id")
     serializer_class = PublicholidaySerializer
+    pagination_class = PublicHolidayPagination
+
+    # List and detail read values_list rows instead of models, see
+    # ValuesSerializer. Responses carry validators, see conditional
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action not in ("list", "export"):
+            return queryset
+        # Search filters, applied by the database
+        serializer = SearchFilterSerializer(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return queryset.filter(_queryset_filter(serializer.validated_data))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        # Search responses are rendered here to time their rendering
+        if self.action in ("search", "multi_search") and isinstance(
+            response, Response
+        ):
+            with search_phase(self.action, "rendering"):
+                response.render()
+        return response
+
+    @extend_schema(parameters=FILTER_PARAMETERS)
+    @conditional(TABLE_MARKER)
+    @track_queries("list")
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.values_list(*publicholiday_values.fields, named=True)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(publicholiday_values.serialize(page))
+        return Response(publicholiday_values.serialize(rows))
+
+    @conditional(TABLE_MARKER)
+    @track_queries("retrieve")
+    def retrieve(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.values_list(*publicholiday_values.fields)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(rows, **{self.lookup_field: kwargs[lookup_url_kwarg]})
+        return Response(publicholiday_values.to_representation(row))
 
     # Custom action to query meilisearch
 
@@ -27,59 +297,198 @@ class PublicHolidayList(viewsets.ReadOnlyModelViewSet):
             OpenApiParameter("q", OpenApiTypes.STR, OpenApiParameter.QUERY),
             OpenApiParameter("sort", OpenApiTypes.STR, OpenApiParameter.QUERY),
             OpenApiParameter("fields", OpenApiTypes.OBJECT, OpenApiParameter.QUERY),
+            OpenApiParameter("limit", OpenApiTypes.INT, OpenApiParameter.QUERY),
+            OpenApiParameter("offset", OpenApiTypes.INT, OpenApiParameter.QUERY),
+            OpenApiParameter("page", OpenApiTypes.INT, OpenApiParameter.QUERY),
+            OpenApiParameter("hitsPerPage", OpenApiTypes.INT, OpenApiParameter.QUERY),
+            *FILTER_PARAMETERS,
+            OpenApiParameter(
+                "facets",
+                OpenApiTypes.STR,
+                OpenApiParameter.QUERY,
+                many=True,
+                enum=SEARCH_FACETS,
+            ),
         ]
     )
     @action(
         methods=["GET"],
         detail=False,
     )
+    @conditional(
+        index_marker(INDEX_NAME), generation=lambda: get_search_cache().generation()
+    )
     def search(self, request):
+        paginator = SearchPagination(request)
+        with search_phase("search", "validation"):
+            query, params = _search_params(request.query_params, paginator)
+        search, variant = _search, None
+        if settings.SEARCH_PASSTHROUGH and isinstance(
+            request.accepted_renderer, ORJSONRenderer
+        ):
+            search, variant = _search_passthrough, "passthrough"
         try:
-            # Configure MeiliSearch client
-            client = meilisearch.Client(
-                settings.MEILISEARCH_URL, settings.MEILISEARCH_API_KEY
+            # Fetch documents from the cache or MeiliSearch index, from the
+            # database while MeiliSearch is unavailable
+            response = _search_or_fallback(
+                "search",
+                lambda: get_search_cache().get_or_search(
+                    query, params, search, variant
+                ),
+                lambda: _fallback_search(query, params, request.query_params),
             )
-            model_fields = list(PublicholidaySerializer().fields)
-            # Configure index
-            client.index("public_holiday").update_sortable_attributes(
-                model_fields,
+        except MEILISEARCH_ERRORS:
+            raise APIException("Error while fetching data from meilisarch")
+        if isinstance(response, fallback.SearchResponse):
+            # Fallback responses must not validate (or be validated as)
+            # Meilisearch ones, nor follow changes of the table
+            return skip_validators(paginator.get_paginated_response(response))
+        return paginator.get_paginated_response(response)
+
+    @extend_schema(request=MultiSearchSerializer)
+    @action(
+        methods=["POST"],
+        detail=False,
+    )
+    def multi_search(self, request):
+        with search_phase("multi_search", "validation"):
+            paginators, queries, query_params_list = self._multi_search_params(
+                request
             )
-            # Get fields parameter, cast to set to get unique elements
-            fields = set(request.query_params.getlist("fields", []))
-
-            # Validate fields parameter, if not valid all the fields would be included
-            attributes_to_retrieve = (
-                list(fields)
-                if fields.issubset(set(model_fields)) and len(fields) > 0
-                else ["*"]
+        try:
+            # Queries missing from the cache are sent in a single request
+            responses = _search_or_fallback(
+                "multi_search",
+                lambda: get_search_cache().get_many_or_search(queries, _multi_search),
+                lambda: [
+                    _fallback_search(query, params, query_params)
+                    for (query, params), query_params in zip(
+                        queries, query_params_list
+                    )
+                ],
             )
+        except MEILISEARCH_ERRORS:
+            raise APIException("Error while fetching data from meilisarch")
+        return Response(
+            {
+                "results": [
+                    paginator.get_paginated_data(response)
+                    for paginator, response in zip(paginators, responses)
+                ]
+            }
+        )
+
+    def _multi_search_params(self, request):
+        serializer = MultiSearchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        search_url = request.build_absolute_uri(reverse("publicholiday-search"))
 
-            # Get query filter parameter
-            query = request.query_params.get("q", "")
-
-            # Get sort parameter
-            sort_field = request.query_params.get("sort", "id")
-            sort_order = "asc"
-            # Handle descending order if sort param is prefixed by a dash
-            if sort_field.startswith("-"):
-                sort_field = sort_field[1:]
-                sort_order = "desc"
-
-            # Validate sort parameter,
-            # if validation fails fallback sort value to default
-            if sort_field not in model_fields:
-                sort_field = "id"
-                sort_order = "asc"
-
-            # Fetch documents from MeiliSearch index
-            response = client.index("public_holiday").search(
-                query,
-                {
-                    "sort": [f"{sort_field}:{sort_order}"],
-                    "attributesToRetrieve": attributes_to_retrieve,
-                },
+        # Every query accepts the search action parameters, its links
+        # point to the same page of the search action
+        paginators, queries, query_params_list = [], [], []
+        for spec in serializer.validated_data["queries"]:
+            query_string = urlencode(spec, doseq=True)
+            query_params = QueryDict(query_string)
+            paginator = SearchPagination(
+                request, query_params, url=f"{search_url}?{query_string}"
             )
-            documents = response["hits"]
-        except MeilisearchApiError:
-            raise APIException("Error while fetching data from meilisarch")
-        return Response(documents)
+            paginators.append(paginator)
+            queries.append(_search_params(query_params, paginator))
+            query_params_list.append(query_params)
+        return paginators, queries, query_params_list
+
+    @extend_schema(
+        parameters=FILTER_PARAMETERS,
+        responses={(200, "application/x-ndjson"): str, (200, "text/csv"): str},
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        renderer_classes=[NDJSONRenderer, CSVRenderer],
+    )
+    @conditional(TABLE_MARKER)
+    def export(self, request):
+        """
+        Stream every model matching the search filters as NDJSON or CSV
+        (format=csv or Accept: text/csv).
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        renderer = request.accepted_renderer
+        # Rows are read through a server-side cursor, memory use does not
+        # depend on the number of exported models
+        rows = (
+            publicholiday_values.to_representation(row)
+            for row in queryset.values_list(*publicholiday_values.fields).iterator(
+                chunk_size=renderer.chunk_size
+            )
+        )
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f"{content_type}; charset={renderer.charset}"
+        response = StreamingHttpResponse(
+            renderer.stream(rows), content_type=content_type
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="public_holidays.{renderer.format}"'
+        )
+        return response
+
+
+@aconditional(
+    index_marker(INDEX_NAME),
+    generation=lambda: get_search_cache().ageneration(),
+    media_type=ORJSONRenderer.media_type,
+)
+async def async_search(request):
+    """
+    Asynchronous counterpart of the PublicHolidayList search action.
+
+    Served by ASGI workers without blocking a thread on MeiliSearch, it
+    accepts the same query parameters and returns the same response.
+    """
+    paginator = SearchPagination(Request(request))
+    try:
+        with search_phase("async_search", "validation"):
+            query, params = _search_params(paginator.query_params, paginator)
+    except ValidationError as e:
+        return _json_response(e.detail, status_code=status.HTTP_400_BAD_REQUEST)
+    try:
+        response = await _asearch_or_fallback(
+            "async_search",
+            lambda: get_search_cache().aget_or_search(query, params, _asearch),
+            lambda: _fallback_search(query, params, paginator.query_params),
+        )
+    except MEILISEARCH_ERRORS:
+        return _json_response(
+            {"detail": "Error while fetching data from meilisarch"},
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+    with search_phase("async_search", "rendering"):
+        rendered = _json_response(paginator.get_paginated_data(response))
+    if isinstance(response, fallback.SearchResponse):
+        return skip_validators(rendered)
+    return rendered
+
+
+def _json_response(data, status_code=status.HTTP_200_OK):
+    # Rendered like the responses of the synchronous API
+    return HttpResponse(
+        ORJSONRenderer().render(data),
+        content_type=ORJSONRenderer.media_type,
+        status=status_code,
+    )
+
+
+def meilisearch_health(request):
+    """
+    State of the MeiliSearch circuit breaker of the serving worker process.
+    """
+    return JsonResponse(get_breaker().snapshot())
+
+
+def prometheus_metrics(request):
+    """
+    Metrics of the API and of indexing, in the Prometheus text format.
+    """
+    content, content_type = render_metrics()
+    return HttpResponse(content, content_type=content_type)